@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from typing import Dict, List, Tuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import TARGET_ICONS, MATCH_THRESHOLD, NMS_IOU_THRESHOLD, DESIGN_WIDTH, COMPASS_WIDTH_RATIO, STRAIGHT_AHEAD_THRESHOLD
+from core.audiofeedback import NavigationController, NavigationCore, TimedSink, NavEvent, from_algo_batch
+from core.pipeline import DetectionPipeline, best_per_type, COMPASS_X_START, COMPASS_X_END
+from core.detector import IconDetector
+from utils.synthetic import SCENARIOS, Scenario, SyntheticCompass, TruthOCR
+
+KINDS = ('pulse', 'center', 'earcon', 'arrival')
+MATCH_TIMEOUT = 3.0
+TRUTH_STEP = 0.001
+
+def truth_events(scenario: Scenario) -> List[Tuple[str, float, str]]:
+    events = []
+    thresholds = {'treasure': NavigationCore.TREASURE_THRESHOLDS, 'stockpile': NavigationCore.STOCKPILE_THRESHOLDS}
+    for track in scenario.tracks:
+        pulsing = centered = arrived = False
+        last_thresh = None
+        for t in np.arange(track.appear, min(track.disappear, scenario.duration), TRUTH_STEP):
+            state = track.state(t)
+            if state is None or not COMPASS_X_START <= state[0] <= COMPASS_X_END:
+                centered = False
+                continue
+            x_rel, distance = (state[0], float(round(state[1])))
+            if track.label == 'main_quest':
+                if distance <= NavigationCore.ARRIVAL_DIST:
+                    if not arrived:
+                        arrived = True
+                        events.append(('arrival', t, track.label))
+                    continue
+                if not pulsing:
+                    pulsing = True
+                    events.append(('pulse', t, track.label))
+                is_center = abs((x_rel - 0.5) / COMPASS_WIDTH_RATIO) < STRAIGHT_AHEAD_THRESHOLD
+                if is_center and not centered:
+                    events.append(('center', t, track.label))
+                centered = is_center
+            elif track.label in thresholds:
+                if distance > max(thresholds[track.label]):
+                    last_thresh = None
+                    continue
+                crossed = NavigationCore._crossed_threshold(distance, thresholds[track.label], last_thresh)
+                if crossed is not None:
+                    last_thresh = crossed
+                    events.append(('earcon', t, track.label))
+    return sorted(events, key=lambda e: e[1])
+
+def _matches(kind: str, label: str, event: NavEvent) -> bool:
+    if kind == 'pulse':
+        return event.kind == 'pulse'
+    if kind == 'center':
+        return event.kind == 'pulse' and event.pitch == 'center'
+    if kind == 'earcon':
+        return event.kind == 'earcon' and event.sound == label
+    return event.kind == 'speech' and event.category == 'arrival'
+
+def match_latencies(truth: List[Tuple[str, float, str]], emitted: List[Tuple[float, NavEvent]], start_time: float) -> Tuple[Dict[str, List[float]], Dict[str, int]]:
+    latencies: Dict[str, List[float]] = {kind: [] for kind in KINDS}
+    missed = {kind: 0 for kind in KINDS}
+    used = set()
+    for kind, t_truth, label in truth:
+        onset = start_time + t_truth
+        for i, (t_emit, event) in enumerate(emitted):
+            if i in used or t_emit < onset or not _matches(kind, label, event):
+                continue
+            if t_emit - onset <= MATCH_TIMEOUT:
+                used.add(i)
+                latencies[kind].append(t_emit - onset)
+                break
+        else:
+            missed[kind] += 1
+    return (latencies, missed)
+
+def run_once(scenario: Scenario, detector: IconDetector, width: int, height: int, ocr: str, tracking: bool) -> Tuple[Dict[str, List[float]], Dict[str, int], Dict]:
+    source = SyntheticCompass(scenario, width, height)
+    screen_info = source.get_screen_info()
+    if ocr == 'truth':
+        ocr_engine = TruthOCR(source)
+    else:
+        from core.ocr_engine import OCREngine
+        ocr_engine = OCREngine()
+    tracker = None
+    if tracking:
+        from core.tracker import CompassTracker
+        tracker = CompassTracker(detector, screen_info)
+    sink = TimedSink()
+    controller = NavigationController(sink=sink)
+    pipeline = DetectionPipeline(source, detector, ocr_engine, screen_info, tracker=tracker)
+    source.start()
+    pipeline.start()
+    try:
+        while source.elapsed() < scenario.duration:
+            packet = pipeline.get(timeout=0.05)
+            if packet is None:
+                continue
+            nav_icons = from_algo_batch(best_per_type(packet.output_list)) if packet.output_list else []
+            controller.update(nav_icons)
+            pipeline.release(packet)
+    finally:
+        pipeline.stop()
+        controller.stop()
+    latencies, missed = match_latencies(truth_events(scenario), sink.events, source.start_time)
+    return (latencies, missed, pipeline.stats())
+
+def summarize(latencies: Dict[str, List[float]], missed: Dict[str, int]) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    for kind in KINDS:
+        values = np.array(latencies[kind]) * 1000.0
+        summary[kind] = {'count': int(values.size), 'missed': missed[kind]}
+        if values.size:
+            summary[kind].update({'p50_ms': float(np.percentile(values, 50)), 'p95_ms': float(np.percentile(values, 95)), 'max_ms': float(values.max()), 'mean_ms': float(values.mean())})
+    return summary
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='CompassLayer — glass-to-ear latency harness (headless, no sound card needed)')
+    parser.add_argument('scenario', nargs='?', default='approach', help=f"Built-in scenario ({', '.join(SCENARIOS)}) or a scenario JSON file.")
+    parser.add_argument('--runs', type=int, default=3, help='Number of runs; each is offset by a random lead-in so onsets land at different capture phases (default: %(default)s).')
+    parser.add_argument('--width', type=int, default=1512, help='Synthetic screen width (default: %(default)s).')
+    parser.add_argument('--height', type=int, default=982, help='Synthetic screen height (default: %(default)s).')
+    parser.add_argument('--ocr', choices=('truth', 'tesseract'), default='truth', help="Distance source: scripted ground truth, or real Tesseract on the rendered labels (default: %(default)s).")
+    parser.add_argument('--no-tracking', dest='tracking', action='store_false', help='Disable compass-shift tracking.')
+    parser.add_argument('--json', metavar='PATH', help='Write the summary as JSON.')
+    parser.add_argument('--max-p95', type=float, default=None, metavar='MS', help='Exit with status 1 if any event kind has p95 latency above MS or missed events.')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+def main() -> int:
+    args = parse_args()
+    scenario = SCENARIOS[args.scenario] if args.scenario in SCENARIOS else Scenario.load(args.scenario)
+    detector = IconDetector(TARGET_ICONS, match_threshold=MATCH_THRESHOLD, nms_iou_threshold=NMS_IOU_THRESHOLD, manual_scale=args.width / DESIGN_WIDTH)
+    rng = np.random.default_rng(args.seed)
+    latencies: Dict[str, List[float]] = {kind: [] for kind in KINDS}
+    missed = {kind: 0 for kind in KINDS}
+    for run in range(args.runs):
+        lead_in = float(rng.uniform(0.0, 0.5))
+        run_latencies, run_missed, stats = run_once(scenario.shifted(lead_in), detector, args.width, args.height, args.ocr, args.tracking)
+        for kind in KINDS:
+            latencies[kind] += run_latencies[kind]
+            missed[kind] += run_missed[kind]
+        print(f"  [+] Run {run + 1}/{args.runs}: {stats['delivered']} frames, pipeline latency mean {stats['latency_ms_mean']:.0f} ms, detect {stats['detect']['busy_ms_mean']:.0f} ms/frame")
+    summary = summarize(latencies, missed)
+    print(f"\n  {'event':<10}{'count':>7}{'missed':>8}{'p50':>9}{'p95':>9}{'max':>9}  (ms)")
+    failed = False
+    for kind, row in summary.items():
+        if row['count']:
+            print(f"  {kind:<10}{row['count']:>7}{row['missed']:>8}{row['p50_ms']:>9.0f}{row['p95_ms']:>9.0f}{row['max_ms']:>9.0f}")
+        else:
+            print(f"  {kind:<10}{0:>7}{row['missed']:>8}{'-':>9}{'-':>9}{'-':>9}")
+        if args.max_p95 is not None and (row['missed'] or row['count'] and row['p95_ms'] > args.max_p95):
+            failed = True
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'scenario': args.scenario, 'runs': args.runs, 'tracking': args.tracking, 'ocr': args.ocr, 'events': summary}, f, indent=2)
+        print(f'\n  [+] Summary written to {args.json}')
+    if failed:
+        print(f'  [!] Latency budget of {args.max_p95:.0f} ms (p95) exceeded or events missed')
+    return 1 if failed else 0
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Tuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.audiofeedback import NavIcon, DistanceCache, LiveAudioSink, NavigationController, NavigationCore, from_algo_batch, generate_test_scenario, _build_tts_phrase
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'navigation_baseline.json')
+SCENARIOS = ('approaching', 'veer_left', 'veer_right', 'treasure_nearby', 'multi', 'stockpile_close', 'stockpile_far', 'all_icons', 'label_missing', 'zero_dist')
+ALLOC_SAMPLES = 500
+ALLOC_SLACK_BYTES = 64
+CALIBRATION_CALLS = 200000
+CALIBRATION_PASSES = 3
+RECHECKS = 2
+
+class StandInTTS:
+
+    def __init__(self):
+        self.spoken = 0
+
+    def speak(self, text: str, priority: int=0, category: Optional[str]=None) -> None:
+        self.spoken += 1
+
+    def discard(self, min_priority: int, interrupt: bool=True) -> None:
+        pass
+
+class StandInAudio:
+
+    def __init__(self):
+        self.tts = StandInTTS()
+        self.played = 0
+
+    def play_quest_pulse(self, icon: NavIcon, pitch: str='normal') -> None:
+        self.played += 1
+
+    def play_treasure_earcon(self, icon: NavIcon) -> None:
+        self.played += 1
+
+    def play_stockpile_earcon(self, icon: NavIcon) -> None:
+        self.played += 1
+
+def scripted_frames(frames_per_scenario: int, seed: int=0) -> List[List[NavIcon]]:
+    rng = np.random.default_rng(seed)
+    frames = []
+    for name in SCENARIOS:
+        base = generate_test_scenario(name)
+        for step in range(frames_per_scenario):
+            progress = step / frames_per_scenario
+            frame = []
+            for icon in base:
+                offset = float(np.clip(icon.offset * (1.0 - progress) + rng.normal(0.0, 0.01), 0.0, 1.0))
+                distance = None if icon.distance_m is None or rng.random() < 0.05 else round(icon.distance_m * (1.0 - 0.9 * progress))
+                frame.append(NavIcon(icon.icon_type, 'center' if offset < 0.04 else icon.direction, offset, distance))
+            frames.append(frame)
+    return frames
+
+def to_rows(frame: List[NavIcon]) -> List[Dict[str, Any]]:
+    return [{'label': icon.icon_type, 'direction': 'Straight' if icon.direction == 'center' else icon.direction.capitalize(), 'rel_offset': -icon.offset if icon.direction == 'left' else icon.offset, 'distance': 'N/A' if icon.distance_m is None else f'{icon.distance_m:.0f}m'} for icon in frame]
+
+def _stateless(fn: Callable, items: list) -> Tuple[Callable[[], Any], Callable[[Any, int], None]]:
+    return (lambda: None, lambda _, i: fn(items[i]))
+
+def build_suite(frames: List[List[NavIcon]], fps: float) -> Dict[str, Tuple[int, Callable[[], Any], Callable[[Any, int], None], Callable[[Any], None]]]:
+    rows = [to_rows(frame) for frame in frames]
+    icons = [icon for frame in frames for icon in frame]
+    distances = [icon.distance_m or 0.0 for icon in icons]
+    cache = DistanceCache()
+    teardown = lambda state: None
+
+    def controller_setup():
+        return NavigationController(sink=LiveAudioSink(StandInAudio()))
+
+    def offline_setup():
+        from core.offline_audio import OfflineNavigationController
+        fd, path = tempfile.mkstemp(prefix='compasslayer_bench_', suffix='.wav')
+        os.close(fd)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return OfflineNavigationController(output_path=path)
+
+    def offline_teardown(controller) -> None:
+        path = controller.renderer._spool_path
+        controller.export(path)
+        os.remove(path)
+    suite = {}
+    suite['from_algo_batch'] = (len(rows),) + _stateless(from_algo_batch, rows) + (teardown,)
+    suite['DistanceCache.resolve_icon'] = (len(icons),) + _stateless(cache.resolve_icon, icons) + (teardown,)
+    suite['NavigationCore._crossed_threshold'] = (len(distances), lambda: None, lambda _, i: NavigationCore._crossed_threshold(distances[i], NavigationCore.TREASURE_THRESHOLDS, 20.0), teardown)
+    suite['_build_tts_phrase'] = (len(icons),) + _stateless(_build_tts_phrase, icons) + (teardown,)
+    suite['NavigationController.update'] = (len(frames), controller_setup, lambda controller, i: controller.update(frames[i]), lambda controller: controller.stop())
+    suite['OfflineNavigationController.update'] = (len(frames), offline_setup, lambda controller, i: controller.update(frames[i], i / fps), offline_teardown)
+    return suite
+
+def measure(calls: int, setup: Callable[[], Any], call: Callable[[Any, int], None], teardown: Callable[[Any], None], repeat: int) -> Dict[str, float]:
+    best = float('inf')
+    calibration = []
+    for _ in range(repeat):
+        calibration.append(calibrate(CALIBRATION_PASSES))
+        state = setup()
+        start = time.perf_counter()
+        for i in range(calls):
+            call(state, i)
+        best = min(best, time.perf_counter() - start)
+        teardown(state)
+    calibration.append(calibrate(CALIBRATION_PASSES))
+    state = setup()
+    samples = min(ALLOC_SAMPLES, calls // 2)
+    peaks = np.zeros(samples)
+    tracemalloc.start()
+    try:
+        for i in range(samples):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            call(state, i)
+            peaks[i] = tracemalloc.get_traced_memory()[1] - before
+        retained = tracemalloc.get_traced_memory()[0]
+        for i in range(samples, calls):
+            call(state, i)
+        retained = tracemalloc.get_traced_memory()[0] - retained
+    finally:
+        tracemalloc.stop()
+        teardown(state)
+    return {'calls': calls, 'ns_per_call': best / calls * 1e9, 'calibration_ns': min(calibration), 'peak_bytes': float(np.median(peaks)), 'retained_bytes': float(retained)}
+
+def calibrate(repeat: int) -> float:
+    table = {str(i): i for i in range(64)}
+    keys = list(table)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        total = 0
+        for i in range(CALIBRATION_CALLS):
+            total += table[keys[i & 63]]
+        best = min(best, time.perf_counter() - start)
+    return best / CALIBRATION_CALLS * 1e9
+
+def _expected_ns(result: Dict[str, float], reference: Dict[str, float], baseline: Dict[str, Any], calibration_ns: float) -> float:
+    if reference.get('calibration_ns'):
+        return reference['ns_per_call'] * result['calibration_ns'] / reference['calibration_ns']
+    return reference['ns_per_call'] * (calibration_ns / baseline['calibration_ns'] if baseline.get('calibration_ns') else 1.0)
+
+def slow(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], tolerance: float, calibration_ns: float) -> List[str]:
+    return [name for name, result in results.items() if name in baseline['results'] and result['ns_per_call'] > _expected_ns(result, baseline['results'][name], baseline, calibration_ns) * (1.0 + tolerance)]
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], tolerance: float, calibration_ns: float) -> List[str]:
+    regressions = []
+    slowed = slow(results, baseline, tolerance, calibration_ns)
+    for name, result in results.items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            continue
+        if name in slowed:
+            expected = _expected_ns(result, reference, baseline, calibration_ns)
+            regressions.append(f"{name}: {result['ns_per_call']:.0f} ns/call vs baseline {expected:.0f} (+{(result['ns_per_call'] / expected - 1.0) * 100:.0f}%)")
+        if result['peak_bytes'] > reference['peak_bytes'] + ALLOC_SLACK_BYTES:
+            regressions.append(f"{name}: allocates {result['peak_bytes']:.0f} B/call vs baseline {reference['peak_bytes']:.0f} B")
+    return regressions
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='CompassLayer — micro-benchmarks for the per-frame navigation/audio control path')
+    parser.add_argument('--frames', type=int, default=2000, help='Frames generated per scripted scenario (default: %(default)s).')
+    parser.add_argument('--fps', type=float, default=240.0, help='Simulated frame rate for the offline controller (default: %(default)s).')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed passes per benchmark, each preceded by calibration-loop passes; the fastest of each counts (default: %(default)s).')
+    parser.add_argument('--only', metavar='NAME', action='append', help='Run only benchmarks whose name contains NAME (repeatable).')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON to compare against (default: benchmarks/navigation_baseline.json).')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline instead of comparing; each benchmark is measured several times and the median run is kept.')
+    parser.add_argument('--tolerance', type=float, default=0.3, help='Allowed ns/call slowdown before flagging a regression (default: %(default)s = 30%%).')
+    parser.add_argument('--json', metavar='PATH', help='Write the results as JSON.')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+def main() -> int:
+    args = parse_args()
+    frames = scripted_frames(args.frames, args.seed)
+    suite = build_suite(frames, args.fps)
+    results = {}
+    print(f"\n  {'benchmark':<38}{'calls':>8}{'ns/call':>10}{'B/call':>8}{'retained B':>12}")
+    for name, (calls, setup, call, teardown) in suite.items():
+        if args.only and not any(part in name for part in args.only):
+            continue
+        results[name] = result = measure(calls, setup, call, teardown, args.repeat)
+        print(f"  {name:<38}{calls:>8}{result['ns_per_call']:>10.0f}{result['peak_bytes']:>8.0f}{result['retained_bytes']:>12.0f}")
+    calibration_ns = min((result['calibration_ns'] for result in results.values()), default=None) or calibrate(args.repeat)
+    print(f'  {"(calibration loop)":<38}{CALIBRATION_CALLS:>8}{calibration_ns:>10.1f}')
+    host = {'python': platform.python_version(), 'machine': platform.machine(), 'processor': platform.processor() or platform.platform()}
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'host': host, 'calibration_ns': calibration_ns, 'results': results}, f, indent=2)
+    if args.save_baseline:
+        for name in results:
+            runs = [results[name]] + [measure(*suite[name], args.repeat) for _ in range(RECHECKS)]
+            results[name] = sorted(runs, key=lambda run: run['ns_per_call'] / run['calibration_ns'])[len(runs) // 2]
+        with open(args.baseline, 'w') as f:
+            json.dump({'host': host, 'frames': args.frames, 'calibration_ns': calibration_ns, 'results': results}, f, indent=2)
+        print(f'\n  [+] Baseline written to {args.baseline}')
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f'\n  [!] No baseline at {args.baseline}; run with --save-baseline to record one')
+        return 0
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    if baseline.get('host') != host:
+        print(f"\n  [!] Baseline was recorded on a different host ({baseline.get('host')}); timings are scaled by the calibration loop")
+    for _ in range(RECHECKS):
+        names = slow(results, baseline, args.tolerance, calibration_ns)
+        if not names:
+            break
+        print(f"  [!] Re-measuring {', '.join(names)} to rule out host noise")
+        for name in names:
+            retry = measure(*suite[name], args.repeat)
+            if retry['ns_per_call'] / retry['calibration_ns'] < results[name]['ns_per_call'] / results[name]['calibration_ns']:
+                results[name] = retry
+    regressions = compare(results, baseline, args.tolerance, calibration_ns)
+    for line in regressions:
+        print(f'  [!] Regression: {line}')
+    if not regressions:
+        print(f'\n  [+] No regressions against {os.path.basename(args.baseline)}')
+    return 1 if regressions else 0
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+from typing import Dict, List, Optional
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+MARKER = 'STARTUP '
+MILESTONES = ('interpreter', 'imported', 'initialised', 'first_frame', 'first_detection')
+PHASES = ('detector', 'ocr', 'audio')
+FIRST_DETECTION_TIMEOUT = 15.0
+
+def _child(args: argparse.Namespace) -> int:
+    marks: Dict[str, float] = {'interpreter': time.time() - args.spawned_at}
+    phases: Dict[str, float] = {}
+
+    def mark(name: str) -> None:
+        marks[name] = time.time() - args.spawned_at
+
+    def timed(name: str, fn, *fn_args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*fn_args, **kwargs)
+        finally:
+            phases[name] = time.perf_counter() - start
+    import config
+    config.CACHE_DIR = args.cache_dir
+    from concurrent.futures import ThreadPoolExecutor
+    from config import TARGET_ICONS, MATCH_THRESHOLD, NMS_IOU_THRESHOLD, DESIGN_WIDTH
+    from core.pipeline import DetectionPipeline
+    from core.audiofeedback import NavigationController
+    from core.settings import SettingsMenu
+    from core import i18n
+    from utils.synthetic import IconTrack, Scenario, SyntheticCompass, TruthOCR
+    mark('imported')
+    source = SyntheticCompass(Scenario(60.0, [IconTrack('main_quest', [(0.0, 0.55, 40.0)]), IconTrack('treasure', [(0.0, 0.47, 20.0)])]), args.width, args.height)
+    screen_info = source.get_screen_info()
+
+    def make_detector():
+        if args.detector == 'proposal':
+            from core.proposals import ProposalDetector as IconDetector
+        else:
+            from core.detector import IconDetector
+        return IconDetector(TARGET_ICONS, match_threshold=MATCH_THRESHOLD, nms_iou_threshold=NMS_IOU_THRESHOLD, manual_scale=args.width / DESIGN_WIDTH)
+
+    def make_ocr():
+        from core.ocr_engine import OCREngine
+        engine = OCREngine()
+        return engine if shutil.which('tesseract') else TruthOCR(source)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        detector_future = pool.submit(timed, 'detector', make_detector)
+        ocr_future = pool.submit(timed, 'ocr', make_ocr)
+        controller = timed('audio', NavigationController, backend=args.audio_backend, output_device='null')
+        detector = detector_future.result()
+        ocr_engine = ocr_future.result()
+    i18n.set_lang(SettingsMenu().language_code)
+    mark('initialised')
+    pipeline = DetectionPipeline(source, detector, ocr_engine, screen_info)
+    source.start()
+    pipeline.start()
+    try:
+        deadline = time.perf_counter() + FIRST_DETECTION_TIMEOUT
+        while time.perf_counter() < deadline:
+            packet = pipeline.get(timeout=0.05)
+            if packet is None:
+                continue
+            if 'first_frame' not in marks:
+                mark('first_frame')
+            found = bool(packet.output_list)
+            pipeline.release(packet)
+            if found:
+                mark('first_detection')
+                break
+    finally:
+        pipeline.stop()
+        controller.stop()
+    print(MARKER + json.dumps({'milestones': marks, 'phases': phases}), flush=True)
+    return 0 if 'first_detection' in marks else 1
+
+def run_once(args: argparse.Namespace, cache_dir: str) -> Optional[Dict[str, Dict[str, float]]]:
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', '--cache-dir', cache_dir, '--width', str(args.width), '--height', str(args.height), '--audio-backend', args.audio_backend, '--detector', args.detector, '--spawned-at', repr(time.time())]
+    result = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    for line in result.stdout.splitlines():
+        if line.startswith(MARKER):
+            return json.loads(line[len(MARKER):])
+    print(f'  [!] Startup run failed (exit {result.returncode}):\n{result.stderr[-2000:]}')
+    return None
+
+def summarize(runs: List[Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    for group, names in (('milestones', MILESTONES), ('phases', PHASES)):
+        for name in names:
+            values = np.array([run[group][name] for run in runs if name in run[group]]) * 1000.0
+            if values.size:
+                summary[name] = {'median_ms': float(np.median(values)), 'min_ms': float(values.min()), 'max_ms': float(values.max())}
+    return summary
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='CompassLayer — cold/warm startup benchmark (time from process launch to the first detection, headless)')
+    parser.add_argument('--runs', type=int, default=5, help='Launches per mode (default: %(default)s).')
+    parser.add_argument('--width', type=int, default=1512, help='Synthetic screen width (default: %(default)s).')
+    parser.add_argument('--height', type=int, default=982, help='Synthetic screen height (default: %(default)s).')
+    parser.add_argument('--audio-backend', choices=('pyo', 'numpy'), default='numpy', help='Audio engine to boot (default: %(default)s).')
+    parser.add_argument('--detector', choices=('template', 'proposal'), default='template', help='Icon detector (default: %(default)s).')
+    parser.add_argument('--json', metavar='PATH', help='Write the summary as JSON.')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--cache-dir', default='', help=argparse.SUPPRESS)
+    parser.add_argument('--spawned-at', type=float, default=0.0, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+def main() -> int:
+    args = parse_args()
+    if args.child:
+        return _child(args)
+    results = {}
+    warm_cache = tempfile.mkdtemp(prefix='compasslayer-startup-')
+    try:
+        print('  [+] Priming the warm cache...')
+        run_once(args, warm_cache)
+        for mode in ('cold', 'warm'):
+            runs = []
+            for run in range(args.runs):
+                cache_dir = tempfile.mkdtemp(prefix='compasslayer-startup-') if mode == 'cold' else warm_cache
+                try:
+                    outcome = run_once(args, cache_dir)
+                finally:
+                    if mode == 'cold':
+                        shutil.rmtree(cache_dir, ignore_errors=True)
+                if outcome is not None:
+                    runs.append(outcome)
+                print(f'\r  [+] {mode}: {run + 1}/{args.runs}', end='', flush=True)
+            print()
+            results[mode] = summarize(runs)
+    finally:
+        shutil.rmtree(warm_cache, ignore_errors=True)
+    print(f"\n  {'':<18}{'cold (ms)':>24}{'warm (ms)':>24}")
+    for name in MILESTONES + PHASES:
+        cells = []
+        for mode in ('cold', 'warm'):
+            stats = results[mode].get(name)
+            cells.append(f"{stats['median_ms']:>8.0f} [{stats['min_ms']:.0f}-{stats['max_ms']:.0f}]" if stats else '-')
+        print(f"  {name + (' @' if name in MILESTONES else ''):<18}{cells[0]:>24}{cells[1]:>24}")
+    print('\n  @ = elapsed since launch (median [min-max]); the others are init phase durations. Cold runs start with an empty CompassLayer cache.')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0 if all('first_detection' in results[mode] for mode in results) else 1
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,232 @@
+import os
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import tempfile
+import itertools
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from typing import Any, Dict, List, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import TARGET_ICONS, DESIGN_WIDTH, MATCH_THRESHOLD, NMS_IOU_THRESHOLD, BLUR_KSIZE, SCALE_FACTORS, OCR_THRESHOLD, DETECTOR_MODE
+
+MATCH_TOLERANCE = 0.01
+SCALE_SETS = {'wide': [0.8, 0.9, 1.0, 1.1, 1.25], 'narrow': [0.9, 1.0, 1.1], 'single': [1.0]}
+DEFAULT_SPACE = {'detector': ['template', 'proposal'], 'match_threshold': [0.85, 0.88, 0.9, 0.92, 0.95], 'nms_iou_threshold': [NMS_IOU_THRESHOLD], 'blur_ksize': [0, 5], 'scales': ['wide', 'narrow', 'single'], 'ocr_threshold': [130, OCR_THRESHOLD, 170]}
+_corpus: Optional[Dict[str, Any]] = None
+_with_ocr = False
+_max_ms = 0.0
+
+def build_synthetic_corpus(path: str, frames: int, width: int, height: int, noise: float, seed: int) -> None:
+    from utils.synthetic import SCENARIOS, SyntheticCompass
+    rng = np.random.default_rng(seed)
+    per_scenario = max(1, frames // len(SCENARIOS))
+    images = []
+    labels = []
+    for scenario in SCENARIOS.values():
+        source = SyntheticCompass(scenario, width, height)
+        for t in np.linspace(0.0, scenario.duration, per_scenario, endpoint=False):
+            image = source.render(float(t))
+            if noise > 0:
+                image = np.clip(image + rng.normal(0.0, noise, image.shape), 0, 255).astype(np.uint8)
+            images.append(image)
+            labels.append({'icons': [{'label': label, 'x_rel': x_rel, 'distance': round(distance)} for label, x_rel, distance in scenario.icons_at(float(t))]})
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'frames.npy'), np.stack(images))
+    with open(os.path.join(path, 'labels.json'), 'w') as f:
+        json.dump({'width': width, 'height': height, 'frames': labels}, f)
+    print(f'  [+] Synthetic corpus: {len(images)} frames at {width}x{height} written to {path}')
+
+def load_corpus(path: str) -> Dict[str, Any]:
+    import cv2
+    with open(os.path.join(path, 'labels.json'), 'r') as f:
+        corpus = json.load(f)
+    stacked = os.path.join(path, 'frames.npy')
+    if os.path.exists(stacked):
+        corpus['images'] = np.load(stacked, mmap_mode='r')
+    else:
+        corpus['images'] = [cv2.imread(os.path.join(path, frame['image']), cv2.IMREAD_COLOR) for frame in corpus['frames']]
+    return corpus
+
+def _init_worker(corpus_path: str, with_ocr: bool, max_ms: float) -> None:
+    import cv2
+    global _corpus, _with_ocr, _max_ms
+    cv2.setNumThreads(1)
+    _corpus = load_corpus(corpus_path)
+    _with_ocr = with_ocr
+    _max_ms = max_ms
+
+def _parse_distance(text: str) -> Optional[float]:
+    try:
+        return float(text.replace('m', '').strip())
+    except (AttributeError, ValueError):
+        return None
+
+def _scale_set(scales) -> tuple:
+    return tuple(SCALE_SETS[scales] if isinstance(scales, str) else scales)
+
+def evaluate(config: Dict[str, Any]) -> Dict[str, Any]:
+    if config['detector'] == 'proposal':
+        from core.proposals import ProposalDetector as IconDetector
+    else:
+        from core.detector import IconDetector
+    from core.pipeline import locate_detections, read_distances, OCR_OFFSET_LIMIT
+    width, height = (_corpus['width'], _corpus['height'])
+    detector = IconDetector(TARGET_ICONS, match_threshold=config['match_threshold'], nms_iou_threshold=config['nms_iou_threshold'], manual_scale=width / DESIGN_WIDTH, scale_factors=_scale_set(config['scales']))
+    ocr_engine = None
+    if _with_ocr:
+        from core.ocr_engine import OCREngine
+        ocr_engine = OCREngine(threshold=config['ocr_threshold'])
+    blur = (config['blur_ksize'], config['blur_ksize']) if config['blur_ksize'] else None
+    normalize = lambda px_x, px_y: (px_x / width, px_y / height)
+    detector.detect(np.ascontiguousarray(_corpus['images'][0]), width, height, normalize, True, blur)
+    tp = fp = fn = ocr_total = ocr_exact = 0
+    detect_time = ocr_time = 0.0
+    frames = 0
+    aborted = False
+    for image, frame in zip(_corpus['images'], _corpus['frames']):
+        image = np.ascontiguousarray(image)
+        start = time.perf_counter()
+        detections = detector.detect(image, width, height, normalize, True, blur)
+        detect_time += time.perf_counter() - start
+        frames += 1
+        unmatched = list(frame['icons'])
+        for det in detections:
+            truth = min((icon for icon in unmatched if icon['label'] == det['label']), key=lambda icon: abs(icon['x_rel'] - det['x_rel']), default=None)
+            if truth is not None and abs(truth['x_rel'] - det['x_rel']) <= MATCH_TOLERANCE:
+                unmatched.remove(truth)
+                det['truth'] = truth
+                tp += 1
+            else:
+                fp += 1
+        fn += len(unmatched)
+        if ocr_engine is not None:
+            located, _ = locate_detections(detections)
+            start = time.perf_counter()
+            read_distances(located, image, ocr_engine, width, height)
+            ocr_time += time.perf_counter() - start
+            for det in located:
+                if 'truth' in det and abs(det['rel_offset']) < OCR_OFFSET_LIMIT:
+                    ocr_total += 1
+                    ocr_exact += _parse_distance(det['distance']) == det['truth']['distance']
+        if _max_ms and (detect_time + ocr_time) / frames * 1000.0 > _max_ms:
+            aborted = frames < len(_corpus['frames'])
+            break
+    result = dict(config, aborted=aborted, detect_ms=detect_time / frames * 1000.0, ocr_ms=ocr_time / frames * 1000.0, precision=tp / (tp + fp) if tp + fp else 1.0, recall=tp / (tp + fn) if tp + fn else 1.0)
+    result['ms_per_frame'] = result['detect_ms'] + result['ocr_ms']
+    result['ocr_exact'] = ocr_exact / ocr_total if ocr_total else None
+    return result
+
+def expand_space(space: Dict[str, List[Any]], samples: int, seed: int) -> List[Dict[str, Any]]:
+    keys = list(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+    if samples and samples < len(grid):
+        grid = random.Random(seed).sample(grid, samples)
+    return grid
+
+def _objectives(row: Dict[str, Any]) -> tuple:
+    return (-row['ms_per_frame'], row['recall'], row['precision'], row['ocr_exact'] if row['ocr_exact'] is not None else 0.0)
+
+def pareto_front(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    front = []
+    for row in rows:
+        mine = _objectives(row)
+        dominated = False
+        for other in rows:
+            theirs = _objectives(other)
+            if other is not row and all(b >= a for a, b in zip(mine, theirs)) and any(b > a for a, b in zip(mine, theirs)):
+                dominated = True
+                break
+        if not dominated:
+            front.append(row)
+    return front
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='CompassLayer — parallel detector/OCR parameter sweep with a speed/accuracy Pareto front')
+    parser.add_argument('--corpus', metavar='DIR', default=None, help='Labelled corpus: labels.json plus frames.npy or the listed images. Generated synthetically if DIR does not exist (default: temporary synthetic corpus).')
+    parser.add_argument('--frames', type=int, default=40, help='Frames in a generated synthetic corpus (default: %(default)s).')
+    parser.add_argument('--width', type=int, default=1512, help='Synthetic screen width (default: %(default)s).')
+    parser.add_argument('--height', type=int, default=982, help='Synthetic screen height (default: %(default)s).')
+    parser.add_argument('--noise', type=float, default=4.0, help='Gaussian pixel noise added to synthetic frames (default: %(default)s).')
+    parser.add_argument('--space', metavar='JSON', default=None, help='Search space: {"match_threshold": [...], "nms_iou_threshold": [...], "blur_ksize": [...], "scales": [...], "ocr_threshold": [...]}; missing keys use the current config.')
+    parser.add_argument('--random', type=int, default=0, metavar='N', help='Evaluate N random points of the space instead of the full grid.')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes, one configuration each (default: %(default)s).')
+    parser.add_argument('--max-ms', type=float, default=2000.0, help='Abandon a configuration once it averages more than this per frame, e.g. a threshold so low that background matches everywhere (default: %(default)s).')
+    parser.add_argument('--no-ocr', dest='ocr', action='store_false', help='Skip OCR evaluation (detection only).')
+    parser.add_argument('--min-recall', type=float, default=0.95, help='Recall required for the recommendation (default: %(default)s).')
+    parser.add_argument('--min-precision', type=float, default=0.95, help='Precision required for the recommendation (default: %(default)s).')
+    parser.add_argument('--output', default='sweep_results.csv', help='CSV of every evaluated configuration (default: %(default)s).')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+def _ocr_available() -> bool:
+    try:
+        import pytesseract
+        from core import ocr_engine
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception as exc:
+        print(f'  [!] Tesseract unavailable ({exc.__class__.__name__}); sweeping detection only')
+        return False
+
+def main() -> int:
+    args = parse_args()
+    corpus_path = args.corpus or os.path.join(tempfile.mkdtemp(prefix='compasslayer-sweep-'), 'corpus')
+    if not os.path.exists(os.path.join(corpus_path, 'labels.json')):
+        build_synthetic_corpus(corpus_path, args.frames, args.width, args.height, args.noise, args.seed)
+    space = dict(DEFAULT_SPACE)
+    if args.space:
+        with open(args.space, 'r') as f:
+            space = {key: [value] for key, value in {'detector': DETECTOR_MODE, 'match_threshold': MATCH_THRESHOLD, 'nms_iou_threshold': NMS_IOU_THRESHOLD, 'blur_ksize': BLUR_KSIZE[0] if BLUR_KSIZE else 0, 'scales': list(SCALE_FACTORS), 'ocr_threshold': OCR_THRESHOLD}.items()}
+            space.update(json.load(f))
+    with_ocr = args.ocr and _ocr_available()
+    if not with_ocr:
+        space['ocr_threshold'] = [OCR_THRESHOLD]
+    configs = expand_space(space, args.random, args.seed)
+    print(f'  [+] Evaluating {len(configs)} configurations on {args.jobs} worker process(es)...')
+    rows = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs, mp_context=mp.get_context('spawn'), initializer=_init_worker, initargs=(corpus_path, with_ocr, args.max_ms)) as pool:
+        futures = [pool.submit(evaluate, config) for config in configs]
+        for done, future in enumerate(as_completed(futures), 1):
+            rows.append(future.result())
+            print(f'\r  [+] {done}/{len(configs)} done ({time.perf_counter() - start:.0f} s)', end='', flush=True)
+    print()
+    aborted = sum((row['aborted'] for row in rows))
+    if aborted:
+        print(f'  [!] {aborted} configuration(s) exceeded {args.max_ms:.0f} ms/frame and were abandoned after a partial pass')
+    front = pareto_front(rows)
+    on_front = {id(row) for row in front}
+    rows.sort(key=lambda row: (id(row) not in on_front, row['ms_per_frame']))
+    columns = ['detector', 'match_threshold', 'nms_iou_threshold', 'blur_ksize', 'scales', 'ocr_threshold', 'detect_ms', 'ocr_ms', 'ms_per_frame', 'precision', 'recall', 'ocr_exact']
+    with open(args.output, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns + ['aborted', 'pareto'])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(dict({key: row[key] for key in columns}, scales=json.dumps(row['scales']), aborted=row['aborted'], pareto=id(row) in on_front))
+    print(f"\n  {'':2}{'detector':<10}{'thresh':>7}{'nms':>6}{'blur':>5}  {'scales':<24}{'ocr_t':>6}{'ms/frame':>10}{'prec':>7}{'recall':>7}{'ocr':>7}")
+    for row in rows[:max(len(front), 10)]:
+        ocr = f"{row['ocr_exact']:.2f}" if row['ocr_exact'] is not None else '-'
+        print(f"  {'*' if id(row) in on_front else ' ':2}{row['detector']:<10}{row['match_threshold']:>7.2f}{row['nms_iou_threshold']:>6.2f}{row['blur_ksize']:>5}  {json.dumps(row['scales']):<24}{row['ocr_threshold']:>6}{row['ms_per_frame']:>10.1f}{row['precision']:>7.2f}{row['recall']:>7.2f}{ocr:>7}")
+    print(f'\n  * = Pareto front ({len(front)} of {len(rows)}). All results written to {args.output}')
+    reliable = [row for row in rows if not row['aborted'] and row['recall'] >= args.min_recall and row['precision'] >= args.min_precision]
+    if not reliable:
+        print(f'  [!] No configuration reached recall {args.min_recall} and precision {args.min_precision}')
+        return 1
+    best = min(reliable, key=lambda row: row['ms_per_frame'])
+    blur = f"({best['blur_ksize']}, {best['blur_ksize']})" if best['blur_ksize'] else 'None'
+    print(f"\n  [+] Cheapest reliable configuration ({best['ms_per_frame']:.1f} ms/frame) for config.py:")
+    print(f"    DETECTOR_MODE: str = '{best['detector']}'")
+    print(f"    MATCH_THRESHOLD: float = {best['match_threshold']}")
+    print(f"    NMS_IOU_THRESHOLD: float = {best['nms_iou_threshold']}")
+    print(f'    BLUR_KSIZE: tuple = {blur}')
+    print(f"    SCALE_FACTORS: tuple = {_scale_set(best['scales'])}")
+    if with_ocr:
+        print(f"    OCR_THRESHOLD: int = {best['ocr_threshold']}")
+    return 0
+if __name__ == '__main__':
+    sys.exit(main())
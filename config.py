@@ -8,8 +8,17 @@ def resource_path(relative_path: str) -> str:
     except Exception:
         base_path = os.path.abspath('.')
     return os.path.join(base_path, relative_path)
+
+def user_cache_dir(*parts: str) -> str:
+    if CACHE_DIR:
+        base_path = CACHE_DIR
+    elif sys.platform == 'win32':
+        base_path = os.path.join(os.environ.get('LOCALAPPDATA') or os.path.expanduser('~'), 'CompassLayer', 'Cache')
+    else:
+        base_path = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'compasslayer')
+    return os.path.join(base_path, *parts)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-TARGET_ICONS: Dict[str, Dict] = {'main_quest': {'path': resource_path(os.path.join('assets', 'icons', 'icon_main_centered.png'))}, 'treasure': {'path': resource_path(os.path.join('assets', 'icons', 'icon_treasure.png'))}, 'stockpile': {'path': resource_path(os.path.join('assets', 'icons', 'icon_stockpile.png'))}}
+TARGET_ICONS: Dict[str, Dict] = {'main_quest': {'path': resource_path(os.path.join('assets', 'icons', 'icon_main_centered.png')), 'priority': 0, 'refresh': 1}, 'treasure': {'path': resource_path(os.path.join('assets', 'icons', 'icon_treasure.png')), 'priority': 1, 'refresh': 3}, 'stockpile': {'path': resource_path(os.path.join('assets', 'icons', 'icon_stockpile.PNG')), 'priority': 2, 'refresh': 3}}
 COLORS: Dict[str, Tuple[int, int, int]] = {'main_quest': (0, 0, 255)}
 ROI_HEIGHT_RATIO: float = 0.17
 MATCH_THRESHOLD: float = 0.90
@@ -17,4 +26,29 @@ NMS_IOU_THRESHOLD: float = 0.3
 STRAIGHT_AHEAD_THRESHOLD: float = 0.04
 COMPASS_WIDTH_RATIO: float = 0.397
 DESIGN_WIDTH: int = 3024
-BLUR_KSIZE: tuple = (5, 5)
\ No newline at end of file
+BLUR_KSIZE: tuple = (5, 5)
+SCALE_FACTORS: tuple = (0.8, 0.9, 1.0, 1.1, 1.25)
+OCR_THRESHOLD: int = 150
+AUDIO_BACKEND: str = 'pyo'
+AUDIO_OUTPUT: str = 'auto'
+CAPTURE_MAX_FPS: float = 60.0
+DETECTOR_PROCESSES: int = 0
+OCR_IN_WORKER: bool = False
+PREVIEW_MODE: str = 'window'
+PREVIEW_FPS: float = 10.0
+COMPASS_TRACKING: bool = True
+EVENT_BUS_PORT: int = 47800
+CPU_BUDGET_PERCENT: float = 0.0
+CPU_CORES: tuple = ()
+CV_THREADS: int = 2
+LOW_PRIORITY: bool = True
+DETECTOR_MODE: str = 'template'
+CACHE_DIR: str = ''
+SOUND_AZIMUTH_STEP: float = 5.0
+LABEL_SCHEDULING: bool = True
+DETECT_BUDGET_MS: float = 0.0
+PROCESSING_SCALE: float = 1.0
+AUTOTUNE: bool = True
+AUTOTUNE_TARGET_FPS: float = 30.0
+AUTOTUNE_MIN_RECALL: float = 0.95
+AUTOTUNE_MIN_PRECISION: float = 0.95
@@ -1,19 +1,11 @@
-import pyo
 import numpy as np
 import time
 import threading
-import os
-from dataclasses import dataclass
+import heapq
+from dataclasses import dataclass, field
 from typing import Optional
 from core import i18n
 
-try:
-    import pyttsx3
-    TTS_AVAILABLE = True
-except ImportError:
-    print('pyttsx3 not found — TTS disabled. Install with: pip install pyttsx3')
-    TTS_AVAILABLE = False
-
 @dataclass
 class NavIcon:
     icon_type: str
@@ -43,15 +35,51 @@ def from_algo_data(raw: dict) -> Optional[NavIcon]:
 def from_algo_batch(rows: list[dict]) -> list[NavIcon]:
     return [icon for icon in (from_algo_data(r) for r in rows) if icon is not None]
 
+def icon_azimuth(icon: NavIcon) -> float:
+    clamped = min(1.0, icon.offset)
+    if icon.direction == 'center':
+        return 0.0
+    if icon.direction == 'right':
+        return clamped * 90.0
+    return -clamped * 90.0
+
 def generate_test_scenario(scenario: str='approaching') -> list[NavIcon]:
     scenarios = {'approaching': [NavIcon('main_quest', 'center', 0.05, 27.0)], 'veer_left': [NavIcon('main_quest', 'left', 0.6, 80.0)], 'veer_right': [NavIcon('main_quest', 'right', 0.7, 95.0)], 'treasure_nearby': [NavIcon('main_quest', 'right', 0.1, 45.0), NavIcon('treasure', 'left', 0.3, 18.0)], 'multi': [NavIcon('main_quest', 'left', 0.4, 60.0), NavIcon('treasure', 'right', 0.5, 22.0)], 'stockpile_close': [NavIcon('main_quest', 'center', 0.05, 40.0), NavIcon('stockpile', 'right', 0.35, 12.0)], 'stockpile_far': [NavIcon('main_quest', 'left', 0.3, 55.0), NavIcon('stockpile', 'right', 0.6, 80.0)], 'all_icons': [NavIcon('main_quest', 'center', 0.05, 30.0), NavIcon('treasure', 'left', 0.4, 20.0), NavIcon('stockpile', 'right', 0.5, 14.0)], 'label_missing': [NavIcon('main_quest', 'right', 0.6, None)], 'zero_dist': [NavIcon('main_quest', 'center', 0.0, 0.0)]}
     return scenarios.get(scenario, scenarios['approaching'])
 
+@dataclass(order=True)
+class _Utterance:
+    priority: int
+    seq: int
+    text: str = field(compare=False)
+    category: Optional[str] = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
 class TTSEngine:
+    PRIORITY_ALERT = 0
+    PRIORITY_MENU = 1
+    PRIORITY_INFO = 2
+    PRIORITY_SCAN = 3
+    SVSF_ASYNC = 1
+    SVSF_PURGE = 2
 
     def __init__(self):
-        self._queue: list[str] = []
-        self._lock = threading.Lock()
+        self._heap: list[_Utterance] = []
+        self._by_category: dict[str, _Utterance] = {}
+        self._cond = threading.Condition()
+        self._interrupt = threading.Event()
+        self._speaking: Optional[_Utterance] = None
+        self._seq = 0
+        self._depth = 0
+        self._max_depth = 0
+        self._spoken = 0
+        self._coalesced = 0
+        self._preempted = 0
+        self._dropped = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_last = 0.0
         self._thread: Optional[threading.Thread] = None
         self._active = False
         self._backend = None
@@ -60,6 +88,7 @@ class TTSEngine:
         self._current_voice_token = None
         self._fr_voice_id = None
         self._en_voice_id = None
+        self._win32_voice = None
         self.tts_rate: int = 0
         self.tts_volume: int = 60
         try:
@@ -84,9 +113,12 @@ class TTSEngine:
             return
         except ImportError:
             pass
-        if TTS_AVAILABLE:
+        try:
+            import pyttsx3
+        except ImportError:
+            pyttsx3 = None
+        if pyttsx3 is not None:
             try:
-                import pyttsx3
                 engine = pyttsx3.init('sapi5')
                 engine.setProperty('rate', 200)
                 engine.setProperty('volume', 0.95)
@@ -99,6 +131,7 @@ class TTSEngine:
                         self._fr_voice_id = v.id
                     if self._en_voice_id is None and any((hint in desc for hint in EN_HINTS)):
                         self._en_voice_id = v.id
+                engine.connect('started-word', self._on_pyttsx3_word)
                 self._pyttsx3_engine = engine
                 self._backend = 'pyttsx3'
                 self._active = True
@@ -108,43 +141,111 @@ class TTSEngine:
         else:
             print('  No TTS backend available (install pywin32 or pyttsx3)')
 
-    def speak(self, text: str) -> None:
+    def speak(self, text: str, priority: int=PRIORITY_INFO, category: Optional[str]=None) -> None:
         if not self._active:
             return
-        with self._lock:
-            self._queue.append(text)
-        if self._thread is None or not self._thread.is_alive():
-            self._thread = threading.Thread(target=self._drain_queue, daemon=True)
-            self._thread.start()
-
-    def speak_icon(self, icon: 'NavIcon') -> None:
-        self.speak(_build_tts_phrase(icon))
-
-    def wait(self) -> None:
-        if self._thread and self._thread.is_alive():
-            self._thread.join()
-
-    def stop(self) -> None:
-        with self._lock:
-            self._queue.clear()
+        with self._cond:
+            self._seq += 1
+            utterance = _Utterance(priority, self._seq, text, category, time.perf_counter())
+            if category is not None:
+                previous = self._by_category.get(category)
+                if previous is not None and (not previous.cancelled):
+                    previous.cancelled = True
+                    self._depth -= 1
+                    self._coalesced += 1
+                self._by_category[category] = utterance
+            heapq.heappush(self._heap, utterance)
+            self._depth += 1
+            self._max_depth = max(self._max_depth, self._depth)
+            current = self._speaking
+            if current is not None and self._should_preempt(current, utterance) and (not self._interrupt.is_set()):
+                self._interrupt.set()
+                self._preempted += 1
+            self._cond.notify_all()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._drain_queue, daemon=True)
+                self._thread.start()
+
+    def speak_icon(self, icon: 'NavIcon', priority: int=PRIORITY_SCAN) -> None:
+        self.speak(_build_tts_phrase(icon), priority=priority, category=f'icon:{icon.icon_type}')
+
+    def wait(self, timeout: Optional[float]=None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self._depth == 0 and self._speaking is None, timeout=timeout)
+
+    def stop(self, interrupt: bool=False) -> None:
+        self.discard(self.PRIORITY_ALERT, interrupt=interrupt)
+
+    def discard(self, min_priority: int, interrupt: bool=True) -> None:
+        with self._cond:
+            for utterance in self._heap:
+                if not utterance.cancelled and utterance.priority >= min_priority:
+                    utterance.cancelled = True
+                    self._depth -= 1
+                    self._dropped += 1
+            current = self._speaking
+            if interrupt and current is not None and current.priority >= max(min_priority, self.PRIORITY_MENU):
+                self._interrupt.set()
+            self._cond.notify_all()
+
+    def metrics(self) -> dict:
+        with self._cond:
+            spoken = self._spoken
+            return {'depth': self._depth, 'max_depth': self._max_depth, 'spoken': spoken, 'coalesced': self._coalesced, 'preempted': self._preempted, 'dropped': self._dropped, 'wait_ms_last': self._wait_last * 1000.0, 'wait_ms_mean': self._wait_total / spoken * 1000.0 if spoken else 0.0, 'wait_ms_max': self._wait_max * 1000.0}
+
+    @classmethod
+    def _should_preempt(cls, current: _Utterance, incoming: _Utterance) -> bool:
+        if current.priority < cls.PRIORITY_MENU:
+            return False
+        if incoming.priority < current.priority:
+            return True
+        return incoming.category is not None and incoming.category == current.category
+
+    def _pop_next(self) -> Optional[_Utterance]:
+        while self._heap:
+            utterance = heapq.heappop(self._heap)
+            if utterance.category is not None and self._by_category.get(utterance.category) is utterance:
+                del self._by_category[utterance.category]
+            if not utterance.cancelled:
+                self._depth -= 1
+                return utterance
+        return None
 
     def _drain_queue(self) -> None:
+        if self._backend == 'win32com':
+            try:
+                import pythoncom
+                pythoncom.CoInitialize()
+            except ImportError:
+                pass
         while True:
-            with self._lock:
-                if not self._queue:
-                    break
-                phrase = self._queue.pop(0)
+            with self._cond:
+                utterance = self._pop_next()
+                while utterance is None:
+                    self._speaking = None
+                    self._cond.notify_all()
+                    self._cond.wait()
+                    utterance = self._pop_next()
+                self._speaking = utterance
+                self._interrupt.clear()
+                waited = time.perf_counter() - utterance.enqueued_at
+                self._spoken += 1
+                self._wait_last = waited
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
             try:
                 if self._backend == 'win32com':
-                    self._speak_win32(phrase)
+                    self._speak_win32(utterance.text)
                 else:
-                    self._speak_pyttsx3(phrase)
+                    self._speak_pyttsx3(utterance.text)
             except Exception as e:
                 print(f'  TTS error: {e}')
 
     def _speak_win32(self, phrase: str) -> None:
-        import win32com.client
-        voice = win32com.client.Dispatch('SAPI.SpVoice')
+        if self._win32_voice is None:
+            import win32com.client
+            self._win32_voice = win32com.client.Dispatch('SAPI.SpVoice')
+        voice = self._win32_voice
         
         token = self._en_voice_token if i18n.get_lang() == 'en' else self._fr_voice_token
         if token is not None:
@@ -152,7 +253,11 @@ class TTSEngine:
             
         voice.Rate = self.tts_rate
         voice.Volume = self.tts_volume
-        voice.Speak(phrase, 0)
+        voice.Speak(phrase, self.SVSF_ASYNC)
+        while not voice.WaitUntilDone(30):
+            if self._interrupt.is_set():
+                voice.Speak('', self.SVSF_ASYNC | self.SVSF_PURGE)
+                break
 
     def _speak_pyttsx3(self, phrase: str) -> None:
         vid = self._en_voice_id if i18n.get_lang() == 'en' else self._fr_voice_id
@@ -163,6 +268,10 @@ class TTSEngine:
         self._pyttsx3_engine.say(phrase)
         self._pyttsx3_engine.runAndWait()
 
+    def _on_pyttsx3_word(self, name, location, length) -> None:
+        if self._interrupt.is_set():
+            self._pyttsx3_engine.stop()
+
 def _build_tts_phrase(icon: NavIcon) -> str:
     label = i18n.get_text(icon.icon_type)
     if icon.direction == 'center' or icon.offset < 0.05:
@@ -188,94 +297,70 @@ class AudioEngine:
     VOLUME_QUEST = 0.8
     VOLUME_TREASURE = 3.5
     VOLUME_STOCKPILE = 0.15
+    VOLUME_READY = 0.5
+    SPATIALIZER = 'hrtf'
+    VOICES = 4
 
     def __init__(self):
-        self.server = pyo.Server(audio='portaudio', sr=self.SAMPLE_RATE, nchnls=2, duplex=0).boot()
-        self.server.start()
-        from config import resource_path
-        audio_dir = resource_path(os.path.join('assets', 'audio'))
-        self.quest = self._load(os.path.join(audio_dir, 'koto_note.wav'), self.VOLUME_QUEST)
-        self.treasure = self._load(os.path.join(audio_dir, 'koto_trill.wav'), self.VOLUME_TREASURE)
-        self.stockpile = self._load(os.path.join(audio_dir, 'koto_stockpile.wav'), self.VOLUME_STOCKPILE)
+        self._boot()
+        from core.soundbank import SoundBank
+        self.bank = SoundBank(self.SPATIALIZER, sample_rate=self.SAMPLE_RATE)
+        self._prepare()
+        self.quest = self._load('quest', self.VOLUME_QUEST)
+        self.treasure = self._load('treasure', self.VOLUME_TREASURE)
+        self.stockpile = self._load('stockpile', self.VOLUME_STOCKPILE)
+        self.ready = self._load('ready', self.VOLUME_READY)
         self.tts = TTSEngine()
-        self.pulse_rate_multiplier: float = 1.0
         self.ping_volume_multiplier: float = 1.0
-        self._pulse_active = False
-        self._pulse_thread: Optional[threading.Thread] = None
-        self._current_icon: Optional[NavIcon] = None
-        self._lock = threading.Lock()
+
+    def _boot(self):
+        import pyo
+        self.server = pyo.Server(audio='portaudio', sr=self.SAMPLE_RATE, nchnls=2, duplex=0).boot()
+        self.server.start()
 
     def shutdown(self):
         self.server.stop()
         self.server.shutdown()
 
-    def _load(self, filename: str, volume: float) -> Optional[dict]:
-        if not os.path.exists(filename):
-            print(f'  [!] Missing audio file: {filename}')
+    def _prepare(self):
+        import pyo
+        self.tables = {}
+        for key, variants in self.bank.variants.items():
+            for index, variant in enumerate(variants):
+                table = pyo.DataTable(variant.shape[0], chnls=2)
+                for chnl in range(2):
+                    np.copyto(np.asarray(table.getBuffer(chnl)), variant[:, chnl], casting='unsafe')
+                self.tables[key + (index,)] = table
+        self.voices = []
+        self._next_voice = 0
+        if not self.tables:
+            return
+        first = next(iter(self.tables.values()))
+        for _ in range(self.VOICES):
+            reader = pyo.TableRead(first, freq=first.getRate(), loop=0)
+            reader.stop()
+            amp = pyo.Sig(0.0)
+            self.voices.append({'reader': reader, 'amp': amp, 'out': (reader * amp).out()})
+
+    def _load(self, sound: str, volume: float) -> Optional[dict]:
+        if self.bank.locate(sound, 0.0) is None:
             return None
-        sf = pyo.SfPlayer(filename, loop=False)
-        sf.stop()
-        sf_mono = sf.mix(1)
-        amp = pyo.Sig(volume)
-        azi = pyo.Sig(0.0)
-        panned = pyo.HRTF(sf_mono * amp, azimuth=azi, elevation=0.0).out()
-        print(f'  [+] Loaded {filename}')
-        return {'sf': sf, 'azi': azi, 'panned': panned, 'amp': amp, 'vol': volume}
-
-    def _play_sound(self, player: Optional[dict], icon: NavIcon, volume_override: Optional[float]=None, is_center: bool=False, is_almost_center: bool=False):
-        if not player:
+        return {'sound': sound, 'vol': volume}
+
+    def _play_sound(self, player: Optional[dict], icon: NavIcon, pitch: str='normal', volume_override: Optional[float]=None):
+        if not player or not self.voices:
             return
-        clamped = min(1.0, icon.offset)
-        if icon.direction == 'center':
-            azi_val = 0.0
-        elif icon.direction == 'right':
-            azi_val = clamped * 90.0
-        else:
-            azi_val = -clamped * 90.0
-        player['azi'].value = azi_val
-        if is_center:
-            player['sf'].setSpeed(1.059463)
-        elif is_almost_center:
-            player['sf'].setSpeed(1.029302)
-        else:
-            player['sf'].setSpeed(1.0)
+        table = self.tables[self.bank.locate(player['sound'], icon_azimuth(icon), pitch)]
+        voice = self.voices[self._next_voice]
+        self._next_voice = (self._next_voice + 1) % len(self.voices)
         v = volume_override if volume_override is not None else player['vol']
-        player['amp'].value = v * self.ping_volume_multiplier
-        player['sf'].play()
-
-    def _pulse_interval(self, distance_m: float) -> float:
-        interval = 2.5 * (distance_m / 100.0) ** 0.8 * self.pulse_rate_multiplier
-        return round(max(0.25, min(6.0, interval)), 2)
+        voice['amp'].value = v * self.ping_volume_multiplier
+        voice['reader'].setTable(table)
+        voice['reader'].freq = table.getRate()
+        voice['reader'].play()
 
-    def start_quest_pulse(self, icon: NavIcon):
-        with self._lock:
-            self._current_icon = icon
-            if not self._pulse_active:
-                self._pulse_active = True
-                self._pulse_thread = threading.Thread(target=self._pulse_loop, daemon=True)
-                self._pulse_thread.start()
-
-    def update_quest_icon(self, icon: NavIcon):
-        with self._lock:
-            self._current_icon = icon
-
-    def stop_quest_pulse(self):
-        with self._lock:
-            self._pulse_active = False
-
-    def _pulse_loop(self):
-        my_thread = threading.current_thread()
-        while True:
-            with self._lock:
-                active = self._pulse_active
-                icon = self._current_icon
-                is_current = my_thread is self._pulse_thread
-            if not active or icon is None or (not is_current):
-                break
-            is_center = icon.direction == 'center'
-            is_almost_center = abs(icon.offset) <= 0.1 and not is_center
-            self._play_sound(self.quest, icon, is_center=is_center, is_almost_center=is_almost_center)
-            time.sleep(self._pulse_interval(icon.distance_m))
+    def play_quest_pulse(self, icon: NavIcon, pitch: str='normal'):
+        self._play_sound(self.quest, icon, pitch)
 
     def play_treasure_earcon(self, icon: NavIcon):
         self._play_sound(self.treasure, icon)
@@ -283,27 +368,43 @@ class AudioEngine:
     def play_stockpile_earcon(self, icon: NavIcon):
         self._play_sound(self.stockpile, icon)
 
-    def play_scan(self, icons: list[NavIcon]):
-        print('\n  SCAN MODE — sweeping compass icons...\n')
+    def play_ready_cue(self):
+        self._play_sound(self.ready, NavIcon('ready', 'center', 0.0, None))
+
+
+class NumpyAudioEngine(AudioEngine):
+    SPATIALIZER = 'pan'
+
+    def __init__(self, output_device: str='auto'):
+        self.output_device = output_device
+        super().__init__()
+
+    def _boot(self):
+        from core.mixer import NumpyMixer, open_output
+        self.mixer = NumpyMixer(self.SAMPLE_RATE)
+        self.server = open_output(self.mixer, self.output_device)
+        self.server.start()
+
+    def shutdown(self):
+        self.server.stop()
+
+    def _prepare(self):
+        pass
+
+    def _play_sound(self, player: Optional[dict], icon: NavIcon, pitch: str='normal', volume_override: Optional[float]=None):
+        if not player:
+            return
+        v = volume_override if volume_override is not None else player['vol']
+        self.mixer.play_buffer(self.bank.get(player['sound'], icon_azimuth(icon), pitch), gain=v * self.ping_volume_multiplier)
 
-        def sort_key(i):
-            return -i.offset if i.direction == 'left' else i.offset
-        sorted_icons = sorted(icons, key=sort_key)
-        for icon in sorted_icons:
-            if icon.icon_type == 'main_quest':
-                self._play_sound(self.quest, icon, is_center=icon.direction == 'center')
-            elif icon.icon_type == 'treasure':
-                self._play_sound(self.treasure, icon)
-            elif icon.icon_type == 'stockpile':
-                self._play_sound(self.stockpile, icon)
-            arrow = '<-' if icon.direction == 'left' else '->' if icon.direction == 'right' else '.'
-            print(f'    {icon.icon_type:<14}  {arrow} {icon.direction:<8}  {icon.distance_m:.0f}m')
-            time.sleep(0.65)
-        time.sleep(0.2)
-        for icon in sorted_icons:
-            phrase = _build_tts_phrase(icon)
-            print(f'      "{phrase}"')
-            self.tts.speak(phrase)
+def create_audio_engine(backend: str='pyo', output_device: str='auto') -> AudioEngine:
+    if backend == 'pyo':
+        try:
+            import pyo
+            return AudioEngine()
+        except ImportError:
+            print('  [!] pyo not installed, falling back to the NumPy audio backend')
+    return NumpyAudioEngine(output_device)
 
 class DistanceCache:
     DEFAULT_DIST: float = 50.0
@@ -331,63 +432,170 @@ class DistanceCache:
     def invalidate(self, icon_type: str) -> None:
         self._cache.pop(icon_type, None)
 
-class NavigationController:
+@dataclass
+class NavEvent:
+    time: float
+    kind: str
+    sound: str = ''
+    icon: Optional[NavIcon] = None
+    pitch: str = 'normal'
+    text: str = ''
+    priority: int = TTSEngine.PRIORITY_INFO
+    category: Optional[str] = None
+
+class NavigationCore:
     TREASURE_THRESHOLDS = [30.0, 20.0, 10.0, 5.0]
     STOCKPILE_THRESHOLDS = [15.0, 10.0, 5.0]
-
-    def __init__(self):
-        self.audio = AudioEngine()
+    ARRIVAL_DIST = 5.0
+    REARM_DIST = 8.0
+    QUEST_TIMEOUT = 6.0
+    MIN_PULSE_INTERVAL = 0.25
+    MAX_PULSE_INTERVAL = 6.0
+    SCAN_STEP = 0.65
+    SCAN_SPEECH_DELAY = 0.2
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.pulse_rate_multiplier: float = 1.0
         self._dist_cache = DistanceCache()
+        self._lock = threading.RLock()
         self._last_treasure_thresh: Optional[float] = None
         self._last_stockpile_thresh: Optional[float] = None
         self._last_quest_seen: Optional[float] = None
         self._quest_arrived: bool = False
+        self._quest: Optional[NavIcon] = None
+        self._pulsing: bool = False
+        self._pulse_start: float = 0.0
+        self._last_pulse: Optional[float] = None
+        self._scan: list[tuple[float, str, str]] = []
+        self._scan_icons: dict[str, NavIcon] = {}
+        self._now: float = 0.0
 
-    def update(self, icons: list[NavIcon]):
-        resolved = [self._dist_cache.resolve_icon(i) for i in icons]
-        quest = next((i for i in resolved if i.icon_type == 'main_quest'), None)
-        treasure = next((i for i in resolved if i.icon_type == 'treasure'), None)
-        stockpile = next((i for i in resolved if i.icon_type == 'stockpile'), None)
-        now = time.time()
-        if quest:
-            self._last_quest_seen = now
-            if quest.distance_m is not None and quest.distance_m <= 5.0:
-                if not self._quest_arrived:
-                    self._quest_arrived = True
-                    self.audio.stop_quest_pulse()
-                    self.audio.tts.speak(i18n.get_text('arrived'))
-            else:
-                if self._quest_arrived and quest.distance_m is not None and (quest.distance_m > 8.0):
-                    self._quest_arrived = False
-                if not self._quest_arrived:
-                    self.audio.update_quest_icon(quest)
-                    if not self.audio._pulse_active:
-                        self.audio.start_quest_pulse(quest)
-        elif self._last_quest_seen is not None and now - self._last_quest_seen > 6.0:
-            self.audio.stop_quest_pulse()
-            self._last_quest_seen = None
-        if treasure:
-            crossed = self._crossed_threshold(treasure.distance_m, self.TREASURE_THRESHOLDS, self._last_treasure_thresh)
-            if crossed is not None:
-                self.audio.play_treasure_earcon(treasure)
-                self._last_treasure_thresh = crossed
-        else:
-            self._last_treasure_thresh = None
-        if stockpile:
-            crossed = self._crossed_threshold(stockpile.distance_m, self.STOCKPILE_THRESHOLDS, self._last_stockpile_thresh)
-            if crossed is not None:
-                self.audio.play_stockpile_earcon(stockpile)
-                self._last_stockpile_thresh = crossed
+    def resolve_icon(self, icon: NavIcon) -> NavIcon:
+        return self._dist_cache.resolve_icon(icon)
+
+    def pulse_interval(self, distance_m: float) -> float:
+        interval = 2.5 * (max(1.0, distance_m) / 100.0) ** 0.8 * self.pulse_rate_multiplier
+        return round(max(self.MIN_PULSE_INTERVAL, min(self.MAX_PULSE_INTERVAL, interval)), 2)
+
+    @property
+    def pulse_active(self) -> bool:
+        return self._pulsing
+
+    @property
+    def scan_active(self) -> bool:
+        return bool(self._scan)
+
+    def _pulse_deadline(self) -> Optional[float]:
+        if not self._pulsing or self._quest is None:
+            return None
+        if self._last_pulse is None:
+            return self._pulse_start
+        return self._last_pulse + self.pulse_interval(self._quest.distance_m)
+
+    def next_deadline(self) -> Optional[float]:
+        with self._lock:
+            deadlines = [d for d in (self._pulse_deadline(), self._scan[0][0] if self._scan else None) if d is not None]
+            return min(deadlines, default=None)
+
+    def start_scan(self, icons: list[NavIcon], now: float) -> list[NavIcon]:
+        with self._lock:
+            self.cancel_scan(now)
+            ordered = sorted((self._dist_cache.resolve_icon(i) for i in icons), key=lambda i: -i.offset if i.direction == 'left' else i.offset)
+            self._scan_icons = {}
+            for icon in ordered:
+                self._scan_icons.setdefault(icon.icon_type, icon)
+            sweep = [icon.icon_type for icon in ordered if self._scan_icons[icon.icon_type] is icon]
+            speech_start = now + len(sweep) * self.SCAN_STEP + self.SCAN_SPEECH_DELAY
+            self._scan = [(now + i * self.SCAN_STEP, 'scan', icon_type) for i, icon_type in enumerate(sweep)]
+            self._scan += [(speech_start, 'speech', icon_type) for icon_type in sweep]
+            self.advance(now)
+            return [self._scan_icons[icon_type] for icon_type in sweep]
+
+    def cancel_scan(self, now: Optional[float]=None) -> None:
+        with self._lock:
+            if not self._scan:
+                return
+            self._scan = []
+            self.sink.emit(NavEvent(self._now if now is None else now, 'cancel', priority=TTSEngine.PRIORITY_SCAN))
+
+    def _emit_scan_step(self, due: float) -> None:
+        _, kind, icon_type = self._scan.pop(0)
+        icon = self._scan_icons[icon_type]
+        if kind == 'scan':
+            self.sink.emit(NavEvent(due, 'scan', sound=icon_type, icon=icon, pitch='center' if icon.direction == 'center' else 'normal'))
         else:
-            self._last_stockpile_thresh = None
+            self.sink.emit(NavEvent(due, 'speech', icon=icon, text=_build_tts_phrase(icon), priority=TTSEngine.PRIORITY_SCAN, category=f'icon:{icon_type}'))
 
-    def scan(self, icons: list[NavIcon]):
-        resolved = [self._dist_cache.resolve_icon(i) for i in icons]
-        self.audio.play_scan(resolved)
-        self.audio.tts.wait()
+    def update(self, icons: list[NavIcon], now: float) -> None:
+        with self._lock:
+            resolved = [self._dist_cache.resolve_icon(i) for i in icons]
+            if self._scan:
+                for icon in resolved:
+                    if icon.icon_type in self._scan_icons:
+                        self._scan_icons[icon.icon_type] = icon
+            quest = next((i for i in resolved if i.icon_type == 'main_quest'), None)
+            treasure = next((i for i in resolved if i.icon_type == 'treasure'), None)
+            stockpile = next((i for i in resolved if i.icon_type == 'stockpile'), None)
+            if quest:
+                self._last_quest_seen = now
+                if quest.distance_m <= self.ARRIVAL_DIST:
+                    if not self._quest_arrived:
+                        self._quest_arrived = True
+                        self._pulsing = False
+                        self.sink.emit(NavEvent(now, 'speech', icon=quest, text=i18n.get_text('arrived'), priority=TTSEngine.PRIORITY_ALERT, category='arrival'))
+                else:
+                    if self._quest_arrived and quest.distance_m > self.REARM_DIST:
+                        self._quest_arrived = False
+                    if not self._quest_arrived:
+                        self._quest = quest
+                        if not self._pulsing:
+                            self._pulsing = True
+                            self._pulse_start = now
+                            self._last_pulse = None
+            elif self._last_quest_seen is not None and now - self._last_quest_seen > self.QUEST_TIMEOUT:
+                self._pulsing = False
+                self._last_quest_seen = None
+            self._last_treasure_thresh = self._update_threshold(treasure, 'treasure', self.TREASURE_THRESHOLDS, self._last_treasure_thresh, now)
+            self._last_stockpile_thresh = self._update_threshold(stockpile, 'stockpile', self.STOCKPILE_THRESHOLDS, self._last_stockpile_thresh, now)
+            self.advance(now)
+
+    def advance(self, now: float) -> None:
+        with self._lock:
+            self._now = now
+            while True:
+                due = self.next_deadline()
+                if due is None or due > now:
+                    break
+                if self._scan and self._scan[0][0] == due:
+                    self._emit_scan_step(due)
+                    continue
+                quest = self._quest
+                if now - due >= self.pulse_interval(quest.distance_m):
+                    due = now
+                self._last_pulse = due
+                is_center = quest.direction == 'center'
+                if is_center:
+                    pitch = 'center'
+                elif abs(quest.offset) <= 0.1:
+                    pitch = 'almost_center'
+                else:
+                    pitch = 'normal'
+                self.sink.emit(NavEvent(due, 'pulse', sound='quest', icon=quest, pitch=pitch))
 
     def stop(self) -> None:
-        self.audio.stop_quest_pulse()
+        with self._lock:
+            self._pulsing = False
+            self.cancel_scan()
+
+    def _update_threshold(self, icon: Optional[NavIcon], sound: str, thresholds: list[float], last_thresh: Optional[float], now: float) -> Optional[float]:
+        if icon is None or icon.distance_m > max(thresholds):
+            return None
+        crossed = self._crossed_threshold(icon.distance_m, thresholds, last_thresh)
+        if crossed is None:
+            return last_thresh
+        self.sink.emit(NavEvent(now, 'earcon', sound=sound, icon=icon))
+        return crossed
 
     @staticmethod
     def _crossed_threshold(distance_m: float, thresholds: list[float], last_thresh: Optional[float]) -> Optional[float]:
@@ -399,6 +607,85 @@ class NavigationController:
             return None
         return tightest
 
+class LiveAudioSink:
+
+    def __init__(self, audio: AudioEngine):
+        self.audio = audio
+
+    def emit(self, event: NavEvent) -> None:
+        if event.kind == 'pulse':
+            self.audio.play_quest_pulse(event.icon, event.pitch)
+        elif event.kind == 'scan':
+            arrow = '<-' if event.icon.direction == 'left' else '->' if event.icon.direction == 'right' else '.'
+            print(f'    {event.sound:<14}  {arrow} {event.icon.direction:<8}  {event.icon.distance_m:.0f}m')
+            if event.sound == 'main_quest':
+                self.audio.play_quest_pulse(event.icon, event.pitch)
+            elif event.sound == 'treasure':
+                self.audio.play_treasure_earcon(event.icon)
+            elif event.sound == 'stockpile':
+                self.audio.play_stockpile_earcon(event.icon)
+        elif event.kind == 'cancel':
+            self.audio.tts.discard(event.priority)
+        elif event.kind == 'earcon':
+            if event.sound == 'treasure':
+                self.audio.play_treasure_earcon(event.icon)
+            elif event.sound == 'stockpile':
+                self.audio.play_stockpile_earcon(event.icon)
+        elif event.kind == 'speech':
+            self.audio.tts.speak(event.text, priority=event.priority, category=event.category)
+
+class RecordingSink:
+
+    def __init__(self):
+        self.events: list[NavEvent] = []
+
+    def emit(self, event: NavEvent) -> None:
+        self.events.append(event)
+
+class TimedSink:
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.events: list[tuple[float, NavEvent]] = []
+        self._lock = threading.Lock()
+
+    def emit(self, event: NavEvent) -> None:
+        with self._lock:
+            self.events.append((self.clock(), event))
+
+class NavigationController:
+
+    def __init__(self, backend: str='pyo', output_device: str='auto', sink=None):
+        self.audio = create_audio_engine(backend, output_device) if sink is None else None
+        self.core = NavigationCore(sink if sink is not None else LiveAudioSink(self.audio))
+        self._wake = threading.Event()
+        self._pulse_thread = threading.Thread(target=self._pulse_loop, daemon=True)
+        self._pulse_thread.start()
+
+    def update(self, icons: list[NavIcon]):
+        self.core.update(icons, time.perf_counter())
+        self._wake.set()
+
+    def _pulse_loop(self):
+        while True:
+            self._wake.clear()
+            self.core.advance(time.perf_counter())
+            deadline = self.core.next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            self._wake.wait(timeout)
+
+    def scan(self, icons: list[NavIcon]):
+        print('\n  SCAN MODE — sweeping compass icons...\n')
+        self.core.start_scan(icons, time.perf_counter())
+        self._wake.set()
+
+    def cancel_scan(self) -> None:
+        self.core.cancel_scan(time.perf_counter())
+
+    def stop(self) -> None:
+        self.core.stop()
+        self._wake.set()
+
 def run_demo():
     controller = NavigationController()
     print('=' * 55)
@@ -410,10 +697,10 @@ def run_demo():
         icons = generate_test_scenario(scenario_key)
         print(f'  >  {description}')
         for icon in icons:
-            resolved = controller._dist_cache.resolve_icon(icon)
+            resolved = controller.core.resolve_icon(icon)
             bar = _direction_bar(icon.direction, icon.offset)
             raw_str = f'{icon.distance_m:.0f}m' if icon.distance_m is not None else 'N/A'
-            print(f'     {icon.icon_type:<14}  {bar}  raw={raw_str}  resolved={resolved.distance_m:.0f}m  (pulse every ~{controller.audio._pulse_interval(resolved.distance_m):.1f}s)')
+            print(f'     {icon.icon_type:<14}  {bar}  raw={raw_str}  resolved={resolved.distance_m:.0f}m  (pulse every ~{controller.core.pulse_interval(resolved.distance_m):.1f}s)')
         start = time.time()
         while time.time() - start < 6.0:
             controller.update(icons)
@@ -424,6 +711,9 @@ def run_demo():
     print('Running scan mode demo (all three icon types + TTS)...')
     all_icons = generate_test_scenario('all_icons')
     controller.scan(all_icons)
+    while controller.core.scan_active:
+        time.sleep(0.1)
+    controller.audio.tts.wait()
     print()
     print('  Demo done!')
     controller.audio.shutdown()
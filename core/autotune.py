@@ -0,0 +1,172 @@
+import io
+import os
+import json
+import time
+import hashlib
+import platform
+import contextlib
+import numpy as np
+from typing import Any, Dict, List, Optional
+from config import TARGET_ICONS, MATCH_THRESHOLD, NMS_IOU_THRESHOLD, DESIGN_WIDTH, BLUR_KSIZE, SCALE_FACTORS, AUTOTUNE_TARGET_FPS, AUTOTUNE_MIN_RECALL, AUTOTUNE_MIN_PRECISION, user_cache_dir
+
+class DetectorAutotuner:
+    VERSION = 2
+    FRAMES = 18
+    NOISE = 2.0
+    ICON_SCALES = (0.9, 1.0, 1.1)
+    MATCH_TOLERANCE = 0.01
+    MAX_SECONDS = 60.0
+    SCALE_SETS = {'single': (1.0,), 'narrow': (0.9, 1.0, 1.1), 'wide': SCALE_FACTORS}
+    PROCESSING_SCALES = (0.5, 0.75, 1.0)
+
+    def __init__(self, screen_info: Dict[str, int], core_count: int=1, threshold: float=MATCH_THRESHOLD, target_fps: float=AUTOTUNE_TARGET_FPS, min_recall: float=AUTOTUNE_MIN_RECALL, min_precision: float=AUTOTUNE_MIN_PRECISION, path: Optional[str]=None):
+        self.width = screen_info['width']
+        self.height = screen_info['height']
+        self.core_count = core_count
+        self.threshold = threshold
+        self.target_fps = target_fps
+        self.min_recall = min_recall
+        self.min_precision = min_precision
+        self.path = path or user_cache_dir('autotune.json')
+        self.key = f'{self.width}x{self.height}-{self._fingerprint()}'
+        self.results: List[Dict[str, Any]] = []
+
+    def _fingerprint(self) -> str:
+        import cv2
+        digest = hashlib.sha1(repr((self.VERSION, self.core_count, cv2.__version__, platform.machine(), platform.processor(), self.threshold, self.target_fps, self.min_recall, self.min_precision, SCALE_FACTORS, BLUR_KSIZE)).encode())
+        for label in sorted(TARGET_ICONS):
+            digest.update(label.encode())
+            if os.path.exists(TARGET_ICONS[label]['path']):
+                with open(TARGET_ICONS[label]['path'], 'rb') as f:
+                    digest.update(f.read())
+        return digest.hexdigest()[:12]
+
+    def candidates(self) -> List[Dict[str, Any]]:
+        threads = sorted({1, min(2, self.core_count), self.core_count}, reverse=True)
+        configs = []
+        for detector in ('proposal', 'template'):
+            for processing_scale in self.PROCESSING_SCALES:
+                for scales in self.SCALE_SETS.values():
+                    for blur in (0, BLUR_KSIZE[0]):
+                        for cv_threads in threads:
+                            configs.append({'detector': detector, 'processing_scale': processing_scale, 'scales': tuple(scales), 'blur': blur, 'cv_threads': cv_threads})
+        return configs
+
+    def scenarios(self) -> list:
+        from utils.synthetic import SCENARIOS, IconTrack, Scenario
+        all_icons = Scenario(6.0, [IconTrack('main_quest', [(0.0, 0.56, 30.0), (6.0, 0.5, 12.0)]), IconTrack('treasure', [(0.0, 0.42, 25.0), (6.0, 0.45, 10.0)]), IconTrack('stockpile', [(0.0, 0.64, 14.0), (6.0, 0.6, 4.0)])])
+        return list(SCENARIOS.values()) + [all_icons]
+
+    def frames(self) -> List[Dict[str, Any]]:
+        from utils.synthetic import SyntheticCompass
+        rng = np.random.default_rng(0)
+        scenarios = self.scenarios()
+        per_scenario = max(1, self.FRAMES // len(scenarios))
+        frames = []
+        for scenario in scenarios:
+            sources = [SyntheticCompass(scenario, self.width, self.height, icon_scale=icon_scale) for icon_scale in self.ICON_SCALES]
+            for index, t in enumerate(np.linspace(scenario.duration * 0.2, scenario.duration, per_scenario, endpoint=False)):
+                source = sources[index % len(sources)]
+                image = np.clip(source.render(float(t)) + rng.normal(0.0, self.NOISE, (source.capture_height, self.width, 3)), 0, 255).astype(np.uint8)
+                frames.append({'image': image, 'icons': [(label, x_rel) for label, x_rel, _ in scenario.icons_at(float(t)) if label in source.icons]})
+        return frames
+
+    def evaluate(self, config: Dict[str, Any], frames: List[Dict[str, Any]], bound_ms: float=float('inf')) -> Dict[str, Any]:
+        import cv2
+        if config['detector'] == 'proposal':
+            from core.proposals import ProposalDetector as IconDetector
+        else:
+            from core.detector import IconDetector
+        cv2.setNumThreads(config['cv_threads'])
+        with contextlib.redirect_stdout(io.StringIO()):
+            detector = IconDetector(TARGET_ICONS, match_threshold=self.threshold, nms_iou_threshold=NMS_IOU_THRESHOLD, manual_scale=self.width / DESIGN_WIDTH, scale_factors=config['scales'], processing_scale=config['processing_scale'])
+        blur = (config['blur'], config['blur']) if config['blur'] else None
+        normalize = lambda px_x, px_y: (px_x / self.width, px_y / self.height)
+        detector.detect(frames[0]['image'], self.width, self.height, normalize, True, blur)
+        totals: Dict[str, int] = {}
+        for frame in frames:
+            for label, _ in frame['icons']:
+                totals[label] = totals.get(label, 0) + 1
+        tp = dict.fromkeys(totals, 0)
+        fp = dict.fromkeys(totals, 0)
+        fn = dict.fromkeys(totals, 0)
+        elapsed = 0.0
+        aborted = False
+        for count, frame in enumerate(frames, 1):
+            start = time.perf_counter()
+            detections = detector.detect(frame['image'], self.width, self.height, normalize, True, blur)
+            elapsed += time.perf_counter() - start
+            unmatched = list(frame['icons'])
+            for det in detections:
+                truth = min((icon for icon in unmatched if icon[0] == det['label']), key=lambda icon: abs(icon[1] - det['x_rel']), default=None)
+                if truth is not None and abs(truth[1] - det['x_rel']) <= self.MATCH_TOLERANCE:
+                    unmatched.remove(truth)
+                    tp[det['label']] += 1
+                else:
+                    fp[det['label']] = fp.get(det['label'], 0) + 1
+            for label, _ in unmatched:
+                fn[label] += 1
+            if count < len(frames) and (any(fn[label] > totals[label] * (1.0 - self.min_recall) for label in totals) or elapsed / count * 1000.0 > bound_ms):
+                aborted = True
+                break
+        label_recall = {label: tp[label] / (tp[label] + fn[label]) if tp[label] + fn[label] else 1.0 for label in totals}
+        label_precision = {label: tp.get(label, 0) / (tp.get(label, 0) + fp[label]) if tp.get(label, 0) + fp[label] else 1.0 for label in fp}
+        return dict(config, aborted=aborted, frames=count, ms_per_frame=elapsed / count * 1000.0, recall=min(label_recall.values(), default=1.0), precision=min(label_precision.values(), default=1.0), label_recall=label_recall, label_precision=label_precision)
+
+    def acceptable(self, result: Dict[str, Any]) -> bool:
+        return not result['aborted'] and result['recall'] >= self.min_recall and result['precision'] >= self.min_precision
+
+    def tune(self) -> Dict[str, Any]:
+        import cv2
+        start = time.perf_counter()
+        previous_threads = cv2.getNumThreads()
+        frames = self.frames()
+        best = None
+        configs = self.candidates()
+        try:
+            for index, config in enumerate(configs, 1):
+                if time.perf_counter() - start > self.MAX_SECONDS:
+                    print(f'\n  [!] Autotune stopped after {self.MAX_SECONDS:.0f} s ({index - 1}/{len(configs)} configurations tried)')
+                    break
+                result = self.evaluate(config, frames, best['ms_per_frame'] if best else float('inf'))
+                self.results.append(result)
+                if self.acceptable(result) and (best is None or result['ms_per_frame'] < best['ms_per_frame']):
+                    best = result
+                print(f"\r  [+] Autotune: {index}/{len(configs)} configurations, best {best['ms_per_frame']:.1f} ms/frame" if best else f'\r  [+] Autotune: {index}/{len(configs)} configurations', end='', flush=True)
+            print()
+        finally:
+            cv2.setNumThreads(previous_threads)
+        if best is None:
+            print(f'  [!] No configuration reached {self.min_recall:.0%} recall / {self.min_precision:.0%} precision for every icon type on synthetic frames, keeping config.py defaults')
+            return {'settings': {}, 'tuned_at': time.time()}
+        meets_target = best['ms_per_frame'] <= 1000.0 / self.target_fps
+        if not meets_target:
+            print(f"  [!] Fastest accurate configuration takes {best['ms_per_frame']:.1f} ms/frame, short of {self.target_fps:g} FPS")
+        settings = {key: best[key] for key in ('detector', 'processing_scale', 'scales', 'blur', 'cv_threads')}
+        print(f"  [+] Autotuned in {time.perf_counter() - start:.1f} s: {best['ms_per_frame']:.1f} ms/frame, worst-label recall {best['recall']:.0%}, precision {best['precision']:.0%} with {settings}")
+        return {'settings': settings, 'ms_per_frame': best['ms_per_frame'], 'recall': best['recall'], 'precision': best['precision'], 'meets_target': meets_target, 'tuned_at': time.time()}
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        profile = self._read().get(self.key)
+        if profile and profile.get('settings'):
+            profile['settings']['scales'] = tuple(profile['settings']['scales'])
+        return profile
+
+    def save(self, profile: Dict[str, Any]) -> None:
+        profiles = self._read()
+        profiles[self.key] = profile
+        staging = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(staging, 'w') as f:
+                json.dump(profiles, f, indent=2)
+            os.replace(staging, self.path)
+        except OSError as exc:
+            print(f'  [!] Could not save the autotune profile ({exc}); it will be re-run next launch')
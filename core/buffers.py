@@ -0,0 +1,24 @@
+import numpy as np
+from typing import Dict, Hashable, Tuple
+
+class BufferPool:
+
+    def __init__(self):
+        self._buffers: Dict[Tuple, np.ndarray] = {}
+        self.allocations = 0
+        self.allocated_bytes = 0
+
+    def get(self, name: Hashable, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        key = (name, shape, dtype)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = np.empty(shape, dtype=dtype)
+            self.allocations += 1
+            self.allocated_bytes += buffer.nbytes
+        return buffer
+
+    def clear(self) -> None:
+        self._buffers.clear()
+
+    def __len__(self) -> int:
+        return len(self._buffers)
@@ -1,13 +1,21 @@
 import cv2
+import time
 import numpy as np
-from typing import Dict, List, Any, Callable
+from typing import Dict, List, Any, Callable, Collection, Optional, Tuple
+from config import SCALE_FACTORS, PROCESSING_SCALE
+from core.buffers import BufferPool
 
 class IconDetector:
 
-    def __init__(self, target_icons: Dict[str, Dict], match_threshold: float=0.8, nms_iou_threshold: float=0.3, manual_scale: float=None, use_multi_scale: bool=True):
+    def __init__(self, target_icons: Dict[str, Dict], match_threshold: float=0.8, nms_iou_threshold: float=0.3, manual_scale: float=None, use_multi_scale: bool=True, scale_factors: Tuple[float, ...]=SCALE_FACTORS, processing_scale: float=PROCESSING_SCALE):
         self.match_threshold = match_threshold
         self.nms_iou_threshold = nms_iou_threshold
         self.use_multi_scale = use_multi_scale
+        self.scale_factors = scale_factors
+        self.processing_scale = processing_scale
+        self.profiler = None
+        self.pool = BufferPool()
+        self.label_costs: Dict[str, float] = {}
         if manual_scale is not None:
             self.scale = manual_scale
         else:
@@ -17,6 +25,9 @@ class IconDetector:
             self.scale = current_width / 3024.0
             if self.scale != 1.0:
                 print(f'[Detector] Resolution mismatch detected, scaling templates by {self.scale:.2f}...')
+        if processing_scale != 1.0:
+            self.scale *= processing_scale
+            print(f'[Detector] Matching at {processing_scale:.0%} of the capture resolution.')
         if self.use_multi_scale:
             print('[Detector] Multi-Scale Search enabled.')
         self.templates = self._load_templates(target_icons)
@@ -29,7 +40,7 @@ class IconDetector:
             if template is not None:
                 templates[label] = []
                 if self.use_multi_scale:
-                    scale_factors = [self.scale * f for f in [0.8, 0.9, 1.0, 1.1, 1.25]]
+                    scale_factors = [self.scale * f for f in self.scale_factors]
                 else:
                     scale_factors = [self.scale]
                 for s in scale_factors:
@@ -42,12 +53,12 @@ class IconDetector:
                         scaled_temp = template.copy()
                     has_alpha = scaled_temp.shape[2] == 4 if len(scaled_temp.shape) == 3 else False
                     if has_alpha:
-                        bgr = scaled_temp[:, :, :3]
-                        alpha = scaled_temp[:, :, 3]
+                        bgr = np.ascontiguousarray(scaled_temp[:, :, :3])
+                        alpha = np.ascontiguousarray(scaled_temp[:, :, 3])
                     else:
                         bgr = scaled_temp
                         alpha = None
-                    templates[label].append({'image': bgr, 'mask': alpha, 'h': scaled_temp.shape[0], 'w': scaled_temp.shape[1], 'scale': s, 'hsv_range': cfg.get('hsv_range')})
+                    templates[label].append({'image': bgr, 'mask': alpha, 'h': scaled_temp.shape[0], 'w': scaled_temp.shape[1], 'scale': s, 'hsv_range': tuple((np.array(bound, dtype=np.uint8) for bound in cfg['hsv_range'])) if cfg.get('hsv_range') else None, 'span': f'detect/{label}@{s:.2f}'})
             else:
                 print(f'Warning: Template image not found [{label}]: {path}')
         return templates
@@ -56,54 +67,119 @@ class IconDetector:
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
         return cv2.Laplacian(gray, cv2.CV_8U)
 
-    def detect(self, frame_bgr: np.ndarray, screen_width: int, screen_height: int, normalize_fn: Callable[[float, float], tuple], use_laplacian: bool=False, blur_ksize: tuple=None) -> List[Dict[str, Any]]:
+    def _processing_view(self, frame_bgr: np.ndarray, screen_width: int, screen_height: int, normalize_fn: Callable[[float, float], tuple]) -> Tuple[np.ndarray, float, float, Callable[[float, float], tuple]]:
+        r = self.processing_scale
+        if r == 1.0:
+            return (frame_bgr, screen_width, screen_height, normalize_fn)
+        size = (max(1, int(round(frame_bgr.shape[1] * r))), max(1, int(round(frame_bgr.shape[0] * r))))
+        small = cv2.resize(frame_bgr, size, dst=self.pool.get('processing', (size[1], size[0], 3)), interpolation=cv2.INTER_AREA)
+        return (small, screen_width * r, screen_height * r, lambda px_x, px_y: normalize_fn(px_x / r, px_y / r))
+
+    def _match(self, image: np.ndarray, tmpl_data: Dict[str, Any], key: Any) -> np.ndarray:
+        th, tw = (tmpl_data['h'], tmpl_data['w'])
+        res = self.pool.get(key, (image.shape[0] - th + 1, image.shape[1] - tw + 1), np.float32)
+        if tmpl_data['mask'] is not None:
+            cv2.matchTemplate(image, tmpl_data['image'], cv2.TM_CCORR_NORMED, result=res, mask=tmpl_data['mask'])
+            cv2.patchNaNs(res, -1.0)
+            degenerate = np.greater(res, 1.1, out=self.pool.get('degenerate', res.shape, np.bool_))
+            np.copyto(res, -1.0, where=degenerate)
+        else:
+            cv2.matchTemplate(image, tmpl_data['image'], cv2.TM_CCOEFF_NORMED, result=res)
+        return res
+
+    def _color_matches(self, frame_bgr: np.ndarray, x: int, y: int, w: int, h: int, tmpl_data: Dict[str, Any]) -> bool:
+        if not tmpl_data['hsv_range']:
+            return True
+        lower, upper = tmpl_data['hsv_range']
+        roi = frame_bgr[y:y + h, x:x + w]
+        if roi.size == 0:
+            return False
+        hsv_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV, dst=self.pool.get('hsv', roi.shape))
+        color_mask = cv2.inRange(hsv_roi, lower, upper, dst=self.pool.get('hsv_mask', roi.shape[:2]))
+        return cv2.countNonZero(color_mask) / color_mask.size >= 0.05
+
+    def _select(self, frame_bgr: np.ndarray, label: str, boxes: List[List[int]], scores: List[float], template_meta: List[Dict[str, Any]], screen_width: int, screen_height: int, normalize_fn: Callable[[float, float], tuple], detections: List[Dict[str, Any]]) -> None:
+        if not boxes:
+            return
+        indices = cv2.dnn.NMSBoxes(boxes, scores, score_threshold=self.match_threshold, nms_threshold=self.nms_iou_threshold)
+        for i_idx in np.asarray(indices).flatten():
+            x, y, w, h = boxes[i_idx]
+            tmpl_data = template_meta[i_idx]
+            if not self._color_matches(frame_bgr, x, y, w, h, tmpl_data):
+                continue
+            rel_x, rel_y = normalize_fn(x + w / 2.0, y + h / 2.0)
+            detections.append({'id': len(detections), 'label': label, 'x_rel': rel_x, 'y_rel': rel_y, 'w_rel': w / screen_width, 'h_rel': h / screen_height, 'score': scores[i_idx], 'matched_scale': tmpl_data['scale']})
+
+    def detect(self, frame_bgr: np.ndarray, screen_width: int, screen_height: int, normalize_fn: Callable[[float, float], tuple], use_laplacian: bool=False, blur_ksize: tuple=None, labels: Optional[Collection[str]]=None) -> List[Dict[str, Any]]:
         all_detections = []
-        global_id = 0
+        pool = self.pool
+        frame_bgr, screen_width, screen_height, normalize_fn = self._processing_view(frame_bgr, screen_width, screen_height, normalize_fn)
         if blur_ksize:
-            search_frame = cv2.GaussianBlur(frame_bgr, blur_ksize, 0)
+            search_frame = cv2.GaussianBlur(frame_bgr, blur_ksize, 0, dst=pool.get('blur', frame_bgr.shape))
         else:
             search_frame = frame_bgr
+        profiler = self.profiler
         for label, tmpl_list in self.templates.items():
+            if labels is not None and label not in labels:
+                continue
+            label_start = time.perf_counter()
             boxes = []
             scores = []
             template_meta = []
             for tmpl_data in tmpl_list:
-                template_bgr = tmpl_data['image']
-                mask = tmpl_data['mask']
                 th, tw = (tmpl_data['h'], tmpl_data['w'])
-                if mask is not None:
-                    res = cv2.matchTemplate(frame_bgr, template_bgr, cv2.TM_CCORR_NORMED, mask=mask)
-                    res = np.nan_to_num(res, nan=-1.0)
-                    res[res > 1.1] = -1.0
-                else:
-                    res = cv2.matchTemplate(search_frame, template_bgr, cv2.TM_CCOEFF_NORMED)
-                loc = np.where(res >= self.match_threshold)
-                for pt in zip(*loc[::-1]):
-                    boxes.append([int(pt[0]), int(pt[1]), int(tw), int(th)])
-                    scores.append(float(res[pt[1], pt[0]]))
+                if profiler is not None:
+                    span_start = time.perf_counter()
+                res = self._match(frame_bgr if tmpl_data['mask'] is not None else search_frame, tmpl_data, tmpl_data['span'])
+                hits = None
+                if cv2.minMaxLoc(res)[1] >= self.match_threshold:
+                    hit_mask = pool.get('hits', res.shape)
+                    cv2.compare(res, self.match_threshold, cv2.CMP_GE, dst=hit_mask)
+                    hits = cv2.findNonZero(hit_mask)
+                if profiler is not None:
+                    profiler.record(tmpl_data['span'], span_start, time.perf_counter())
+                if hits is None:
+                    continue
+                for px, py in hits.reshape(-1, 2):
+                    boxes.append([int(px), int(py), int(tw), int(th)])
+                    scores.append(float(res[py, px]))
                     template_meta.append(tmpl_data)
-            if len(boxes) > 0:
-                indices = cv2.dnn.NMSBoxes(boxes, scores, score_threshold=self.match_threshold, nms_threshold=self.nms_iou_threshold)
-                if len(indices) > 0:
-                    for i_idx in indices.flatten():
-                        x, y, w, h = boxes[i_idx]
-                        tmpl_data = template_meta[i_idx]
-                        if tmpl_data['hsv_range']:
-                            lower, upper = tmpl_data['hsv_range']
-                            roi = frame_bgr[y:y + h, x:x + w]
-                            if roi.size == 0:
-                                continue
-                            hsv_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-                            color_mask = cv2.inRange(hsv_roi, np.array(lower), np.array(upper))
-                            match_pixel_ratio = np.count_nonzero(color_mask) / color_mask.size
-                            if match_pixel_ratio < 0.05:
-                                continue
-                        cx = x + w / 2.0
-                        cy = y + h / 2.0
-                        rel_x, rel_y = normalize_fn(cx, cy)
-                        rel_w = w / screen_width
-                        rel_h = h / screen_height
-                        detection = {'id': global_id, 'label': label, 'x_rel': rel_x, 'y_rel': rel_y, 'w_rel': rel_w, 'h_rel': rel_h, 'score': scores[i_idx], 'matched_scale': tmpl_data['scale']}
-                        all_detections.append(detection)
-                        global_id += 1
-        return all_detections
\ No newline at end of file
+            self._select(frame_bgr, label, boxes, scores, template_meta, screen_width, screen_height, normalize_fn, all_detections)
+            self.label_costs[label] = time.perf_counter() - label_start
+        return all_detections
+
+    def confirm(self, frame_bgr: np.ndarray, label: str, scale: float, cx: float, cy: float, radius: int, blur_ksize: tuple=None) -> Tuple[float, float, float]:
+        r = self.processing_scale
+        if r == 1.0:
+            return self._confirm(frame_bgr, label, scale, cx, cy, radius, blur_ksize)
+        tmpl_data = next((t for t in self.templates.get(label, ()) if t['scale'] == scale), None)
+        if tmpl_data is None:
+            return (-1.0, cx, cy)
+        half_w = int((tmpl_data['w'] / 2.0 + radius + 1) / r)
+        half_h = int((tmpl_data['h'] / 2.0 + radius + 1) / r)
+        x1, y1 = (max(0, int(cx) - half_w), max(0, int(cy) - half_h))
+        window = frame_bgr[y1:min(frame_bgr.shape[0], int(cy) + half_h + 1), x1:min(frame_bgr.shape[1], int(cx) + half_w + 1)]
+        if window.size == 0:
+            return (-1.0, cx, cy)
+        size = (max(1, int(round(window.shape[1] * r))), max(1, int(round(window.shape[0] * r))))
+        small = cv2.resize(window, size, dst=self.pool.get('confirm_processing', (size[1], size[0], 3)), interpolation=cv2.INTER_AREA)
+        score, sx, sy = self._confirm(small, label, scale, (cx - x1) * r, (cy - y1) * r, radius, blur_ksize)
+        return (score, x1 + sx / r, y1 + sy / r)
+
+    def _confirm(self, frame_bgr: np.ndarray, label: str, scale: float, cx: float, cy: float, radius: int, blur_ksize: tuple=None) -> Tuple[float, float, float]:
+        tmpl_data = next((t for t in self.templates.get(label, ()) if t['scale'] == scale), None)
+        if tmpl_data is None:
+            return (-1.0, cx, cy)
+        th, tw = (tmpl_data['h'], tmpl_data['w'])
+        x1 = max(0, int(round(cx - tw / 2.0)) - radius)
+        y1 = max(0, int(round(cy - th / 2.0)) - radius)
+        x2 = min(frame_bgr.shape[1], int(round(cx + tw / 2.0)) + radius + 1)
+        y2 = min(frame_bgr.shape[0], int(round(cy + th / 2.0)) + radius + 1)
+        window = frame_bgr[y1:y2, x1:x2]
+        if window.shape[0] < th or window.shape[1] < tw:
+            return (-1.0, cx, cy)
+        if tmpl_data['mask'] is None and blur_ksize:
+            window = cv2.GaussianBlur(window, blur_ksize, 0, dst=self.pool.get('confirm_blur', window.shape))
+        res = self._match(window, tmpl_data, 'confirm')
+        _, score, _, (px, py) = cv2.minMaxLoc(res)
+        return (float(score), x1 + px + tw / 2.0, y1 + py + th / 2.0)
@@ -0,0 +1,248 @@
+import time
+import errno
+import socket
+import struct
+import select
+import itertools
+import threading
+import collections
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from config import EVENT_BUS_PORT
+from core.audiofeedback import NavIcon, NavEvent
+from core.eventlog import LABELS, DIRECTIONS
+from core.soundbank import PITCHES as SOUND_PITCHES
+
+MAGIC = b'CLB1'
+SUBSCRIBE = b'CLBS'
+UNSUBSCRIBE = b'CLBU'
+MSG_FRAME = 1
+MSG_EVENT = 2
+EVENT_KINDS = ('pulse', 'earcon', 'speech', 'scan', 'cancel')
+PITCHES = tuple(SOUND_PITCHES)
+HEADER = struct.Struct('<4sBId')
+ICON = struct.Struct('<BBff')
+EVENT = struct.Struct('<BBBB')
+LENGTH = struct.Struct('<H')
+LABEL_INDEX = {label: i for i, label in enumerate(LABELS)}
+UNKNOWN_LABEL = 255
+
+def _pack_icons(icons: List[NavIcon]) -> bytes:
+    parts = [bytes((len(icons),))]
+    for icon in icons:
+        parts.append(ICON.pack(LABEL_INDEX.get(icon.icon_type, UNKNOWN_LABEL), DIRECTIONS.index(icon.direction), icon.offset, float('nan') if icon.distance_m is None else icon.distance_m))
+    return b''.join(parts)
+
+def _unpack_icons(data: bytes, offset: int) -> Tuple[List[NavIcon], int]:
+    count = data[offset]
+    offset += 1
+    icons = []
+    for _ in range(count):
+        label, direction, rel, distance = ICON.unpack_from(data, offset)
+        offset += ICON.size
+        icons.append(NavIcon(LABELS[label] if label < len(LABELS) else 'unknown', DIRECTIONS[direction], rel, None if distance != distance else distance))
+    return (icons, offset)
+
+def _pack_str(value: Optional[str]) -> bytes:
+    raw = (value or '').encode('utf-8')[:0xFFFF]
+    return LENGTH.pack(len(raw)) + raw
+
+def _unpack_str(data: bytes, offset: int) -> Tuple[str, int]:
+    (length,) = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    return (data[offset:offset + length].decode('utf-8', 'replace'), offset + length)
+
+def encode_frame(seq: int, wall_time: float, icons: List[NavIcon]) -> bytes:
+    return HEADER.pack(MAGIC, MSG_FRAME, seq, wall_time) + _pack_icons(icons)
+
+def encode_event(seq: int, wall_time: float, event: NavEvent) -> bytes:
+    body = EVENT.pack(EVENT_KINDS.index(event.kind), PITCHES.index(event.pitch), min(255, max(0, event.priority)), 0)
+    icons = _pack_icons([event.icon] if event.icon is not None else [])
+    return HEADER.pack(MAGIC, MSG_EVENT, seq, wall_time) + body + icons + _pack_str(event.sound) + _pack_str(event.category) + _pack_str(event.text)
+
+@dataclass
+class BusMessage:
+    seq: int
+    time: float
+    kind: str
+    icons: List[NavIcon] = field(default_factory=list)
+    event: Optional[NavEvent] = None
+
+def decode(data: bytes) -> Optional[BusMessage]:
+    if len(data) < HEADER.size:
+        return None
+    magic, msg_type, seq, wall_time = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        return None
+    offset = HEADER.size
+    if msg_type == MSG_FRAME:
+        icons, _ = _unpack_icons(data, offset)
+        return BusMessage(seq, wall_time, 'frame', icons)
+    kind, pitch, priority, _ = EVENT.unpack_from(data, offset)
+    icons, offset = _unpack_icons(data, offset + EVENT.size)
+    sound, offset = _unpack_str(data, offset)
+    category, offset = _unpack_str(data, offset)
+    text, offset = _unpack_str(data, offset)
+    event = NavEvent(wall_time, EVENT_KINDS[kind], sound=sound, icon=icons[0] if icons else None, pitch=PITCHES[pitch], text=text, priority=priority, category=category or None)
+    return BusMessage(seq, wall_time, 'event', icons, event)
+
+class _BusTap:
+
+    def __init__(self, sink, bus: 'EventBus'):
+        self.sink = sink
+        self.bus = bus
+
+    def emit(self, event: NavEvent) -> None:
+        self.sink.emit(event)
+        self.bus.publish_event(event)
+
+class EventBus:
+    QUEUE_SIZE = 256
+    LEASE = 3.0
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, port: int=EVENT_BUS_PORT, host: str='127.0.0.1'):
+        self.address = (host, port)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind(self.address)
+        self._sock.setblocking(False)
+        self._queue: collections.deque = collections.deque(maxlen=self.QUEUE_SIZE)
+        self._pending = threading.Event()
+        self._subscribers: Dict[Tuple[str, int], float] = {}
+        self._clock_offset = time.time() - time.perf_counter()
+        self._seq = itertools.count(1)
+        self.sent = 0
+        self.dropped = 0
+        self.overflowed = 0
+        self.encode_errors = 0
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name='event-bus', daemon=True)
+        self._thread.start()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def publish_icons(self, t: float, icons: List[NavIcon]) -> None:
+        if self._subscribers:
+            self._enqueue(MSG_FRAME, t, icons)
+
+    def publish_event(self, event: NavEvent) -> None:
+        if self._subscribers:
+            self._enqueue(MSG_EVENT, event.time, event)
+
+    def _enqueue(self, msg_type: int, t: float, payload) -> None:
+        if len(self._queue) == self.QUEUE_SIZE:
+            self.overflowed += 1
+            self.dropped += 1
+        self._queue.append((next(self._seq) & 0xFFFFFFFF, msg_type, t, payload))
+        self._pending.set()
+
+    def tap(self, sink) -> _BusTap:
+        return _BusTap(sink, self)
+
+    def _poll_control(self, now: float) -> None:
+        while True:
+            try:
+                data, addr = self._sock.recvfrom(64)
+            except ConnectionResetError:
+                continue
+            except OSError:
+                break
+            if data == SUBSCRIBE:
+                if addr not in self._subscribers:
+                    print(f'  [+] Event bus subscriber connected from {addr[0]}:{addr[1]}')
+                self._subscribers[addr] = now
+            elif data == UNSUBSCRIBE:
+                self._subscribers.pop(addr, None)
+        for addr, seen in list(self._subscribers.items()):
+            if now - seen > self.LEASE:
+                del self._subscribers[addr]
+
+    def _send(self, data: bytes) -> None:
+        for addr in list(self._subscribers):
+            try:
+                self._sock.sendto(data, addr)
+                self.sent += 1
+            except BlockingIOError:
+                self.dropped += 1
+            except OSError as exc:
+                if exc.errno != errno.ENOBUFS:
+                    self._subscribers.pop(addr, None)
+                self.dropped += 1
+
+    def _run(self) -> None:
+        while self.running:
+            self._pending.wait(self.POLL_INTERVAL)
+            self._pending.clear()
+            self._poll_control(time.perf_counter())
+            while self._queue:
+                seq, msg_type, t, payload = self._queue.popleft()
+                wall_time = t + self._clock_offset
+                try:
+                    data = encode_frame(seq, wall_time, payload) if msg_type == MSG_FRAME else encode_event(seq, wall_time, payload)
+                except (ValueError, IndexError, struct.error) as exc:
+                    if not self.encode_errors:
+                        print(f'  [!] Event bus could not encode a message ({exc}); skipping it')
+                    self.encode_errors += 1
+                    self.dropped += 1
+                    continue
+                self._send(data)
+
+    def close(self) -> None:
+        self.running = False
+        self._pending.set()
+        self._thread.join(timeout=1.0)
+        self._sock.close()
+
+class BusSubscriber:
+    HEARTBEAT = 1.0
+
+    def __init__(self, port: int=EVENT_BUS_PORT, host: str='127.0.0.1', receive_buffer: int=0):
+        self.publisher = (host, port)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if receive_buffer:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+        self._sock.bind((host, 0))
+        self._last_hello = 0.0
+        self._last_seq: Optional[int] = None
+        self.received = 0
+        self.missed = 0
+
+    def _hello(self) -> None:
+        now = time.perf_counter()
+        if now - self._last_hello >= self.HEARTBEAT:
+            self._last_hello = now
+            try:
+                self._sock.sendto(SUBSCRIBE, self.publisher)
+            except OSError:
+                pass
+
+    def receive(self, timeout: Optional[float]=None) -> Optional[BusMessage]:
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            self._hello()
+            wait = self.HEARTBEAT if deadline is None else min(self.HEARTBEAT, deadline - time.perf_counter())
+            if wait < 0 or not select.select([self._sock], [], [], wait)[0]:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return None
+                continue
+            try:
+                data = self._sock.recv(65536)
+            except OSError:
+                continue
+            message = decode(data)
+            if message is None:
+                continue
+            if self._last_seq is not None and message.seq > self._last_seq:
+                self.missed += message.seq - self._last_seq - 1
+            self._last_seq = message.seq
+            self.received += 1
+            return message
+
+    def close(self) -> None:
+        try:
+            self._sock.sendto(UNSUBSCRIBE, self.publisher)
+        except OSError:
+            pass
+        self._sock.close()
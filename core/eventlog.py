@@ -0,0 +1,114 @@
+import os
+import json
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from config import TARGET_ICONS
+from core.audiofeedback import NavIcon
+
+LABELS = tuple(TARGET_ICONS)
+DIRECTIONS = ('left', 'center', 'right')
+FRAME_COLUMNS = {'time': np.float64, 'first_row': np.uint32}
+ICON_COLUMNS = {'label': np.uint8, 'direction': np.uint8, 'offset': np.float32, 'distance': np.float32, 'score': np.float32}
+FORMAT_VERSION = 1
+
+class DetectionLogWriter:
+    FLUSH_FRAMES = 256
+
+    def __init__(self, path: str, meta: Optional[Dict]=None, labels: Sequence[str]=LABELS):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.labels = list(labels)
+        self._label_index = {label: i for i, label in enumerate(self.labels)}
+        self.meta = dict(meta or {}, version=FORMAT_VERSION, directions=DIRECTIONS)
+        self._files = {name: open(os.path.join(path, f'frames.{name}'), 'wb') for name in FRAME_COLUMNS}
+        self._files.update({name: open(os.path.join(path, f'icons.{name}'), 'wb') for name in ICON_COLUMNS})
+        self._columns: Dict[str, list] = {name: [] for name in self._files}
+        self._pending = 0
+        self.frames = 0
+        self.rows = 0
+
+    def append(self, t: float, icons: List[NavIcon], scores: Optional[List[float]]=None) -> None:
+        columns = self._columns
+        columns['time'].append(t)
+        columns['first_row'].append(self.rows)
+        for i, icon in enumerate(icons):
+            index = self._label_index.get(icon.icon_type)
+            if index is None:
+                index = self._label_index[icon.icon_type] = len(self.labels)
+                self.labels.append(icon.icon_type)
+            columns['label'].append(index)
+            columns['direction'].append(DIRECTIONS.index(icon.direction))
+            columns['offset'].append(icon.offset)
+            columns['distance'].append(np.nan if icon.distance_m is None else icon.distance_m)
+            columns['score'].append(scores[i] if scores else np.nan)
+        self.rows += len(icons)
+        self.frames += 1
+        self._pending += 1
+        if self._pending >= self.FLUSH_FRAMES:
+            self.flush()
+
+    def flush(self) -> None:
+        for name, values in self._columns.items():
+            if values:
+                dtype = FRAME_COLUMNS.get(name) or ICON_COLUMNS[name]
+                np.asarray(values, dtype=dtype).tofile(self._files[name])
+                values.clear()
+            self._files[name].flush()
+        self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(dict(self.meta, labels=self.labels, frames=self.frames, rows=self.rows), f, indent=2)
+
+class DetectionLog:
+
+    def __init__(self, path: str):
+        self.path = path
+        meta_path = os.path.join(path, 'meta.json')
+        self.meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                self.meta = json.load(f)
+        self.labels = tuple(self.meta.get('labels', LABELS))
+        self.directions = tuple(self.meta.get('directions', DIRECTIONS))
+        self.frames = {name: self._map(f'frames.{name}', dtype) for name, dtype in FRAME_COLUMNS.items()}
+        self.icons = {name: self._map(f'icons.{name}', dtype) for name, dtype in ICON_COLUMNS.items()}
+        count = min(len(column) for column in self.frames.values())
+        self.frames = {name: column[:count] for name, column in self.frames.items()}
+        rows = min(len(column) for column in self.icons.values())
+        self.icons = {name: column[:rows] for name, column in self.icons.items()}
+
+    def _map(self, filename: str, dtype) -> np.ndarray:
+        path = os.path.join(self.path, filename)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+
+    def __len__(self) -> int:
+        return len(self.frames['time'])
+
+    @property
+    def duration(self) -> float:
+        times = self.frames['time']
+        return float(times[-1] - times[0]) if len(times) else 0.0
+
+    def _row_range(self, index: int) -> Tuple[int, int]:
+        start = int(self.frames['first_row'][index])
+        end = int(self.frames['first_row'][index + 1]) if index + 1 < len(self) else len(self.icons['label'])
+        return (start, end)
+
+    def frame(self, index: int) -> Tuple[float, List[NavIcon]]:
+        start, end = self._row_range(index)
+        icons = self.icons
+        batch = []
+        for row in range(start, end):
+            distance = float(icons['distance'][row])
+            batch.append(NavIcon(self.labels[icons['label'][row]], self.directions[icons['direction'][row]], float(icons['offset'][row]), None if np.isnan(distance) else distance))
+        return (float(self.frames['time'][index]), batch)
+
+    def __iter__(self) -> Iterator[Tuple[float, List[NavIcon]]]:
+        for index in range(len(self)):
+            yield self.frame(index)
@@ -0,0 +1,68 @@
+import os
+import numpy as np
+from scipy.signal import fftconvolve
+from typing import Dict, Optional
+
+class HRTFBank:
+    SAMPLE_RATE = 44100
+    AZIMUTH_STEP = 5.0
+    IR_LENGTH = 256
+    HEAD_RADIUS = 0.0875
+    SPEED_OF_SOUND = 343.0
+    ALPHA_MIN = 0.1
+    THETA_MIN = 150.0
+    CENTER_GAIN = float(np.sqrt(0.5))
+
+    def __init__(self, sounds: Dict[str, np.ndarray], azimuth_step: float=AZIMUTH_STEP, ir_path: Optional[str]=None):
+        self.azimuth_step = azimuth_step
+        if ir_path is not None and os.path.exists(ir_path):
+            self.azimuths, self.irs = self._load_irs(ir_path)
+            print(f'  [HRTF] Loaded measured impulse responses from {ir_path}')
+        else:
+            self.azimuths = np.arange(-90.0, 90.0 + azimuth_step / 2.0, azimuth_step)
+            self.irs = self._spherical_head_irs(self.azimuths)
+        self.bank: Dict[str, np.ndarray] = {name: self._convolve(sound) for name, sound in sounds.items()}
+
+    def _load_irs(self, ir_path: str):
+        data = np.load(ir_path)
+        if int(data['sample_rate']) != self.SAMPLE_RATE:
+            raise ValueError(f"HRIR sample rate {int(data['sample_rate'])} does not match {self.SAMPLE_RATE}")
+        azimuths = np.asarray(data['azimuths'], dtype=np.float64)
+        irs = np.stack((data['left'], data['right']), axis=1).astype(np.float32)
+        order = np.argsort(azimuths)
+        return (azimuths[order], irs[order])
+
+    def _spherical_head_irs(self, azimuths: np.ndarray) -> np.ndarray:
+        omega = 2.0 * np.pi * np.fft.rfftfreq(self.IR_LENGTH, 1.0 / self.SAMPLE_RATE)
+        omega0 = self.SPEED_OF_SOUND / self.HEAD_RADIUS
+        base_delay = self.HEAD_RADIUS / self.SPEED_OF_SOUND + 8.0 / self.SAMPLE_RATE
+        irs = np.empty((len(azimuths), 2, self.IR_LENGTH), dtype=np.float32)
+        window = np.hanning(2 * self.IR_LENGTH)[self.IR_LENGTH:]
+        for i, azimuth in enumerate(azimuths):
+            for ear, ear_angle in enumerate((-90.0, 90.0)):
+                theta = min(180.0, abs(azimuth - ear_angle))
+                alpha = 1.0 + self.ALPHA_MIN / 2.0 + (1.0 - self.ALPHA_MIN / 2.0) * np.cos(np.radians(theta / self.THETA_MIN * 180.0))
+                shadow = (1.0 + 1j * alpha * omega / (2.0 * omega0)) / (1.0 + 1j * omega / (2.0 * omega0))
+                theta_rad = np.radians(theta)
+                if theta_rad < np.pi / 2.0:
+                    delay = -self.HEAD_RADIUS / self.SPEED_OF_SOUND * np.cos(theta_rad)
+                else:
+                    delay = self.HEAD_RADIUS / self.SPEED_OF_SOUND * (theta_rad - np.pi / 2.0)
+                response = shadow * np.exp(-1j * omega * (delay + base_delay))
+                irs[i, ear] = np.fft.irfft(response, self.IR_LENGTH) * window * self.CENTER_GAIN
+        return irs
+
+    def _convolve(self, sound: np.ndarray) -> np.ndarray:
+        mono = sound.mean(axis=1) if sound.ndim == 2 else sound
+        rendered = fftconvolve(mono[np.newaxis, np.newaxis, :], self.irs, axes=-1)
+        return np.ascontiguousarray(rendered.transpose(0, 2, 1), dtype=np.float32)
+
+    def azimuth_index(self, azimuth_deg: float) -> int:
+        return int(np.abs(self.azimuths - azimuth_deg).argmin())
+
+    def get(self, sound_type: str, azimuth_deg: float) -> np.ndarray:
+        return self.bank[sound_type][self.azimuth_index(azimuth_deg)]
+
+    @property
+    def longest(self) -> int:
+        return max((rendered.shape[1] for rendered in self.bank.values()), default=1)
@@ -4,10 +4,13 @@ TRANSLATIONS = {
         'ping_volume': 'Volume du ping',
         'tts_volume': 'Volume vocal',
         'tts_speed': 'Vitesse vocale',
+        'cpu_budget': 'Budget processeur',
         'language': 'Langue',
         'lang_value_0': 'Français',
         'lang_value_1': 'Anglais',
         'unit_times': 'fois',
+        'unit_percent': 'pour cent',
+        'off': 'désactivé',
         'unit_none': '',
         'menu_opened': 'Menu paramètres. Utilisez les flèches haut et bas pour choisir, et gauche et droite pour ajuster.',
         'menu_closed': 'Menu fermé.',
@@ -32,10 +35,13 @@ TRANSLATIONS = {
         'ping_volume': 'Ping volume',
         'tts_volume': 'Voice volume',
         'tts_speed': 'Voice speed',
+        'cpu_budget': 'CPU budget',
         'language': 'Language',
         'lang_value_0': 'French',
         'lang_value_1': 'English',
         'unit_times': 'times',
+        'unit_percent': 'percent',
+        'off': 'off',
         'unit_none': '',
         'menu_opened': 'Settings menu. Use up and down arrows to choose, and left and right to adjust.',
         'menu_closed': 'Menu closed.',
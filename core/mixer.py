@@ -0,0 +1,234 @@
+import time
+import wave
+import threading
+import collections
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+from core.soundbank import read_mono, resample
+
+class _Voice:
+    __slots__ = ('buffer', 'pos', 'gain_l', 'gain_r')
+
+    def __init__(self, buffer: np.ndarray, gain_l: float, gain_r: float):
+        self.buffer = buffer
+        self.pos = 0
+        self.gain_l = gain_l
+        self.gain_r = gain_r
+
+class NumpyMixer:
+    SAMPLE_RATE = 44100
+    BLOCK_SIZE = 512
+    MAX_VOICES = 32
+
+    def __init__(self, sample_rate: int=SAMPLE_RATE, block_size: int=BLOCK_SIZE, max_voices: int=MAX_VOICES):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.max_voices = max_voices
+        self._samples: List[Dict[float, np.ndarray]] = []
+        self._commands: collections.deque = collections.deque()
+        self._voices: List[_Voice] = []
+        self._out = np.zeros((block_size, 2), dtype=np.float32)
+        self._scratch = np.zeros(block_size, dtype=np.float32)
+        self._stereo = np.zeros((block_size, 2), dtype=np.float32)
+        self.blocks_rendered = 0
+        self.voices_stolen = 0
+
+    def load(self, path: str, volume: float=1.0, speeds: Sequence[float]=(1.0,)) -> int:
+        mono = read_mono(path, self.sample_rate) * volume
+        variants = {}
+        for speed in speeds:
+            variants[speed] = mono if speed == 1.0 else resample(mono, 1.0 / speed)
+        self._samples.append(variants)
+        return len(self._samples) - 1
+
+    def play(self, sample_id: int, gain: float=1.0, azimuth: float=0.0, speed: float=1.0) -> None:
+        self._commands.append(('play', sample_id, gain, azimuth, speed))
+
+    def play_buffer(self, buffer: np.ndarray, gain: float=1.0) -> None:
+        self._commands.append(('buffer', buffer, gain))
+
+    def stop_all(self) -> None:
+        self._commands.append(('stop',))
+
+    @property
+    def active_voices(self) -> int:
+        return len(self._voices)
+
+    def _apply_commands(self) -> None:
+        while self._commands:
+            try:
+                command = self._commands.popleft()
+            except IndexError:
+                break
+            if command[0] == 'stop':
+                self._voices.clear()
+                continue
+            if command[0] == 'buffer':
+                self._add_voice(_Voice(command[1], command[2], command[2]))
+                continue
+            _, sample_id, gain, azimuth, speed = command
+            variants = self._samples[sample_id]
+            buffer = variants.get(speed)
+            if buffer is None:
+                buffer = variants[min(variants, key=lambda s: abs(s - speed))]
+            pan = max(-1.0, min(1.0, azimuth / 90.0))
+            theta = (pan + 1.0) / 2.0 * (np.pi / 2.0)
+            self._add_voice(_Voice(buffer, gain * float(np.cos(theta)), gain * float(np.sin(theta))))
+
+    def _add_voice(self, voice: _Voice) -> None:
+        if len(self._voices) >= self.max_voices:
+            self._voices.pop(0)
+            self.voices_stolen += 1
+        self._voices.append(voice)
+
+    def render(self, frames: Optional[int]=None) -> np.ndarray:
+        frames = self.block_size if frames is None else frames
+        if frames > self._out.shape[0]:
+            self._out = np.zeros((frames, 2), dtype=np.float32)
+            self._scratch = np.zeros(frames, dtype=np.float32)
+            self._stereo = np.zeros((frames, 2), dtype=np.float32)
+        self._apply_commands()
+        out = self._out[:frames]
+        out.fill(0.0)
+        finished = False
+        for voice in self._voices:
+            segment = voice.buffer[voice.pos:voice.pos + frames]
+            n = segment.shape[0]
+            if segment.ndim == 2:
+                stereo = self._stereo[:n]
+                np.multiply(segment, voice.gain_l, out=stereo)
+                out[:n] += stereo
+            else:
+                scratch = self._scratch[:n]
+                np.multiply(segment, voice.gain_l, out=scratch)
+                out[:n, 0] += scratch
+                np.multiply(segment, voice.gain_r, out=scratch)
+                out[:n, 1] += scratch
+            voice.pos += n
+            finished = finished or voice.pos >= voice.buffer.shape[0]
+        if finished:
+            self._voices = [voice for voice in self._voices if voice.pos < voice.buffer.shape[0]]
+        np.clip(out, -1.0, 1.0, out=out)
+        self.blocks_rendered += 1
+        return out
+
+class _ThreadedOutput:
+
+    def __init__(self, mixer: NumpyMixer, realtime: bool=True):
+        self.mixer = mixer
+        self.realtime = realtime
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        period = self.mixer.block_size / self.mixer.sample_rate
+        deadline = time.perf_counter()
+        while self._running:
+            self._write(self.mixer.render())
+            if self.realtime:
+                deadline += period
+                delay = deadline - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    deadline = time.perf_counter()
+
+    def _write(self, block: np.ndarray) -> None:
+        pass
+
+class NullOutput(_ThreadedOutput):
+    pass
+
+class WavFileOutput(_ThreadedOutput):
+
+    def __init__(self, mixer: NumpyMixer, path: str, realtime: bool=True):
+        super().__init__(mixer, realtime)
+        self.path = path
+        self._pcm = np.empty((mixer.block_size, 2), dtype=np.int16)
+        self._wav: Optional[wave.Wave_write] = None
+
+    def start(self) -> None:
+        self._wav = wave.open(self.path, 'wb')
+        self._wav.setnchannels(2)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(self.mixer.sample_rate)
+        super().start()
+
+    def stop(self) -> None:
+        super().stop()
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+    def _write(self, block: np.ndarray) -> None:
+        pcm = self._pcm[:block.shape[0]]
+        np.multiply(block, 32767, out=block)
+        np.copyto(pcm, block, casting='unsafe')
+        self._wav.writeframesraw(pcm)
+
+class SoundDeviceOutput:
+
+    def __init__(self, mixer: NumpyMixer):
+        import sounddevice
+        self.mixer = mixer
+        self._stream = sounddevice.OutputStream(samplerate=mixer.sample_rate, channels=2, dtype='float32', blocksize=mixer.block_size, latency='low', callback=self._callback)
+
+    def _callback(self, outdata, frames, time_info, status) -> None:
+        outdata[:] = self.mixer.render(frames)
+
+    def start(self) -> None:
+        self._stream.start()
+
+    def stop(self) -> None:
+        self._stream.stop()
+        self._stream.close()
+
+def open_output(mixer: NumpyMixer, device: str='auto'):
+    if device.lower().endswith('.wav'):
+        return WavFileOutput(mixer, device)
+    if device == 'null':
+        return NullOutput(mixer)
+    try:
+        return SoundDeviceOutput(mixer)
+    except Exception as e:
+        if device == 'sounddevice':
+            raise
+        print(f'  [!] No audio device available ({e}), using null output')
+        return NullOutput(mixer)
+
+def benchmark(seconds: float=60.0, pings_per_sec: float=20.0) -> None:
+    from core.soundbank import SoundBank, PITCHES
+    start = time.perf_counter()
+    mixer = NumpyMixer()
+    bank = SoundBank('pan', sample_rate=mixer.sample_rate)
+    sounds = ('quest', 'treasure', 'stockpile')
+    pitches = tuple(PITCHES)
+    startup = time.perf_counter() - start
+    total_blocks = int(seconds * mixer.sample_rate / mixer.block_size)
+    ping_every = max(1, int(mixer.sample_rate / mixer.block_size / pings_per_sec))
+    rng = np.random.default_rng(0)
+    max_voices = 0
+    start = time.perf_counter()
+    for block in range(total_blocks):
+        if block % ping_every == 0:
+            mixer.play_buffer(bank.get(sounds[block // ping_every % 3], float(rng.uniform(-90.0, 90.0)), pitches[block % 3]), gain=0.5)
+        mixer.render()
+        max_voices = max(max_voices, mixer.active_voices)
+    elapsed = time.perf_counter() - start
+    print(f'  Startup (sound bank)      : {startup * 1000:.1f} ms')
+    print(f'  Render {seconds:.0f}s of audio     : {elapsed * 1000:.1f} ms  ({seconds / elapsed:.0f}x realtime)')
+    print(f'  Per {mixer.block_size}-frame block      : {elapsed / total_blocks * 1e6:.1f} us')
+    print(f'  Peak polyphony            : {max_voices} voices')
+if __name__ == '__main__':
+    benchmark()
@@ -3,11 +3,15 @@ import pytesseract
 from PIL import Image
 pytesseract.pytesseract.tesseract_cmd = 'C:\\Program Files\\Tesseract-OCR\\tesseract.exe'
 import numpy as np
+from config import OCR_THRESHOLD
+from core.buffers import BufferPool
 
 class OCREngine:
 
-    def __init__(self):
+    def __init__(self, threshold: int=OCR_THRESHOLD):
         self.config: str = '--psm 7 -c tessedit_char_whitelist=0123456789m'
+        self.threshold = threshold
+        self.pool = BufferPool()
 
     def extract_distance(self, frame_bgr: np.ndarray, x_rel: float, y_rel: float, w_rel: float, h_rel: float, screen_width: int, screen_height: int) -> str:
         cx = int(x_rel * screen_width)
@@ -24,7 +28,7 @@ class OCREngine:
         if ocr_y2 <= ocr_y1 or ocr_x2 <= ocr_x1:
             return 'N/A'
         ocr_roi = frame_bgr[ocr_y1:ocr_y2, ocr_x1:ocr_x2]
-        ocr_gray = cv2.cvtColor(ocr_roi, cv2.COLOR_BGR2GRAY)
-        _, ocr_thresh = cv2.threshold(ocr_gray, 150, 255, cv2.THRESH_BINARY_INV)
+        ocr_thresh = cv2.cvtColor(ocr_roi, cv2.COLOR_BGR2GRAY, dst=self.pool.get('gray', ocr_roi.shape[:2]))
+        cv2.threshold(ocr_thresh, self.threshold, 255, cv2.THRESH_BINARY_INV, dst=ocr_thresh)
         text = pytesseract.image_to_string(ocr_thresh, config=self.config).strip()
         return text if text else 'N/A'
\ No newline at end of file
@@ -1,123 +1,149 @@
 import numpy as np
 import os
-import scipy.io.wavfile as wavfile
-from typing import List
-from core.audiofeedback import NavIcon
+import shutil
+import tempfile
+import wave
+from typing import Dict, Iterable, List, Optional, Tuple
+from core.audiofeedback import NavEvent, NavIcon, NavigationCore, icon_azimuth
+from core.soundbank import SoundBank
 
 class OfflineAudioRenderer:
     SAMPLE_RATE = 44100
+    BLOCK_SIZE = 4096
+    VOLUMES = {'quest': 0.4, 'treasure': 0.4, 'stockpile': 0.2}
 
-    def __init__(self, total_duration_sec: float):
-        self.total_samples = int(total_duration_sec * self.SAMPLE_RATE)
-        self.audio_buffer = np.zeros((self.total_samples, 2), dtype=np.float32)
+    def __init__(self, total_duration_sec: Optional[float]=None, output_path: Optional[str]=None, spatializer: str='hrtf', hrir_path: Optional[str]=None):
+        self.total_samples = int(total_duration_sec * self.SAMPLE_RATE) if total_duration_sec is not None else None
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         audio_dir = os.path.join(base_dir, 'assets', 'audio')
-        self.sounds = {'quest': self._load_sound(os.path.join(audio_dir, 'koto_note.wav'), 0.4), 'quest_center': self._load_sound(self._get_or_create_center_sound(audio_dir), 0.4), 'treasure': self._load_sound(os.path.join(audio_dir, 'koto_trill.wav'), 0.4), 'stockpile': self._load_sound(os.path.join(audio_dir, 'koto_stockpile.wav'), 0.2)}
-
-    def _get_or_create_center_sound(self, audio_dir: str) -> str:
-        orig_path = os.path.join(audio_dir, 'koto_note.wav')
-        center_path = os.path.join(audio_dir, 'koto_note_center.wav')
-        if not os.path.exists(center_path) and os.path.exists(orig_path):
-            sr, data = wavfile.read(orig_path)
-            factor = 2 ** (1.0 / 12.0)
-            orig_indices = np.arange(len(data))
-            new_indices = np.linspace(0, len(data) - 1, int(len(data) / factor))
-            if len(data.shape) == 2:
-                new_data = np.zeros((len(new_indices), 2), dtype=data.dtype)
-                new_data[:, 0] = np.interp(new_indices, orig_indices, data[:, 0])
-                new_data[:, 1] = np.interp(new_indices, orig_indices, data[:, 1])
-            else:
-                new_data = np.interp(new_indices, orig_indices, data).astype(data.dtype)
-            wavfile.write(center_path, sr, new_data)
-        return center_path if os.path.exists(center_path) else orig_path
-
-    def _load_sound(self, path: str, volume: float) -> np.ndarray:
-        if not os.path.exists(path):
-            print(f'  [OfflineAudio] Warning: Could not find {path}')
-            return np.zeros((1, 2), dtype=np.float32)
-        sr, data = wavfile.read(path)
-        if data.dtype == np.int16:
-            data = data.astype(np.float32) / 32768.0
-        elif data.dtype == np.int32:
-            data = data.astype(np.float32) / 2147483648.0
-        if len(data.shape) == 1:
-            data = np.column_stack((data, data))
-        return data * volume
-
-    def add_sound_event(self, sound_type: str, icon: NavIcon, time_sec: float):
-        if sound_type not in self.sounds:
-            return
-        sound_data = self.sounds[sound_type]
-        if icon.direction == 'center':
-            pan = 0.0
-        elif icon.direction == 'left':
-            pan = -min(1.0, icon.offset)
+        self.bank = SoundBank(spatializer, sample_rate=self.SAMPLE_RATE, audio_dir=audio_dir, ir_path=hrir_path)
+        self.n_blocks = -(-self.bank.longest // self.BLOCK_SIZE) + 1
+        self._ring = np.zeros((self.n_blocks * self.BLOCK_SIZE, 2), dtype=np.float32)
+        self._pcm = np.empty((self.BLOCK_SIZE, 2), dtype=np.int16)
+        self._head_block = 0
+        self._end_sample = 0
+        self.late_events = 0
+        self._output_path = output_path
+        if output_path is None:
+            fd, self._spool_path = tempfile.mkstemp(prefix='compasslayer_', suffix='.wav')
+            os.close(fd)
         else:
-            pan = min(1.0, icon.offset)
-        theta = (pan + 1.0) / 2.0 * (np.pi / 2.0)
-        left_gain = float(np.cos(theta))
-        right_gain = float(np.sin(theta))
-        panned_sound = sound_data.copy()
-        panned_sound[:, 0] *= left_gain
-        panned_sound[:, 1] *= right_gain
-        start_idx = int(time_sec * self.SAMPLE_RATE)
-        end_idx = start_idx + panned_sound.shape[0]
-        if start_idx >= self.total_samples:
+            self._spool_path = output_path
+        self._wav = wave.open(self._spool_path, 'wb')
+        self._wav.setnchannels(2)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(self.SAMPLE_RATE)
+
+    def add_sound_event(self, sound_type: str, icon: NavIcon, time_sec: float, pitch: str='normal'):
+        voice = self.bank.get(sound_type, icon_azimuth(icon), pitch)
+        if voice is None:
+            return
+        self._mix(voice, int(time_sec * self.SAMPLE_RATE), self.VOLUMES.get(sound_type, 1.0))
+
+    def add_sound_events(self, events: Iterable[Tuple[str, NavIcon, float]]):
+        for sound_type, icon, time_sec in sorted(events, key=lambda event: event[2]):
+            self.add_sound_event(sound_type, icon, time_sec)
+
+    def _mix(self, data: np.ndarray, start_idx: int, gain: float=1.0):
+        end_idx = start_idx + data.shape[0]
+        if self.total_samples is not None:
+            if start_idx >= self.total_samples:
+                return
+            end_idx = min(end_idx, self.total_samples)
+        self._flush_until(start_idx // self.BLOCK_SIZE)
+        head = self._head_block * self.BLOCK_SIZE
+        if start_idx < head:
+            self.late_events += 1
+            if end_idx <= head:
+                return
+            data = data[head - start_idx:]
+            start_idx = head
+        ring_len = self._ring.shape[0]
+        src = 0
+        pos = start_idx
+        n = end_idx - start_idx
+        while src < n:
+            idx = pos % ring_len
+            chunk = min(n - src, ring_len - idx)
+            self._ring[idx:idx + chunk] += data[src:src + chunk] * gain
+            src += chunk
+            pos += chunk
+        self._end_sample = max(self._end_sample, end_idx)
+
+    def _flush_until(self, block: int):
+        while self._head_block < block:
+            self._flush_block(self.BLOCK_SIZE)
+
+    def _flush_block(self, frames: int):
+        slot = self._head_block % self.n_blocks * self.BLOCK_SIZE
+        view = self._ring[slot:slot + self.BLOCK_SIZE]
+        np.clip(view, -1.0, 1.0, out=view)
+        np.multiply(view, 32767, out=view)
+        np.copyto(self._pcm, view, casting='unsafe')
+        self._wav.writeframesraw(self._pcm[:frames])
+        view.fill(0.0)
+        self._head_block += 1
+
+    def _finish(self):
+        if self._wav is None:
             return
-        if end_idx > self.total_samples:
-            valid_len = self.total_samples - start_idx
-            panned_sound = panned_sound[:valid_len]
-            end_idx = self.total_samples
-        self.audio_buffer[start_idx:end_idx] += panned_sound
+        end = self.total_samples if self.total_samples is not None else self._end_sample
+        while self._head_block * self.BLOCK_SIZE < end:
+            self._flush_block(min(self.BLOCK_SIZE, end - self._head_block * self.BLOCK_SIZE))
+        self._wav.close()
+        self._wav = None
 
     def export_wav(self, output_path: str):
-        final_audio = np.clip(self.audio_buffer, -1.0, 1.0)
-        final_audio_int16 = (final_audio * 32767).astype(np.int16)
-        wavfile.write(output_path, self.SAMPLE_RATE, final_audio_int16)
+        self._finish()
+        if os.path.abspath(output_path) != os.path.abspath(self._spool_path):
+            shutil.move(self._spool_path, output_path)
+            self._spool_path = output_path
+        self._output_path = output_path
 
-class OfflineNavigationController:
-    TREASURE_THRESHOLDS = [30.0, 20.0, 10.0, 5.0]
-    STOCKPILE_THRESHOLDS = [15.0, 10.0, 5.0]
+    def close(self) -> None:
+        if self._wav is None:
+            return
+        self._wav.close()
+        self._wav = None
+        if self._output_path is None:
+            try:
+                os.remove(self._spool_path)
+            except OSError:
+                pass
+
+class OfflineRenderSink:
+
+    def __init__(self, renderer: OfflineAudioRenderer):
+        self.renderer = renderer
+        self.speech: List[NavEvent] = []
+        self.counts: Dict[str, int] = {'pulse': 0, 'earcon': 0, 'speech': 0}
 
-    def __init__(self, total_duration_sec: float):
-        self.renderer = OfflineAudioRenderer(total_duration_sec)
-        self._last_treasure_dist = 999.0
-        self._last_stockpile_dist = 999.0
-        self._last_quest_pulse = -999.0
+    def emit(self, event: NavEvent) -> None:
+        self.counts[event.kind] = self.counts.get(event.kind, 0) + 1
+        if event.kind == 'pulse':
+            self.renderer.add_sound_event('quest', event.icon, event.time, event.pitch)
+        elif event.kind == 'earcon':
+            self.renderer.add_sound_event(event.sound, event.icon, event.time)
+        elif event.kind == 'scan':
+            self.renderer.add_sound_event('quest' if event.sound == 'main_quest' else event.sound, event.icon, event.time, event.pitch)
+        elif event.kind == 'speech':
+            self.speech.append(event)
 
-    def _pulse_interval(self, distance_m: float) -> float:
-        distance_m = max(1.0, distance_m)
-        interval = 2.5 * (distance_m / 100.0) ** 0.8
-        return round(max(0.25, min(3.0, interval)), 2)
+class OfflineNavigationController:
+
+    def __init__(self, total_duration_sec: Optional[float]=None, output_path: Optional[str]=None):
+        self.renderer = OfflineAudioRenderer(total_duration_sec, output_path=output_path)
+        self.sink = OfflineRenderSink(self.renderer)
+        self.core = NavigationCore(self.sink)
 
     def update(self, icons: List[NavIcon], current_time: float):
-        quest = next((i for i in icons if i.icon_type == 'main_quest'), None)
-        treasure = next((i for i in icons if i.icon_type == 'treasure'), None)
-        stockpile = next((i for i in icons if i.icon_type == 'stockpile'), None)
-        if quest:
-            interval = self._pulse_interval(quest.distance_m)
-            if current_time - self._last_quest_pulse >= interval:
-                sound_type = 'quest_center' if quest.direction == 'center' else 'quest'
-                self.renderer.add_sound_event(sound_type, quest, current_time)
-                self._last_quest_pulse = current_time
-        if treasure:
-            active_thresh = [t for t in self.TREASURE_THRESHOLDS if treasure.distance_m <= t]
-            if active_thresh:
-                closest = min(active_thresh)
-                if closest < self._last_treasure_dist:
-                    self.renderer.add_sound_event('treasure', treasure, current_time)
-                    self._last_treasure_dist = closest
-            else:
-                self._last_treasure_dist = 999.0
-        if stockpile:
-            active_thresh = [t for t in self.STOCKPILE_THRESHOLDS if stockpile.distance_m <= t]
-            if active_thresh:
-                closest = min(active_thresh)
-                if closest < self._last_stockpile_dist:
-                    self.renderer.add_sound_event('stockpile', stockpile, current_time)
-                    self._last_stockpile_dist = closest
-            else:
-                self._last_stockpile_dist = 999.0
+        self.core.update(icons, current_time)
+
+    def advance(self, current_time: float):
+        self.core.advance(current_time)
 
     def export(self, output_path: str):
-        self.renderer.export_wav(output_path)
\ No newline at end of file
+        self.renderer.export_wav(output_path)
+
+    def close(self) -> None:
+        self.renderer.close()
@@ -0,0 +1,295 @@
+import time
+import threading
+import collections
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple
+from config import BLUR_KSIZE, CAPTURE_MAX_FPS, COMPASS_WIDTH_RATIO, STRAIGHT_AHEAD_THRESHOLD
+
+COMPASS_X_START = 0.5 - COMPASS_WIDTH_RATIO / 2
+COMPASS_X_END = 0.5 + COMPASS_WIDTH_RATIO / 2
+OCR_OFFSET_LIMIT = 0.1
+
+@dataclass
+class FramePacket:
+    seq: int
+    slot: int
+    frame: np.ndarray
+    t_capture: float
+    detections: List[Dict[str, Any]] = field(default_factory=list)
+    located: List[Dict[str, Any]] = field(default_factory=list)
+    ignored: List[Tuple[str, float]] = field(default_factory=list)
+    output_list: List[Dict[str, Any]] = field(default_factory=list)
+    t_detect: float = 0.0
+    t_ocr: float = 0.0
+    t_output: float = 0.0
+    spans: Dict[str, float] = field(default_factory=dict)
+    allocations: int = 0
+
+    @property
+    def latency(self) -> float:
+        return self.t_output - self.t_capture
+
+def locate_detections(detections: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Tuple[str, float]]]:
+    located = []
+    ignored = []
+    for det in detections:
+        icon_x_rel = det['x_rel']
+        relative_offset = (icon_x_rel - 0.5) / COMPASS_WIDTH_RATIO
+        det['rel_offset'] = relative_offset
+        if not COMPASS_X_START <= icon_x_rel <= COMPASS_X_END:
+            ignored.append((det['label'], icon_x_rel))
+            continue
+        if abs(relative_offset) < STRAIGHT_AHEAD_THRESHOLD:
+            direction = 'Straight'
+        elif relative_offset < 0:
+            direction = 'Left'
+        else:
+            direction = 'Right'
+        det['direction'] = direction
+        located.append(det)
+    return (located, ignored)
+
+def read_distances(located: List[Dict[str, Any]], frame_bgr: np.ndarray, ocr_engine, screen_width: int, screen_height: int) -> List[Dict[str, Any]]:
+    output_list = []
+    for det in located:
+        relative_offset = det['rel_offset']
+        if abs(relative_offset) < OCR_OFFSET_LIMIT:
+            dist_text = ocr_engine.extract_distance(frame_bgr, det['x_rel'], det['y_rel'], det['w_rel'], det['h_rel'], screen_width, screen_height)
+        else:
+            dist_text = 'N/A'
+        det['distance'] = dist_text
+        output_list.append({'id': det['id'], 'label': det['label'], 'rel_offset': round(relative_offset, 3), 'direction': det['direction'], 'distance': dist_text, 'score': det['score']})
+    return output_list
+
+def best_per_type(output_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    best = {}
+    for item in output_list:
+        lbl = item['label']
+        if lbl not in best or item['score'] > best[lbl]['score']:
+            best[lbl] = item
+    return list(best.values())
+
+class FrameRing:
+
+    def __init__(self, shape: Tuple[int, ...], count: int, dtype=np.uint8):
+        self.frames = [np.empty(shape, dtype=dtype) for _ in range(count)]
+        self._free = collections.deque(range(count))
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: Optional[float]=None) -> Optional[int]:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._free, timeout=timeout):
+                return None
+            return self._free.popleft()
+
+    def release(self, slot: int) -> None:
+        with self._cond:
+            self._free.append(slot)
+            self._cond.notify()
+
+class LatestSlot:
+
+    def __init__(self, on_drop: Optional[Callable[[Any], None]]=None):
+        self._cond = threading.Condition()
+        self._value = None
+        self._on_drop = on_drop
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, value) -> None:
+        with self._cond:
+            if self._value is not None:
+                self.dropped += 1
+                if self._on_drop is not None:
+                    self._on_drop(self._value)
+            self._value = value
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float]=None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._value is not None or self._closed, timeout=timeout):
+                return None
+            value = self._value
+            self._value = None
+            return value
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            if self._value is not None and self._on_drop is not None:
+                self._on_drop(self._value)
+            self._value = None
+            self._cond.notify_all()
+
+class _StageThread(threading.Thread):
+
+    def __init__(self, pipeline: 'DetectionPipeline', name: str):
+        super().__init__(name=f'compasslayer-{name}', daemon=True)
+        self.pipeline = pipeline
+        self.stage = name
+        self.processed = 0
+        self.busy_time = 0.0
+
+class _CaptureThread(_StageThread):
+
+    def __init__(self, pipeline: 'DetectionPipeline', capturer, sink: LatestSlot):
+        super().__init__(pipeline, 'capture')
+        self.capturer = capturer
+        self.sink = sink
+
+    def run(self) -> None:
+        ring = self.pipeline.ring
+        next_capture = time.perf_counter()
+        seq = 0
+        while self.pipeline.running:
+            max_fps = self.pipeline.max_fps
+            period = 1.0 / max_fps if max_fps else 0.0
+            delay = next_capture - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            slot = ring.acquire(timeout=0.1)
+            if slot is None:
+                continue
+            t_capture = time.perf_counter()
+            next_capture = max(next_capture + period, t_capture)
+            try:
+                self.capturer.get_frame(out=ring.frames[slot])
+            except Exception as exc:
+                ring.release(slot)
+                self.pipeline.fail(exc)
+                break
+            seq += 1
+            end = time.perf_counter()
+            self.processed += 1
+            self.busy_time += end - t_capture
+            packet = FramePacket(seq, slot, ring.frames[slot], t_capture)
+            packet.spans['capture'] = end - t_capture
+            if self.pipeline.profiler is not None:
+                self.pipeline.profiler.record('capture', t_capture, end, seq)
+            self.sink.put(packet)
+
+class _WorkerThread(_StageThread):
+
+    def __init__(self, pipeline: 'DetectionPipeline', name: str, fn: Callable[[FramePacket], None], source: LatestSlot, sink: LatestSlot):
+        super().__init__(pipeline, name)
+        self.fn = fn
+        self.source = source
+        self.sink = sink
+
+    def run(self) -> None:
+        while self.pipeline.running:
+            packet = self.source.get(timeout=0.1)
+            if packet is None:
+                continue
+            start = time.perf_counter()
+            try:
+                self.fn(packet)
+            except Exception as exc:
+                self.pipeline.release(packet)
+                self.pipeline.fail(exc)
+                break
+            end = time.perf_counter()
+            setattr(packet, f't_{self.stage}', end)
+            packet.spans[self.stage] = end - start
+            if self.pipeline.profiler is not None:
+                self.pipeline.profiler.record(self.stage, start, end, packet.seq)
+            self.processed += 1
+            self.busy_time += end - start
+            self.sink.put(packet)
+
+class DetectionPipeline:
+    RING_SIZE = 8
+
+    def __init__(self, capturer, detector, ocr_engine, screen_info: Dict[str, int], max_fps: float=CAPTURE_MAX_FPS, offload=None, profiler=None, tracker=None, scheduler=None, blur_ksize: Optional[tuple]=BLUR_KSIZE):
+        self.detector = detector
+        self.tracker = tracker
+        self.scheduler = scheduler
+        self.blur_ksize = blur_ksize
+        self.profiler = profiler
+        self.ocr_engine = ocr_engine
+        self.offload = offload
+        self.screen_width = screen_info['width']
+        self.screen_height = screen_info['height']
+        self.normalize_fn = capturer.normalize_coord
+        self.max_fps = max_fps
+        self.running = False
+        self.error: Optional[BaseException] = None
+        self.ring = offload.ring if offload is not None else FrameRing((screen_info['capture_height'], screen_info['width'], 3), self.RING_SIZE)
+        self._captured = LatestSlot(self.release)
+        self._detected = LatestSlot(self.release)
+        self.results = LatestSlot(self.release)
+        self.stages: List[_StageThread] = [_CaptureThread(self, capturer, self._captured), _WorkerThread(self, 'detect', self._detect, self._captured, self._detected), _WorkerThread(self, 'ocr', self._ocr, self._detected, self.results)]
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.delivered = 0
+
+    def start(self) -> None:
+        self.running = True
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self) -> None:
+        self.running = False
+        for stage in self.stages:
+            stage.join(timeout=2.0)
+        for slot in (self._captured, self._detected, self.results):
+            slot.close()
+
+    def fail(self, exc: BaseException) -> None:
+        self.error = exc
+        self.running = False
+        self.results.close()
+
+    def get(self, timeout: Optional[float]=None) -> Optional[FramePacket]:
+        packet = self.results.get(timeout=timeout)
+        if self.error is not None:
+            raise self.error
+        if packet is None:
+            return None
+        packet.t_output = time.perf_counter()
+        self.delivered += 1
+        self.latency_total += packet.latency
+        self.latency_max = max(self.latency_max, packet.latency)
+        return packet
+
+    def release(self, packet: FramePacket) -> None:
+        self.ring.release(packet.slot)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {'delivered': self.delivered, 'latency_ms_mean': self.latency_total / self.delivered * 1000.0 if self.delivered else 0.0, 'latency_ms_max': self.latency_max * 1000.0, 'dropped': self._captured.dropped + self._detected.dropped + self.results.dropped}
+        for stage, output in zip(self.stages, (self._captured, self._detected, self.results)):
+            stats[stage.stage] = {'processed': stage.processed, 'superseded': output.dropped, 'busy_ms_mean': stage.busy_time / stage.processed * 1000.0 if stage.processed else 0.0}
+        return stats
+
+    @staticmethod
+    def _pool_allocations(owner) -> int:
+        pool = getattr(owner, 'pool', None)
+        return pool.allocations if pool is not None else 0
+
+    def _detect(self, packet: FramePacket) -> None:
+        allocations = self._pool_allocations(self.detector)
+        if self.offload is not None:
+            packet.detections = self.offload.detect(packet.slot, use_laplacian=True, blur_ksize=self.blur_ksize)
+        elif self.tracker is not None:
+            packet.detections = self.tracker.detect(packet.frame, self._full_detect)
+        else:
+            packet.detections = self._full_detect(packet.frame)
+        packet.located, packet.ignored = locate_detections(packet.detections)
+        packet.allocations += self._pool_allocations(self.detector) - allocations
+
+    def _full_detect(self, frame_bgr: np.ndarray) -> List[Dict[str, Any]]:
+        if self.scheduler is not None:
+            return self.scheduler.detect(frame_bgr, self._detect_labels)
+        return self._detect_labels(frame_bgr)
+
+    def _detect_labels(self, frame_bgr: np.ndarray, labels: Optional[Collection[str]]=None) -> List[Dict[str, Any]]:
+        return self.detector.detect(frame_bgr, screen_width=self.screen_width, screen_height=self.screen_height, normalize_fn=self.normalize_fn, use_laplacian=True, blur_ksize=self.blur_ksize, labels=labels)
+
+    def _ocr(self, packet: FramePacket) -> None:
+        allocations = self._pool_allocations(self.ocr_engine)
+        if self.offload is not None and self.offload.with_ocr:
+            packet.output_list = self.offload.read_distances(packet.slot, packet.located)
+        else:
+            packet.output_list = read_distances(packet.located, packet.frame, self.ocr_engine, self.screen_width, self.screen_height)
+        packet.allocations += self._pool_allocations(self.ocr_engine) - allocations
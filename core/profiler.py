@@ -0,0 +1,160 @@
+import os
+import csv
+import json
+import math
+import time
+import threading
+import numpy as np
+import psutil
+from typing import Dict, List, Optional
+
+class LatencyHistogram:
+    MIN_SECONDS = 1e-06
+    DECADES = 8
+    BUCKETS_PER_DECADE = 40
+
+    def __init__(self):
+        self.counts = np.zeros(self.DECADES * self.BUCKETS_PER_DECADE + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        if seconds > self.MIN_SECONDS:
+            index = min(int(math.log10(seconds / self.MIN_SECONDS) * self.BUCKETS_PER_DECADE) + 1, self.counts.shape[0] - 1)
+        else:
+            index = 0
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.counts), math.ceil(self.count * q / 100.0)))
+        upper = self.MIN_SECONDS * 10 ** (index / self.BUCKETS_PER_DECADE)
+        return min(upper, self.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+class PerformanceProfiler:
+    SPAN_CAPACITY = 1 << 16
+    FRAME_CHUNK = 4096
+    SAMPLE_INTERVAL = 1.0
+    STAGES = ('capture', 'detect', 'ocr', 'controller', 'preview')
+    COLUMNS = ['Time_s', 'App_CPU_Percent', 'Sys_CPU_Percent', 'Memory_MB', 'Latency_ms', 'Capture_ms', 'Detect_ms', 'OCR_ms', 'Controller_ms', 'Preview_ms', 'Allocations']
+
+    def __init__(self, log_file: str='performance_log.csv', trace_file: Optional[str]='performance_trace.json', span_capacity: int=SPAN_CAPACITY, sample_interval: float=SAMPLE_INTERVAL):
+        self.log_file = log_file
+        self.trace_file = trace_file
+        self.sample_interval = sample_interval
+        self.process = psutil.Process(os.getpid())
+        self.start_time = time.perf_counter()
+        self._lock = threading.Lock()
+        self._names: Dict[str, int] = {}
+        self._name_list: List[str] = []
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._span_name = np.zeros(span_capacity, dtype=np.int32)
+        self._span_start = np.zeros(span_capacity, dtype=np.float64)
+        self._span_dur = np.zeros(span_capacity, dtype=np.float64)
+        self._span_tid = np.zeros(span_capacity, dtype=np.int64)
+        self._span_frame = np.zeros(span_capacity, dtype=np.int64)
+        self._span_count = 0
+        self._rows = np.zeros((self.FRAME_CHUNK, len(self.COLUMNS)), dtype=np.float64)
+        self._row_count = 0
+        self._samples: List[tuple] = []
+        self._last_sample = -self.sample_interval
+        self._system = (0.0, 0.0, 0.0)
+        self.frames = 0
+        self.allocations = 0
+        self.last_allocating_frame = 0
+        self.process.cpu_percent()
+        psutil.cpu_percent()
+        with open(self.log_file, 'w', newline='') as f:
+            csv.writer(f).writerow(self.COLUMNS)
+
+    def record(self, name: str, start: float, end: float, frame: int=-1) -> None:
+        with self._lock:
+            name_id = self._names.get(name)
+            if name_id is None:
+                name_id = self._names[name] = len(self._name_list)
+                self._name_list.append(name)
+                self.histograms[name] = LatencyHistogram()
+            self.histograms[name].add(end - start)
+            index = self._span_count % self._span_name.shape[0]
+            self._span_name[index] = name_id
+            self._span_start[index] = start
+            self._span_dur[index] = end - start
+            self._span_tid[index] = threading.get_ident()
+            self._span_frame[index] = frame
+            self._span_count += 1
+
+    def _sample_system(self, now: float) -> None:
+        if now - self._last_sample < self.sample_interval:
+            return
+        self._last_sample = now
+        self._system = (self.process.cpu_percent(), psutil.cpu_percent(), self.process.memory_info().rss / (1024 * 1024))
+        self._samples.append((now,) + self._system)
+
+    def log_cycle(self, latency_seconds: float, stages: Optional[Dict[str, float]]=None, allocations: int=0) -> None:
+        now = time.perf_counter()
+        self._sample_system(now)
+        self.frames += 1
+        self.record('frame', now - latency_seconds, now, self.frames)
+        row = self._rows[self._row_count]
+        row[0] = now - self.start_time
+        row[1:4] = self._system
+        row[4] = latency_seconds * 1000
+        for i, stage in enumerate(self.STAGES):
+            row[5 + i] = stages.get(stage, 0.0) * 1000 if stages else 0.0
+        row[5 + len(self.STAGES)] = allocations
+        if allocations:
+            self.allocations += allocations
+            self.last_allocating_frame = self.frames
+        self._row_count += 1
+        if self._row_count == self.FRAME_CHUNK:
+            self._flush_rows()
+
+    def _flush_rows(self) -> None:
+        if not self._row_count:
+            return
+        with open(self.log_file, 'a', newline='') as f:
+            np.savetxt(f, self._rows[:self._row_count], fmt='%.3f', delimiter=',')
+        self._row_count = 0
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            histograms = dict(self.histograms)
+        return {name: {'count': h.count, 'mean_ms': h.mean * 1000, 'p50_ms': h.percentile(50) * 1000, 'p95_ms': h.percentile(95) * 1000, 'p99_ms': h.percentile(99) * 1000, 'max_ms': h.max * 1000} for name, h in histograms.items()}
+
+    def export_trace(self, path: str) -> None:
+        with self._lock:
+            capacity = self._span_name.shape[0]
+            count = min(self._span_count, capacity)
+            order = (np.arange(count) + self._span_count - count) % capacity
+            names = list(self._name_list)
+            spans = (self._span_name[order], self._span_start[order], self._span_dur[order], self._span_tid[order], self._span_frame[order])
+        pid = os.getpid()
+        events = []
+        for name_id, start, dur, tid, frame in zip(*spans):
+            event = {'name': names[name_id], 'cat': names[name_id].split('/')[0], 'ph': 'X', 'ts': (start - self.start_time) * 1e6, 'dur': dur * 1e6, 'pid': pid, 'tid': int(tid)}
+            if frame >= 0:
+                event['args'] = {'frame': int(frame)}
+            events.append(event)
+        for now, app_cpu, sys_cpu, memory_mb in self._samples:
+            ts = (now - self.start_time) * 1e6
+            events.append({'name': 'CPU %', 'ph': 'C', 'ts': ts, 'pid': pid, 'args': {'app': app_cpu, 'system': sys_cpu}})
+            events.append({'name': 'Memory MB', 'ph': 'C', 'ts': ts, 'pid': pid, 'args': {'rss': memory_mb}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def save(self) -> None:
+        self._flush_rows()
+        print(f'\n[+] Performance data saved to {self.log_file}')
+        if self.trace_file:
+            self.export_trace(self.trace_file)
+            print(f'[+] Span trace saved to {self.trace_file} (open in chrome://tracing or Perfetto)')
@@ -0,0 +1,128 @@
+import cv2
+import time
+import numpy as np
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple
+from config import COMPASS_WIDTH_RATIO
+from core.detector import IconDetector
+
+CLOSE_KERNEL = np.ones((3, 3), np.uint8)
+
+def edge_contours(gray: np.ndarray, edges: Optional[np.ndarray]=None) -> list:
+    edges = cv2.Canny(gray, 50, 150, edges=edges)
+    cv2.morphologyEx(edges, cv2.MORPH_CLOSE, CLOSE_KERNEL, dst=edges)
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return contours
+
+class ProposalDetector(IconDetector):
+    MIN_SIZE_RATIO = 0.5
+    MAX_SIZE_RATIO = 1.3
+    SEARCH_RADIUS_RATIO = 0.25
+    MAX_CANDIDATES = 32
+    DESCRIPTOR_SIZE = 16
+    PREFILTER_SCORE = 0.1
+    TOP_LABELS = 2
+    TOP_SCALES = 2
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.labels: List[str] = []
+        descriptors, weights, extents = ([], [], [])
+        for label, tmpl_list in self.templates.items():
+            base = min(tmpl_list, key=lambda t: abs(t['scale'] - self.scale))
+            mask = base['mask'] if base['mask'] is not None else np.full(base['image'].shape[:2], 255, np.uint8)
+            x, y, w, h = cv2.boundingRect(cv2.findNonZero(mask))
+            descriptor, weight = self._describe(base['image'][y:y + h, x:x + w], mask[y:y + h, x:x + w])
+            self.labels.append(label)
+            descriptors.append(descriptor)
+            weights.append(weight)
+            extents.append(max(w, h) / base['scale'])
+        width = self.DESCRIPTOR_SIZE * self.DESCRIPTOR_SIZE * 3
+        self._descriptors = np.array(descriptors, dtype=np.float32).reshape(len(self.labels), width)
+        self._weights = np.array(weights, dtype=np.float32).reshape(len(self.labels), width)
+        self._extents = extents
+        sides = [side for tmpl_list in self.templates.values() for t in tmpl_list for side in (t['w'], t['h'])] or [1]
+        self.min_side = min(sides) * self.MIN_SIZE_RATIO
+        self.max_side = max(sides) * self.MAX_SIZE_RATIO
+        self.candidates = 0
+        self.confirms = 0
+        print(f'[Detector] Candidate proposal + classify over {len(self.labels)} icon types.')
+
+    def _describe(self, image: np.ndarray, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        size = (self.DESCRIPTOR_SIZE, self.DESCRIPTOR_SIZE)
+        patch = cv2.resize(image, size, interpolation=cv2.INTER_AREA).astype(np.float32)
+        weight = np.repeat((cv2.resize(mask, size, interpolation=cv2.INTER_AREA) > 127).astype(np.float32)[:, :, None], 3, axis=2)
+        patch *= weight
+        patch -= patch.sum() / max(1.0, weight.sum())
+        patch *= weight
+        patch /= max(1e-06, float(np.linalg.norm(patch)))
+        return (patch, weight)
+
+    def classify(self, frame_bgr: np.ndarray, box: Tuple[int, int, int, int]) -> np.ndarray:
+        x, y, w, h = box
+        patch = cv2.resize(frame_bgr[y:y + h, x:x + w], (self.DESCRIPTOR_SIZE, self.DESCRIPTOR_SIZE), dst=self.pool.get('proposal_patch', (self.DESCRIPTOR_SIZE, self.DESCRIPTOR_SIZE, 3)), interpolation=cv2.INTER_AREA)
+        masked = self._weights * patch.reshape(1, -1).astype(np.float32)
+        masked -= (masked.sum(axis=1) / np.maximum(1.0, self._weights.sum(axis=1)))[:, None]
+        masked *= self._weights
+        norms = np.maximum(1e-06, np.linalg.norm(masked, axis=1))
+        return (masked * self._descriptors).sum(axis=1) / norms
+
+    def propose(self, frame_bgr: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        width = frame_bgr.shape[1]
+        pad = int(self.max_side / 2)
+        x0 = max(0, int((0.5 - COMPASS_WIDTH_RATIO / 2) * width) - pad)
+        x1 = min(width, int((0.5 + COMPASS_WIDTH_RATIO / 2) * width) + pad)
+        band = frame_bgr[:, x0:x1]
+        gray = cv2.cvtColor(band, cv2.COLOR_BGR2GRAY, dst=self.pool.get('proposal_gray', band.shape[:2]))
+        boxes = []
+        for contour in edge_contours(gray, self.pool.get('proposal_edges', gray.shape)):
+            x, y, w, h = cv2.boundingRect(contour)
+            if self.min_side <= max(w, h) <= self.max_side and min(w, h) >= self.min_side / 2:
+                boxes.append((w * h, x0 + x, y, w, h))
+        boxes.sort(reverse=True)
+        candidates = []
+        for _, x, y, w, h in boxes[:self.MAX_CANDIDATES]:
+            if all(abs(x + w / 2 - ox - ow / 2) > self.min_side or abs(y + h / 2 - oy - oh / 2) > self.min_side for ox, oy, ow, oh in candidates):
+                candidates.append((x, y, w, h))
+        return candidates
+
+    def detect(self, frame_bgr: np.ndarray, screen_width: int, screen_height: int, normalize_fn: Callable[[float, float], tuple], use_laplacian: bool=False, blur_ksize: tuple=None, labels: Optional[Collection[str]]=None) -> List[Dict[str, Any]]:
+        profiler = self.profiler
+        start = time.perf_counter()
+        frame_bgr, screen_width, screen_height, normalize_fn = self._processing_view(frame_bgr, screen_width, screen_height, normalize_fn)
+        candidates = self.propose(frame_bgr)
+        self.candidates += len(candidates)
+        active = self.labels if labels is None else [label for label in self.labels if label in labels]
+        excluded = None if labels is None else np.array([label not in labels for label in self.labels])
+        costs = dict.fromkeys(active, (time.perf_counter() - start) / max(1, len(active)))
+        if profiler is not None:
+            profiler.record('detect/proposals', start, time.perf_counter())
+            start = time.perf_counter()
+        found: Dict[str, Tuple[List[List[int]], List[float], List[Dict[str, Any]]]] = {}
+        for box in candidates:
+            scores = self.classify(frame_bgr, box)
+            if excluded is not None:
+                scores[excluded] = -1.0
+            cx, cy = (box[0] + box[2] / 2.0, box[1] + box[3] / 2.0)
+            for index in np.argsort(scores)[::-1][:self.TOP_LABELS]:
+                if scores[index] < self.PREFILTER_SCORE:
+                    break
+                label = self.labels[index]
+                confirm_start = time.perf_counter()
+                scale = max(box[2], box[3]) / self._extents[index]
+                for tmpl_data in sorted(self.templates[label], key=lambda t: abs(t['scale'] - scale))[:self.TOP_SCALES]:
+                    th, tw = (tmpl_data['h'], tmpl_data['w'])
+                    score, mx, my = self._confirm(frame_bgr, label, tmpl_data['scale'], cx, cy, max(2, int(max(tw, th) * self.SEARCH_RADIUS_RATIO), (max(box[2] - tw, box[3] - th) + 1) // 2), blur_ksize)
+                    self.confirms += 1
+                    if score >= self.match_threshold:
+                        boxes, match_scores, template_meta = found.setdefault(label, ([], [], []))
+                        boxes.append([int(round(mx - tw / 2.0)), int(round(my - th / 2.0)), tw, th])
+                        match_scores.append(score)
+                        template_meta.append(tmpl_data)
+                costs[label] += time.perf_counter() - confirm_start
+        self.label_costs.update(costs)
+        detections: List[Dict[str, Any]] = []
+        for label, (boxes, match_scores, template_meta) in found.items():
+            self._select(frame_bgr, label, boxes, match_scores, template_meta, screen_width, screen_height, normalize_fn, detections)
+        if profiler is not None:
+            profiler.record('detect/classify', start, time.perf_counter())
+        return detections
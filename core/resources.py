@@ -0,0 +1,111 @@
+import os
+import sys
+import threading
+import psutil
+from typing import List, Optional, Sequence
+from config import CAPTURE_MAX_FPS, CPU_BUDGET_PERCENT, CPU_CORES, CV_THREADS, LOW_PRIORITY
+
+class ResourceManager:
+    SAMPLE_INTERVAL = 1.0
+    MIN_FPS = 1.0
+    SMOOTHING = 0.5
+    MAX_STEP_UP = 1.5
+
+    def __init__(self, cpu_budget: float=CPU_BUDGET_PERCENT, cores: Sequence[int]=CPU_CORES, cv_threads: int=CV_THREADS, low_priority: bool=LOW_PRIORITY, max_fps: float=CAPTURE_MAX_FPS):
+        self.process = psutil.Process(os.getpid())
+        self.cpu_count = psutil.cpu_count() or 1
+        self.cpu_budget = cpu_budget
+        self.cores: List[int] = [core for core in cores if 0 <= core < self.cpu_count]
+        self.cv_threads = cv_threads
+        self.low_priority = low_priority
+        self.max_fps = max_fps
+        self.overhead = 0.0
+        self.overhead_samples: List[float] = []
+        self.throttled_fps: Optional[float] = None
+        self._children = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.process.cpu_percent()
+
+    @property
+    def core_count(self) -> int:
+        return len(self.cores) or self.cpu_count
+
+    def apply(self) -> None:
+        if self.cores:
+            try:
+                self.process.cpu_affinity(self.cores)
+                if hasattr(os, 'sched_setaffinity'):
+                    for thread in self.process.threads():
+                        os.sched_setaffinity(thread.id, self.cores)
+                print(f'  [+] Pinned to CPU cores {self.cores}')
+            except (AttributeError, OSError, psutil.Error) as exc:
+                print(f'  [!] Could not set CPU affinity: {exc}')
+        if self.low_priority:
+            try:
+                self.process.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS if sys.platform == 'win32' else 10)
+                print('  [+] Process priority lowered below the game')
+            except (OSError, psutil.Error) as exc:
+                print(f'  [!] Could not lower process priority: {exc}')
+
+    def limit_cv_threads(self) -> None:
+        if self.cv_threads > 0:
+            import cv2
+            cv2.setNumThreads(min(self.cv_threads, self.core_count))
+
+    def worker_cv_threads(self, processes: int) -> int:
+        per_process = max(1, self.core_count // max(1, processes))
+        return min(per_process, self.cv_threads) if self.cv_threads > 0 else per_process
+
+    def sample(self) -> float:
+        total = self.process.cpu_percent()
+        children = {}
+        try:
+            for child in self.process.children(recursive=True):
+                proc = children[child.pid] = self._children.get(child.pid, child)
+                try:
+                    total += proc.cpu_percent()
+                except psutil.Error:
+                    pass
+        except psutil.Error:
+            pass
+        self._children = children
+        self.overhead = total / self.cpu_count
+        self.overhead_samples.append(self.overhead)
+        return self.overhead
+
+    def govern(self, pipeline) -> None:
+        detect = next(stage for stage in pipeline.stages if stage.stage == 'detect')
+        processed = detect.processed
+        while not self._stop.wait(self.SAMPLE_INTERVAL):
+            overhead = self.sample()
+            rate = (detect.processed - processed) / self.SAMPLE_INTERVAL
+            processed = detect.processed
+            if self.cpu_budget <= 0:
+                self.throttled_fps = None
+                pipeline.max_fps = self.max_fps
+                continue
+            current = max(rate, self.MIN_FPS)
+            if pipeline.max_fps:
+                current = min(current, pipeline.max_fps)
+            target = current * self.cpu_budget / max(overhead, 0.1)
+            target = current + self.SMOOTHING * (target - current)
+            target = min(target, current * self.MAX_STEP_UP)
+            if self.max_fps:
+                target = min(target, self.max_fps)
+            pipeline.max_fps = max(self.MIN_FPS, target)
+            self.throttled_fps = pipeline.max_fps if pipeline.max_fps < (self.max_fps or current * self.MAX_STEP_UP) else None
+
+    def start(self, pipeline) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.govern, args=(pipeline,), name='resource-governor', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    def stats(self) -> dict:
+        samples = self.overhead_samples
+        return {'budget': self.cpu_budget, 'overhead_mean': sum(samples) / len(samples) if samples else 0.0, 'overhead_max': max(samples) if samples else 0.0, 'capture_fps': self.throttled_fps or self.max_fps}
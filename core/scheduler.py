@@ -0,0 +1,95 @@
+from typing import Any, Callable, Collection, Dict, List, Optional
+from config import DETECT_BUDGET_MS
+
+class LabelScheduler:
+    MAX_DEFERRAL = 4
+    COST_SMOOTHING = 0.2
+
+    def __init__(self, detector, target_icons: Dict[str, Dict], budget_ms: float=DETECT_BUDGET_MS):
+        self.detector = detector
+        self.budget = budget_ms / 1000.0 if budget_ms >= 0 else None
+        labels = [label for label in target_icons if label in detector.templates]
+        self.labels = sorted(labels, key=lambda label: target_icons[label].get('priority', 0))
+        self.priority = {label: target_icons[label].get('priority', 0) for label in self.labels}
+        self.refresh = {label: max(1, int(target_icons[label].get('refresh', 1))) for label in self.labels}
+        self.pinned = [label for label in self.labels if self.refresh[label] == 1]
+        self._age = {label: self.refresh[label] for label in self.labels}
+        self._cost = dict.fromkeys(self.labels, 0.0)
+        self._last: Dict[str, List[Dict[str, Any]]] = {label: [] for label in self.labels}
+        self._anchor_at: Dict[str, Optional[float]] = dict.fromkeys(self.labels)
+        self._staggered = False
+        self.frames = 0
+        self.runs = dict.fromkeys(self.labels, 0)
+        self.deferred = dict.fromkeys(self.labels, 0)
+        self.over_budget = 0
+
+    def current_budget(self) -> Optional[float]:
+        if self.budget is None or self.budget > 0:
+            return self.budget
+        return max((self._cost[label] for label in self.labels if label not in self.pinned), default=0.0)
+
+    def plan(self) -> List[str]:
+        planned = list(self.pinned)
+        budget = self.current_budget()
+        remaining = budget
+        due = [label for label in self.labels if label not in planned and self._age[label] >= self.refresh[label]]
+        due.sort(key=lambda label: (self._age[label] < self.refresh[label] * self.MAX_DEFERRAL, self.priority[label], -self._age[label]))
+        for label in due:
+            starved = self._age[label] >= self.refresh[label] * self.MAX_DEFERRAL
+            if budget is None or starved or self._cost[label] <= remaining:
+                planned.append(label)
+                if remaining is not None:
+                    remaining -= self._cost[label]
+            else:
+                self.deferred[label] += 1
+        return planned
+
+    def detect(self, frame_bgr, detect_fn: Callable[[Any, Optional[Collection[str]]], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        budget = self.current_budget()
+        planned = self.plan()
+        detections = detect_fn(frame_bgr, planned)
+        secondary = sum(self.detector.label_costs.get(label, 0.0) for label in planned if label not in self.pinned)
+        if budget and secondary > budget:
+            self.over_budget += 1
+        anchor = self._anchor(detections)
+        for label in planned:
+            self._last[label] = []
+            self._anchor_at[label] = anchor
+            self._age[label] = 0
+            self.runs[label] += 1
+            cost = self.detector.label_costs.get(label)
+            if cost is not None:
+                self._cost[label] = cost if self._cost[label] == 0.0 else self._cost[label] + (cost - self._cost[label]) * self.COST_SMOOTHING
+        for det in detections:
+            self._last[det['label']].append(det)
+        if not self._staggered:
+            self._stagger()
+        for label in self.labels:
+            self._age[label] += 1
+        self.frames += 1
+        merged = []
+        for label in self.labels:
+            shift = anchor - self._anchor_at[label] if anchor is not None and self._anchor_at[label] is not None else 0.0
+            for det in self._last[label]:
+                merged.append(dict(det, id=len(merged), x_rel=det['x_rel'] + shift))
+        return merged
+
+    def _anchor(self, detections: List[Dict[str, Any]]) -> Optional[float]:
+        for label in self.pinned:
+            positions = [det['x_rel'] for det in detections if det['label'] == label]
+            if len(positions) == 1:
+                return positions[0]
+        return None
+
+    def _stagger(self) -> None:
+        self._staggered = True
+        slots: Dict[int, int] = {}
+        for label in self.labels:
+            refresh = self.refresh[label]
+            if refresh > 1:
+                slot = slots.get(refresh, 0)
+                self._age[label] = -(slot % refresh)
+                slots[refresh] = slot + 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {'frames': self.frames, 'budget_ms': self.current_budget() * 1000.0 if self.budget is not None else None, 'over_budget': self.over_budget, 'labels': {label: {'runs': self.runs[label], 'deferred': self.deferred[label], 'cost_ms': self._cost[label] * 1000.0} for label in self.labels}}
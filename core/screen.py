@@ -1,12 +1,15 @@
 import mss
+import threading
 import numpy as np
 import cv2
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Optional
 
 class ScreenCapturer:
 
     def __init__(self, roi_height_ratio: float=0.15, monitor_idx: int=1):
         self.sct = mss.mss()
+        self._local = threading.local()
+        self._local.sct = self.sct
         if monitor_idx < len(self.sct.monitors):
             self.monitor = self.sct.monitors[monitor_idx]
         else:
@@ -16,11 +19,17 @@ class ScreenCapturer:
         self.capture_height: int = int(self.screen_height * roi_height_ratio)
         self.roi_monitor: Dict[str, int] = {'top': self.monitor['top'], 'left': self.monitor['left'], 'width': self.screen_width, 'height': self.capture_height}
 
-    def get_frame(self) -> np.ndarray:
-        sct_img = self.sct.grab(self.roi_monitor)
-        frame_bgra = np.array(sct_img)
-        frame_bgr = cv2.cvtColor(frame_bgra, cv2.COLOR_BGRA2BGR)
-        return frame_bgr
+    def _grabber(self):
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+        return sct
+
+    def get_frame(self, out: Optional[np.ndarray]=None) -> np.ndarray:
+        sct_img = self._grabber().grab(self.roi_monitor)
+        frame_bgra = np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(sct_img.height, sct_img.width, 4)
+        return cv2.cvtColor(frame_bgra, cv2.COLOR_BGRA2BGR, dst=out)
 
     def get_screen_info(self) -> Dict[str, int]:
         return {'width': self.screen_width, 'height': self.screen_height, 'capture_height': self.capture_height}
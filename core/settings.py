@@ -11,6 +11,7 @@ class Setting:
     step: float
     unit_key: str = 'unit_none'
     is_lang: bool = False
+    zero_key: str = ''
 
     def increase(self) -> float:
         self.value = min(self.max_val, round(self.value + self.step, 2))
@@ -25,6 +26,8 @@ class Setting:
         if self.is_lang:
             val_str = i18n.get_text(f'lang_value_{int(self.value)}')
             return f'{name}, {val_str}'
+        if self.zero_key and self.value == 0:
+            return f'{name}, {i18n.get_text(self.zero_key)}'
         unit_str = i18n.get_text(self.unit_key)
         if unit_str:
             return f'{name}, {self.value} {unit_str}'
@@ -32,13 +35,14 @@ class Setting:
 
 
 class SettingsMenu:
-    def __init__(self):
+    def __init__(self, cpu_budget: float=0.0):
         self.items: List[Setting] = [
             Setting(key='language', value=0.0, min_val=0.0, max_val=1.0, step=1.0, is_lang=True),
             Setting(key='ping_rate', value=1.0, min_val=0.5, max_val=2.0, step=0.25, unit_key='unit_times'),
             Setting(key='ping_volume', value=1.0, min_val=0.1, max_val=2.0, step=0.1, unit_key='unit_times'),
             Setting(key='tts_volume', value=60, min_val=10, max_val=100, step=10),
             Setting(key='tts_speed', value=0, min_val=-5, max_val=5, step=1),
+            Setting(key='cpu_budget', value=cpu_budget, min_val=0, max_val=50, step=5, unit_key='unit_percent', zero_key='off'),
         ]
         self.index: int = 0
         self.active: bool = False
@@ -67,6 +71,10 @@ class SettingsMenu:
     def tts_speed(self) -> int:
         return int(self.items[4].value)
 
+    @property
+    def cpu_budget(self) -> float:
+        return self.items[5].value
+
     def next_item(self) -> Setting:
         self.index = (self.index + 1) % len(self.items)
         return self.current
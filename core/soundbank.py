@@ -0,0 +1,140 @@
+import os
+import time
+import wave
+import shutil
+import hashlib
+import numpy as np
+from typing import Dict, Optional, Tuple
+from config import resource_path, user_cache_dir, SOUND_AZIMUTH_STEP
+
+SOUNDS = {'quest': 'koto_note.wav', 'treasure': 'koto_trill.wav', 'stockpile': 'koto_stockpile.wav'}
+PITCHES = {'normal': 1.0, 'almost_center': 1.029302, 'center': 1.059463}
+SOUND_PITCHES = {'quest': ('normal', 'almost_center', 'center')}
+TONES = {'ready': ((1046.5, 1568.0), 0.09)}
+
+def chime(frequencies, note_seconds: float, sample_rate: int) -> np.ndarray:
+    t = np.arange(int(note_seconds * sample_rate)) / sample_rate
+    envelope = np.minimum(1.0, t / 0.005) * np.exp(-t / (note_seconds / 3.0))
+    notes = [np.sin(2.0 * np.pi * freq * t) * envelope for freq in frequencies]
+    return (np.concatenate(notes) * 0.5).astype(np.float32)
+
+def read_mono(path: str, sample_rate: int) -> np.ndarray:
+    try:
+        with wave.open(path, 'rb') as wav:
+            sr, channels, width = (wav.getframerate(), wav.getnchannels(), wav.getsampwidth())
+            raw = wav.readframes(wav.getnframes())
+        if width not in (2, 4):
+            raise wave.Error(f'unsupported sample width {width}')
+        data = np.frombuffer(raw, dtype=np.int16 if width == 2 else np.int32).reshape(-1, channels)
+    except wave.Error:
+        import scipy.io.wavfile as wavfile
+        sr, data = wavfile.read(path)
+    if data.dtype == np.int16:
+        data = data.astype(np.float32) / 32768.0
+    elif data.dtype == np.int32:
+        data = data.astype(np.float32) / 2147483648.0
+    mono = np.asarray(data.mean(axis=1) if data.ndim == 2 else data, dtype=np.float32)
+    return resample(mono, sample_rate / sr) if sr != sample_rate else mono
+
+def resample(data: np.ndarray, ratio: float) -> np.ndarray:
+    new_len = max(1, int(len(data) * ratio))
+    positions = np.linspace(0, len(data) - 1, new_len)
+    return np.interp(positions, np.arange(len(data)), data).astype(np.float32)
+
+class SoundBank:
+    VERSION = 2
+    SAMPLE_RATE = 44100
+
+    def __init__(self, spatializer: str='pan', azimuth_step: float=SOUND_AZIMUTH_STEP, sample_rate: int=SAMPLE_RATE, audio_dir: Optional[str]=None, cache_dir: Optional[str]=None, ir_path: Optional[str]=None):
+        start = time.perf_counter()
+        self.spatializer = spatializer
+        self.sample_rate = sample_rate
+        audio_dir = audio_dir or resource_path(os.path.join('assets', 'audio'))
+        sources = {}
+        for name, filename in SOUNDS.items():
+            path = os.path.join(audio_dir, filename)
+            if os.path.exists(path):
+                sources[name] = path
+            else:
+                print(f'  [!] Missing audio file: {path}')
+        self.keys = [(name, pitch) for name in list(sources) + list(TONES) for pitch in SOUND_PITCHES.get(name, ('normal',))]
+        self.azimuths = np.zeros(1)
+        self.variants: Dict[Tuple[str, str], np.ndarray] = {}
+        name = f'{spatializer}-{self._fingerprint(sources, azimuth_step, ir_path)}'
+        self.directory = os.path.join(cache_dir or user_cache_dir('sounds'), name)
+        self.cached = self._load_cache(resource_path(os.path.join('cache', 'sounds', name))) or self._load_cache(self.directory)
+        if not self.cached:
+            self._build(sources, azimuth_step, ir_path)
+            self._save_cache()
+        source = 'cache' if self.cached else 'sources'
+        print(f'  [+] Sound bank: {len(self.variants)} variants x {len(self.azimuths)} azimuths from {source} in {(time.perf_counter() - start) * 1000:.0f} ms')
+
+    def _fingerprint(self, sources: Dict[str, str], azimuth_step: float, ir_path: Optional[str]) -> str:
+        digest = hashlib.sha1(repr((self.VERSION, self.sample_rate, azimuth_step, sorted(PITCHES.items()), sorted(SOUND_PITCHES.items()), sorted(TONES.items()))).encode())
+        for path in [sources[name] for name in sorted(sources)] + ([ir_path] if ir_path and os.path.exists(ir_path) else []):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        return digest.hexdigest()[:16]
+
+    def _build(self, sources: Dict[str, str], azimuth_step: float, ir_path: Optional[str]) -> None:
+        mono = {name: read_mono(path, self.sample_rate) for name, path in sources.items()}
+        mono.update({name: chime(frequencies, note_seconds, self.sample_rate) for name, (frequencies, note_seconds) in TONES.items()})
+        pitched = {(name, pitch): mono[name] if PITCHES[pitch] == 1.0 else resample(mono[name], 1.0 / PITCHES[pitch]) for name, pitch in self.keys}
+        if self.spatializer == 'hrtf':
+            from core.hrtf import HRTFBank
+            hrtf = HRTFBank({f'{name}/{pitch}': data for (name, pitch), data in pitched.items()}, azimuth_step=azimuth_step, ir_path=ir_path)
+            self.azimuths = hrtf.azimuths
+            self.variants = {key: hrtf.bank[f'{key[0]}/{key[1]}'] for key in self.keys}
+            return
+        self.azimuths = np.arange(-90.0, 90.0 + azimuth_step / 2.0, azimuth_step)
+        theta = (self.azimuths / 90.0 + 1.0) / 2.0 * (np.pi / 2.0)
+        gains = np.stack((np.cos(theta), np.sin(theta)), axis=1).astype(np.float32)
+        self.variants = {key: np.ascontiguousarray(gains[:, np.newaxis, :] * data[np.newaxis, :, np.newaxis]) for key, data in pitched.items()}
+
+    def _load_cache(self, directory: str) -> bool:
+        if not os.path.isdir(directory):
+            return False
+        try:
+            self.azimuths = np.load(os.path.join(directory, 'azimuths.npy'))
+            self.variants = {key: np.load(os.path.join(directory, f'{key[0]}-{key[1]}.npy')) for key in self.keys}
+        except (OSError, ValueError) as exc:
+            print(f'  [!] Ignoring unreadable sound cache {directory}: {exc}')
+            self.variants = {}
+            return False
+        return True
+
+    def _save_cache(self) -> None:
+        staging = f'{self.directory}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(staging, exist_ok=True)
+            np.save(os.path.join(staging, 'azimuths.npy'), self.azimuths)
+            for (name, pitch), data in self.variants.items():
+                np.save(os.path.join(staging, f'{name}-{pitch}.npy'), data)
+            os.replace(staging, self.directory)
+        except OSError as exc:
+            if not os.path.isdir(self.directory):
+                print(f'  [!] Could not write sound cache ({exc}), keeping the bank in memory')
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def azimuth_index(self, azimuth_deg: float) -> int:
+        return int(np.abs(self.azimuths - azimuth_deg).argmin())
+
+    def locate(self, sound: str, azimuth_deg: float, pitch: str='normal') -> Optional[Tuple[str, str, int]]:
+        if (sound, pitch) not in self.variants:
+            pitch = 'normal'
+            if (sound, pitch) not in self.variants:
+                return None
+        return (sound, pitch, self.azimuth_index(azimuth_deg))
+
+    def get(self, sound: str, azimuth_deg: float, pitch: str='normal') -> Optional[np.ndarray]:
+        key = self.locate(sound, azimuth_deg, pitch)
+        return None if key is None else self.variants[key[:2]][key[2]]
+
+    @property
+    def longest(self) -> int:
+        return max((variants.shape[1] for variants in self.variants.values()), default=1)
+
+    @property
+    def nbytes(self) -> int:
+        return sum((variants.nbytes for variants in self.variants.values()))
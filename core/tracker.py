@@ -0,0 +1,102 @@
+import cv2
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional
+from config import BLUR_KSIZE, COMPASS_WIDTH_RATIO
+
+class CompassTracker:
+    MIN_RESPONSE = 0.15
+    MAX_SHIFT_RATIO = 0.15
+    REDETECT_INTERVAL = 8
+    CONFIRM_RADIUS = 4
+    DOWNSAMPLE = 2
+    NEW_ICON_DIFF = 12.0
+    MASK_WIDTHS = 1.5
+
+    def __init__(self, detector, screen_info: Dict[str, int], blur_ksize: Optional[tuple]=BLUR_KSIZE):
+        self.detector = detector
+        self.screen_width = screen_info['width']
+        self.screen_height = screen_info['height']
+        self.blur_ksize = blur_ksize
+        self.x0 = int((0.5 - COMPASS_WIDTH_RATIO / 2) * self.screen_width)
+        self.x1 = int((0.5 + COMPASS_WIDTH_RATIO / 2) * self.screen_width)
+        band_size = ((self.x1 - self.x0) // self.DOWNSAMPLE, screen_info['capture_height'] // self.DOWNSAMPLE)
+        self._gray = np.empty((screen_info['capture_height'], self.x1 - self.x0), dtype=np.uint8)
+        self._small = np.empty(band_size[::-1], dtype=np.uint8)
+        self._prev = np.empty(band_size[::-1], dtype=np.float32)
+        self._cur = np.empty(band_size[::-1], dtype=np.float32)
+        self._diff = np.empty(band_size[::-1], dtype=np.float32)
+        self._columns = np.empty((1, band_size[0]), dtype=np.float32)
+        self._window = cv2.createHanningWindow(band_size, cv2.CV_32F)
+        self._has_prev = False
+        self._tracked: List[Dict[str, Any]] = []
+        self._since_detect = 0
+        self.max_shift = (self.x1 - self.x0) * self.MAX_SHIFT_RATIO
+        self.last_shift = 0.0
+        self.tracked_frames = 0
+        self.full_detects = 0
+        self.lost = 0
+        self.appeared = 0
+        self.last_change = 0.0
+
+    def _load_band(self, frame_bgr: np.ndarray) -> None:
+        cv2.cvtColor(frame_bgr[:, self.x0:self.x1], cv2.COLOR_BGR2GRAY, dst=self._gray)
+        cv2.resize(self._gray, self._small.shape[::-1], dst=self._small, interpolation=cv2.INTER_AREA)
+        np.copyto(self._cur, self._small, casting='unsafe')
+
+    def _track(self, frame_bgr: np.ndarray) -> Optional[List[Dict[str, Any]]]:
+        (dx, _), response = cv2.phaseCorrelate(self._prev, self._cur, self._window)
+        dx *= self.DOWNSAMPLE
+        self.last_shift = dx
+        if response < self.MIN_RESPONSE or abs(dx) > self.max_shift:
+            return None
+        threshold = self.detector.match_threshold
+        tracked = []
+        for det in self._tracked:
+            cx = det['x_rel'] * self.screen_width + dx
+            cy = det['y_rel'] * self.screen_height
+            score, cx, cy = self.detector.confirm(frame_bgr, det['label'], det['matched_scale'], cx, cy, self.CONFIRM_RADIUS, self.blur_ksize)
+            if score < threshold:
+                self.lost += 1
+                return None
+            tracked.append(dict(det, x_rel=cx / self.screen_width, y_rel=cy / self.screen_height, score=score))
+        if self._changed(dx, tracked):
+            self.appeared += 1
+            return None
+        return tracked
+
+    def _changed(self, dx: float, tracked: List[Dict[str, Any]]) -> bool:
+        shift = int(round(dx / self.DOWNSAMPLE))
+        width = self._cur.shape[1] - abs(shift)
+        cur = self._cur[:, max(shift, 0):max(shift, 0) + width]
+        prev = self._prev[:, max(-shift, 0):max(-shift, 0) + width]
+        diff = self._diff[:, :width]
+        columns = self._columns[:, :width]
+        cv2.absdiff(cur, prev, dst=diff)
+        cv2.reduce(diff, 0, cv2.REDUCE_AVG, dst=columns)
+        for det in tracked:
+            cx = (det['x_rel'] * self.screen_width - self.x0) / self.DOWNSAMPLE - max(shift, 0)
+            half = det['w_rel'] * self.screen_width * self.MASK_WIDTHS / self.DOWNSAMPLE
+            columns[:, max(0, int(cx - half)):max(0, int(cx + half) + 1)] = 0.0
+        self.last_change = float(columns.max())
+        return self.last_change > self.NEW_ICON_DIFF
+
+    def detect(self, frame_bgr: np.ndarray, full_detect: Callable[[np.ndarray], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        self._load_band(frame_bgr)
+        tracked = None
+        if self._has_prev and self._tracked and self._since_detect < self.REDETECT_INTERVAL:
+            tracked = self._track(frame_bgr)
+        if tracked is None:
+            tracked = full_detect(frame_bgr)
+            self._since_detect = 0
+            self.full_detects += 1
+        else:
+            self._since_detect += 1
+            self.tracked_frames += 1
+        self._tracked = tracked
+        self._prev, self._cur = (self._cur, self._prev)
+        self._has_prev = True
+        return [dict(det) for det in tracked]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.tracked_frames + self.full_detects
+        return {'tracked': self.tracked_frames, 'full_detects': self.full_detects, 'lost': self.lost, 'appeared': self.appeared, 'tracked_ratio': self.tracked_frames / total if total else 0.0}
@@ -0,0 +1,124 @@
+import os
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from config import SCALE_FACTORS, PROCESSING_SCALE
+from core.pipeline import FrameRing, read_distances
+
+class SharedFrameRing(FrameRing):
+
+    def __init__(self, shape: Tuple[int, ...], count: int, dtype=np.uint8):
+        frame_bytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=frame_bytes * count)
+        super().__init__(shape, count, dtype)
+        buffer = np.ndarray((count,) + tuple(shape), dtype=dtype, buffer=self.shm.buf)
+        self.frames = [buffer[i] for i in range(count)]
+
+    def close(self) -> None:
+        self.frames = []
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+        self.shm.unlink()
+
+class _ScreenGeometry:
+
+    def __init__(self, screen_width: int, screen_height: int):
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+
+    def normalize_coord(self, px_x: float, px_y: float) -> Tuple[float, float]:
+        return (px_x / self.screen_width, px_y / self.screen_height)
+
+def _worker_main(conn, shm_name: str, shape: Tuple[int, ...], count: int, target_icons: Dict[str, Dict], detector_kwargs: Dict[str, Any], screen: Tuple[int, int], cv_threads: int, with_ocr: bool) -> None:
+    import cv2
+    cv2.setNumThreads(cv_threads)
+    if detector_kwargs.pop('mode', 'template') == 'proposal':
+        from core.proposals import ProposalDetector as IconDetector
+    else:
+        from core.detector import IconDetector
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = np.ndarray((count,) + tuple(shape), dtype=np.uint8, buffer=shm.buf)
+    geometry = _ScreenGeometry(*screen)
+    detector = IconDetector(target_icons, **detector_kwargs) if target_icons else None
+    ocr_engine = None
+    if with_ocr:
+        from core.ocr_engine import OCREngine
+        ocr_engine = OCREngine()
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            kind, slot, payload = message
+            frame = frames[slot]
+            if kind == 'detect':
+                detections = detector.detect(frame, screen_width=geometry.screen_width, screen_height=geometry.screen_height, normalize_fn=geometry.normalize_coord, use_laplacian=payload['use_laplacian'], blur_ksize=payload['blur_ksize'])
+                conn.send([(d['label'], d['x_rel'], d['y_rel'], d['w_rel'], d['h_rel'], d['score'], d['matched_scale']) for d in detections])
+            elif kind == 'ocr':
+                located = [{'id': i, 'label': label, 'x_rel': x, 'y_rel': y, 'w_rel': w, 'h_rel': h, 'rel_offset': offset, 'direction': direction, 'score': score} for i, (label, x, y, w, h, offset, direction, score) in enumerate(payload)]
+                conn.send([item['distance'] for item in read_distances(located, frame, ocr_engine, geometry.screen_width, geometry.screen_height)])
+    finally:
+        frames = frame = None
+        shm.close()
+
+class DetectorOffload:
+
+    def __init__(self, target_icons: Dict[str, Dict], screen_info: Dict[str, int], scale: float, processes: int=1, with_ocr: bool=False, ring_size: int=8, match_threshold: float=0.8, nms_iou_threshold: float=0.3, use_multi_scale: bool=True, cv_threads: Optional[int]=None, mode: str='template', scale_factors: Tuple[float, ...]=SCALE_FACTORS, processing_scale: float=PROCESSING_SCALE):
+        shape = (screen_info['capture_height'], screen_info['width'], 3)
+        self.ring = SharedFrameRing(shape, ring_size)
+        self.with_ocr = with_ocr
+        processes = max(1, min(processes, len(target_icons)))
+        labels = list(target_icons)
+        if cv_threads is None:
+            cv_threads = max(1, (os.cpu_count() or 1) // processes)
+        detector_kwargs = {'match_threshold': match_threshold, 'nms_iou_threshold': nms_iou_threshold, 'manual_scale': scale, 'use_multi_scale': use_multi_scale, 'mode': mode, 'scale_factors': tuple(scale_factors), 'processing_scale': processing_scale}
+        self._ctx = mp.get_context('spawn')
+        self._procs = []
+        worker_args = (self.ring.shm.name, shape, ring_size)
+        screen = (screen_info['width'], screen_info['height'])
+        self._conns = [self._spawn(f'detector-{i}', worker_args + ({label: target_icons[label] for label in labels[i::processes]}, detector_kwargs, screen, cv_threads, False)) for i in range(processes)]
+        self._ocr_conn = self._spawn('ocr', worker_args + ({}, detector_kwargs, screen, 1, True)) if with_ocr else None
+        print(f'[Detector] Offloaded to {processes} worker process(es){" with OCR" if with_ocr else ""}.')
+
+    def _spawn(self, name: str, args: tuple):
+        parent_conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(target=_worker_main, args=(child_conn,) + args, daemon=True, name=f'compasslayer-{name}')
+        proc.start()
+        child_conn.close()
+        self._procs.append(proc)
+        return parent_conn
+
+    def detect(self, slot: int, use_laplacian: bool=False, blur_ksize: Optional[tuple]=None) -> List[Dict[str, Any]]:
+        payload = {'use_laplacian': use_laplacian, 'blur_ksize': blur_ksize}
+        for conn in self._conns:
+            conn.send(('detect', slot, payload))
+        detections = []
+        for conn in self._conns:
+            for label, x_rel, y_rel, w_rel, h_rel, score, scale in conn.recv():
+                detections.append({'id': len(detections), 'label': label, 'x_rel': x_rel, 'y_rel': y_rel, 'w_rel': w_rel, 'h_rel': h_rel, 'score': score, 'matched_scale': scale})
+        return detections
+
+    def read_distances(self, slot: int, located: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        payload = [(d['label'], d['x_rel'], d['y_rel'], d['w_rel'], d['h_rel'], d['rel_offset'], d['direction'], d['score']) for d in located]
+        self._ocr_conn.send(('ocr', slot, payload))
+        distances = self._ocr_conn.recv()
+        output_list = []
+        for det, dist_text in zip(located, distances):
+            det['distance'] = dist_text
+            output_list.append({'id': det['id'], 'label': det['label'], 'rel_offset': round(det['rel_offset'], 3), 'direction': det['direction'], 'distance': dist_text, 'score': det['score']})
+        return output_list
+
+    def close(self) -> None:
+        for conn in self._conns + ([self._ocr_conn] if self._ocr_conn is not None else []):
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=2.0)
+            if proc.is_alive():
+                proc.terminate()
+        self.ring.close()
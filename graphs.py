@@ -1,63 +1,210 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import argparse
 import os
+import numpy as np
+import pandas as pd
+import matplotlib
+
+MAX_POINTS = 2000
+CHUNK_ROWS = 200000
+LATENCY_EDGES_MS = np.logspace(-2, 5, 7 * 40 + 1)
+PERCENTILES = (50, 95, 99)
+LOG_FLOOR = 0.001
+
+def _count_rows(csv_file: str) -> int:
+    rows = 0
+    with open(csv_file, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            rows += block.count(b'\n')
+    return max(0, rows - 1)
+
+def _histogram_percentiles(counts: np.ndarray, q: float) -> np.ndarray:
+    totals = counts.sum(axis=-1, keepdims=True)
+    cumulative = counts.cumsum(axis=-1)
+    index = (cumulative < np.ceil(totals * q / 100.0)).sum(axis=-1)
+    upper = LATENCY_EDGES_MS[np.minimum(index + 1, LATENCY_EDGES_MS.shape[0] - 1)]
+    return np.where(totals[..., 0] > 0, upper, np.nan)
+
+def summarize_log(csv_file: str, max_points: int=MAX_POINTS, chunk_rows: int=CHUNK_ROWS) -> dict:
+    total_rows = _count_rows(csv_file)
+    per_bucket = max(1, -(-total_rows // max_points))
+    buckets = max(1, -(-total_rows // per_bucket))
+    columns = None
+    stats = {}
+    latency_hist = np.zeros((buckets, LATENCY_EDGES_MS.shape[0] - 1), dtype=np.int64)
+    counts = np.zeros(buckets, dtype=np.int64)
+    offset = 0
+    for chunk in pd.read_csv(csv_file, chunksize=chunk_rows, dtype=np.float64):
+        if columns is None:
+            columns = list(chunk.columns)
+            for col in columns:
+                stats[col] = {'sum': np.zeros(buckets), 'min': np.full(buckets, np.inf), 'max': np.full(buckets, -np.inf)}
+        index = np.minimum((offset + np.arange(len(chunk))) // per_bucket, buckets - 1)
+        offset += len(chunk)
+        np.add.at(counts, index, 1)
+        for col in columns:
+            values = chunk[col].to_numpy()
+            np.add.at(stats[col]['sum'], index, values)
+            np.minimum.at(stats[col]['min'], index, values)
+            np.maximum.at(stats[col]['max'], index, values)
+        bins = np.clip(np.searchsorted(LATENCY_EDGES_MS, chunk['Latency_ms'].to_numpy(), side='right') - 1, 0, latency_hist.shape[1] - 1)
+        np.add.at(latency_hist, (index, bins), 1)
+    if columns is None:
+        raise ValueError(f'{csv_file} contains no samples')
+    valid = counts > 0
+    counts = counts[valid]
+    summary = {'name': os.path.splitext(os.path.basename(csv_file))[0], 'rows': offset, 'rows_per_point': per_bucket, 'columns': columns}
+    for col in columns:
+        summary[col] = {'mean': stats[col]['sum'][valid] / counts, 'min': stats[col]['min'][valid], 'max': stats[col]['max'][valid]}
+    latency_hist = latency_hist[valid]
+    summary['latency_bands'] = {q: _histogram_percentiles(latency_hist, q) for q in PERCENTILES}
+    summary['latency_overall'] = {q: float(_histogram_percentiles(latency_hist.sum(axis=0), q)) for q in PERCENTILES}
+    summary['stages'] = [col for col in columns if col.endswith('_ms') and col != 'Latency_ms' and summary[col]['max'].max() > 0]
+    return summary
+
+def _plot_cpu(ax, summary: dict, colors) -> None:
+    cpu_count = os.cpu_count() or 1
+    t = summary['Time_s']['mean']
+    app_cpu_norm = summary['App_CPU_Percent']['mean'] / cpu_count
+    base_cpu = np.clip(summary['Sys_CPU_Percent']['mean'] - app_cpu_norm, 0, None)
+    ax.stackplot(t, base_cpu, app_cpu_norm, labels=['Base System (Game + OS)', 'CompassLayer Overhead'], colors=[colors[0], colors[1]], alpha=0.85)
+    ax.set_xlabel('Time Elapsed (seconds)', fontsize=12, fontweight='bold')
+    ax.set_ylabel('System CPU Usage (%)', fontsize=12, fontweight='bold')
+    ax.set_title('CPU Footprint: Game vs. CompassLayer (%)', fontsize=15, pad=15, fontweight='bold')
+    ax.legend(loc='upper right', frameon=True, shadow=True)
+    ax.set_ylim(0, max(100, summary['Sys_CPU_Percent']['max'].max() + 5))
+    ax.margins(x=0)
+
+def _plot_latency(ax, summary: dict, color) -> None:
+    t = summary['Time_s']['mean']
+    bands = summary['latency_bands']
+    ax.fill_between(t, summary['Latency_ms']['min'], summary['Latency_ms']['max'], color=color, alpha=0.12, linewidth=0, label='min–max')
+    ax.fill_between(t, bands[50], bands[99], color=color, alpha=0.3, linewidth=0, label='p50–p99')
+    ax.plot(t, bands[95], color=color, linewidth=1.0, linestyle=':', label='p95')
+    ax.plot(t, bands[50], color=color, linewidth=1.8, label='p50')
+    overall = summary['latency_overall']
+    ax.axhline(overall[50], color='red', linestyle='--', alpha=0.7, label=f"Overall p50 {overall[50]:.1f} / p95 {overall[95]:.1f} / p99 {overall[99]:.1f} ms")
+    ax.set_xlabel('Time Elapsed (seconds)', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Frame Latency (ms)', fontsize=12, fontweight='bold')
+    ax.set_title('CompassLayer Glass-to-Output Latency (ms)', fontsize=15, pad=15, fontweight='bold')
+    ax.legend(loc='upper right', frameon=True)
+    ax.set_ylim(0, np.nanmax(bands[99]) * 1.2)
+    ax.margins(x=0)
 
-def generate_performance_graphs(csv_file="performance_log.csv"):
+def _plot_stages(ax, summary: dict, palette) -> None:
+    t = summary['Time_s']['mean']
+    stages = summary['stages']
+    ax.stackplot(t, *[summary[col]['mean'] for col in stages], labels=[col[:-3] for col in stages], colors=palette[:len(stages)], alpha=0.85)
+    ax.set_xlabel('Time Elapsed (seconds)', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Mean Stage Time (ms)', fontsize=12, fontweight='bold')
+    ax.set_title('Per-Stage Latency Breakdown (ms)', fontsize=15, pad=15, fontweight='bold')
+    ax.legend(loc='upper right', frameon=True)
+    ax.margins(x=0)
+
+def _plot_memory(ax, summary: dict, color) -> None:
+    t = summary['Time_s']['mean']
+    ax.plot(t, summary['Memory_MB']['max'], color=color, linewidth=2.0)
+    ax.fill_between(t, summary['Memory_MB']['max'], color=color, alpha=0.3)
+    ax.set_xlabel('Time Elapsed (seconds)', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Allocated RAM (MB)', fontsize=12, fontweight='bold')
+    ax.set_title('CompassLayer Memory Consumption (MB)', fontsize=15, pad=15, fontweight='bold')
+    ax.set_ylim(0, summary['Memory_MB']['max'].max() * 1.5)
+    ax.margins(x=0)
+
+def generate_performance_graphs(csv_file: str='performance_log.csv', output_filename: str='performance_graphs.png', dpi: int=150, max_points: int=MAX_POINTS, show: bool=False) -> None:
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     try:
-        df = pd.read_csv(csv_file)
+        summary = summarize_log(csv_file, max_points)
     except FileNotFoundError:
-        print(f"Could not find {csv_file}. Run your main app first!")
+        print(f'Could not find {csv_file}. Run your main app first!')
         return
-
-    sns.set_theme(style="whitegrid", palette="pastel")
-    
-    fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(12, 16))
+    sns.set_theme(style='whitegrid', palette='pastel')
+    panels = 4 if summary['stages'] else 3
+    fig, axes = plt.subplots(panels, 1, figsize=(12, 5.3 * panels))
     fig.suptitle('CompassLayer Performance Analysis', fontsize=18, fontweight='bold', y=0.98)
+    _plot_cpu(axes[0], summary, sns.color_palette('husl', 3))
+    _plot_latency(axes[1], summary, sns.color_palette('flare')[2])
+    if summary['stages']:
+        _plot_stages(axes[2], summary, sns.color_palette('Set2', len(summary['stages'])))
+    _plot_memory(axes[-1], summary, sns.color_palette('crest')[2])
+    sns.despine(left=True, bottom=True)
+    fig.tight_layout(pad=4.0, h_pad=5.0, w_pad=4.0, rect=[0, 0, 1, 0.95])
+    plt.savefig(output_filename, dpi=dpi, bbox_inches='tight')
+    print(f"Graphs successfully generated from {summary['rows']} samples ({summary['rows_per_point']} per point) and saved as '{output_filename}'")
+    if show:
+        plt.show()
+    plt.close(fig)
 
-    cpu_count = os.cpu_count() or 1
-    app_cpu_norm = df['App_CPU_Percent'] / cpu_count
-    base_cpu = (df['Sys_CPU_Percent'] - app_cpu_norm).clip(lower=0)
-    
-    colors = sns.color_palette("husl", 3)
-    ax1.stackplot(df['Time_s'], base_cpu, app_cpu_norm, 
-                  labels=['Base System (Game + OS)', 'CompassLayer Overhead'],
-                  colors=[colors[0], colors[3]], alpha=0.85)
-    
+def generate_comparison_graphs(csv_files: list, output_filename: str='performance_comparison.png', dpi: int=150, max_points: int=MAX_POINTS, show: bool=False) -> None:
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    summaries = [summarize_log(csv_file, max_points) for csv_file in csv_files]
+    sns.set_theme(style='whitegrid', palette='pastel')
+    colors = sns.color_palette('tab10', len(summaries))
+    fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(12, 16))
+    fig.suptitle('CompassLayer Run Comparison', fontsize=18, fontweight='bold', y=0.98)
+    for summary, color in zip(summaries, colors):
+        t = summary['Time_s']['mean'] - summary['Time_s']['mean'][0]
+        bands = summary['latency_bands']
+        ax1.fill_between(t, bands[50], bands[95], color=color, alpha=0.2, linewidth=0)
+        ax1.plot(t, bands[50], color=color, linewidth=1.8, label=summary['name'])
     ax1.set_xlabel('Time Elapsed (seconds)', fontsize=12, fontweight='bold')
-    ax1.set_ylabel('System CPU Usage (%)', fontsize=12, fontweight='bold')
-    ax1.set_title('CPU Footprint: Game vs. CompassLayer (%)', fontsize=15, pad=15, fontweight='bold')
-    ax1.legend(loc='upper right', frameon=True, shadow=True)
-    ax1.set_ylim(0, max(100, df['Sys_CPU_Percent'].max() + 5))
+    ax1.set_ylabel('Frame Latency p50 (p95 band) (ms)', fontsize=12, fontweight='bold')
+    ax1.set_title('Latency Over Time', fontsize=15, pad=15, fontweight='bold')
+    ax1.legend(loc='upper right', frameon=True)
     ax1.margins(x=0)
-    sns.lineplot(data=df, x='Time_s', y='Latency_ms', ax=ax2, color=sns.color_palette("flare")[2], linewidth=2.5)
-    ax2.set_xlabel('Time Elapsed (seconds)', fontsize=12, fontweight='bold')
+    width = 0.8 / len(summaries)
+    x = np.arange(len(PERCENTILES))
+    for i, (summary, color) in enumerate(zip(summaries, colors)):
+        values = [summary['latency_overall'][q] for q in PERCENTILES]
+        bars = ax2.bar(x + (i - (len(summaries) - 1) / 2) * width, values, width, color=color, label=summary['name'])
+        ax2.bar_label(bars, fmt='%.1f', fontsize=9)
+    ax2.set_xticks(x, [f'p{q}' for q in PERCENTILES])
     ax2.set_ylabel('Frame Latency (ms)', fontsize=12, fontweight='bold')
-    ax2.set_title('CompassLayer Internal Processing Latency (ms)', fontsize=15, pad=15, fontweight='bold')
-    avg_lat = df['Latency_ms'].mean()
-    ax2.axhline(avg_lat, color='red', linestyle='--', alpha=0.7, label=f'Average: {avg_lat:.1f} ms')
-    ax2.legend(loc='upper right', frameon=True)
-    ax2.set_ylim(0, df['Latency_ms'].max() * 1.2)
-    ax2.margins(x=0)
-
-    sns.lineplot(data=df, x='Time_s', y='Memory_MB', ax=ax3, color=sns.color_palette("crest")[2], linewidth=2.5)
-    
-    ax3.fill_between(df['Time_s'], df['Memory_MB'], color=sns.color_palette("crest")[2], alpha=0.3)
-    
-    ax3.set_xlabel('Time Elapsed (seconds)', fontsize=12, fontweight='bold')
-    ax3.set_ylabel('Allocated RAM (MB)', fontsize=12, fontweight='bold')
-    ax3.set_title('CompassLayer Memory Consumption (MB)', fontsize=15, pad=15, fontweight='bold')
-    ax3.set_ylim(0, df['Memory_MB'].max() * 1.5)
-    ax3.margins(x=0)
-
+    ax2.set_title('Latency Percentiles per Run', fontsize=15, pad=15, fontweight='bold')
+    ax2.legend(loc='upper left', frameon=True)
+    stages = sorted({col for summary in summaries for col in summary['stages']})
+    metrics = stages + ['App_CPU_Percent', 'Memory_MB']
+    x = np.arange(len(metrics))
+    for i, (summary, color) in enumerate(zip(summaries, colors)):
+        present = [col in summary['stages'] if col in stages else col in summary['columns'] for col in metrics]
+        values = [max(float(np.average(summary[col]['mean'])), LOG_FLOOR) if ok else LOG_FLOOR for col, ok in zip(metrics, present)]
+        bars = ax3.bar(x + (i - (len(summaries) - 1) / 2) * width, values, width, color=color, label=summary['name'])
+        for bar, ok in zip(bars, present):
+            if not ok:
+                bar.set_facecolor('none')
+                bar.set_edgecolor(color)
+                bar.set_hatch('//')
+        ax3.bar_label(bars, labels=['' if ok else 'n/a' for ok in present], fontsize=8, color=color)
+    ax3.set_xticks(x, [col.replace('_', ' ') for col in metrics])
+    ax3.set_yscale('log')
+    ax3.set_ylim(bottom=LOG_FLOOR / 10)
+    ax3.set_title('Mean Stage Time (ms), CPU (%) and Memory (MB) per Run', fontsize=15, pad=15, fontweight='bold')
+    ax3.legend(loc='upper left', frameon=True)
     sns.despine(left=True, bottom=True)
-    fig.tight_layout(pad=4.0, h_pad=5.0, w_pad=4.0, rect=[0, 0, 1, 0.93])
-   
-    output_filename = 'performance_graphs.png'
-    plt.savefig(output_filename, dpi=300, bbox_inches='tight')
-    print(f"Graphs successfully generated and saved as '{output_filename}'")
-   
-    plt.show()
+    fig.tight_layout(pad=4.0, h_pad=5.0, w_pad=4.0, rect=[0, 0, 1, 0.95])
+    plt.savefig(output_filename, dpi=dpi, bbox_inches='tight')
+    print(f"Comparison of {len(summaries)} runs saved as '{output_filename}'")
+    for summary in summaries:
+        overall = summary['latency_overall']
+        print(f"  {summary['name']:<24} {summary['rows']:>9} samples  p50 {overall[50]:7.1f} ms  p95 {overall[95]:7.1f} ms  p99 {overall[99]:7.1f} ms")
+    if show:
+        plt.show()
+    plt.close(fig)
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='CompassLayer — performance report from --profile logs')
+    parser.add_argument('csv_files', nargs='*', default=['performance_log.csv'], metavar='CSV', help='One log for a full report, or several to compare runs (default: performance_log.csv).')
+    parser.add_argument('--output', '-o', default=None, metavar='PNG', help='Output image (default: performance_graphs.png, or performance_comparison.png for several logs).')
+    parser.add_argument('--dpi', type=int, default=150, help='Output resolution (default: %(default)s).')
+    parser.add_argument('--max-points', type=int, default=MAX_POINTS, metavar='N', help='Downsample each series to at most N buckets (default: %(default)s).')
+    parser.add_argument('--show', action='store_true', help='Also open an interactive window after saving.')
+    return parser.parse_args()
 if __name__ == '__main__':
-    generate_performance_graphs()
\ No newline at end of file
+    args = parse_args()
+    if not args.show:
+        matplotlib.use('Agg')
+    if len(args.csv_files) > 1:
+        generate_comparison_graphs(args.csv_files, args.output or 'performance_comparison.png', args.dpi, args.max_points, args.show)
+    else:
+        generate_performance_graphs(args.csv_files[0], args.output or 'performance_graphs.png', args.dpi, args.max_points, args.show)
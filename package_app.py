@@ -1,24 +1,38 @@
 import os
+import argparse
 import subprocess
 import sys
 
-def build():
+EXCLUDED_MODULES = ('tkinter', 'matplotlib', 'pandas', 'IPython', 'jupyter_client', 'notebook', 'pytest', 'sympy', 'PyQt5', 'PySide2', 'PySide6')
+CACHE_DIR = os.path.join('build', 'cache')
+
+def precompute_caches(audio_backend: str) -> None:
+    from core.soundbank import SoundBank
+    print('Precomputing sound banks...')
+    for spatializer in (('hrtf', 'pan') if audio_backend == 'pyo' else ('pan',)):
+        SoundBank(spatializer, cache_dir=os.path.join(CACHE_DIR, 'sounds'))
+
+def build(audio_backend: str='pyo', fast_start: bool=False):
     print('Checking for PyInstaller...')
     try:
         import PyInstaller
     except ImportError:
         print('Installing PyInstaller...')
         subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'pyinstaller'])
-    try:
-        import pyo
-    except ImportError:
-        print("Error: 'pyo' is not installed. Please pip install it before building.")
-        sys.exit(1)
-    pyo_path = os.path.dirname(pyo.__file__)
-    print(f'Found pyo at: {pyo_path}')
     entry_point = 'run_live.py'
     sep = os.pathsep
-    data_args = ['--add-data', f'{pyo_path}{sep}pyo']
+    data_args = []
+    if audio_backend == 'pyo':
+        try:
+            import pyo
+        except ImportError:
+            print("Error: 'pyo' is not installed. Please pip install it before building.")
+            sys.exit(1)
+        pyo_path = os.path.dirname(pyo.__file__)
+        print(f'Found pyo at: {pyo_path}')
+        data_args.extend(['--add-data', f'{pyo_path}{sep}pyo'])
+    else:
+        print('Building with the NumPy audio backend (pyo excluded).')
     assets_dir = 'assets'
     if os.path.exists(assets_dir):
         print('Scanning assets folder...')
@@ -35,14 +49,26 @@ def build():
             print(f' -> Adding: {item}')
     else:
         print(f"Warning: Could not find an '{assets_dir}' directory.")
-    hidden_imports = ['--hidden-import', 'pyo', '--hidden-import', 'win32com', '--hidden-import', 'win32com.client', '--hidden-import', 'pythoncom', '--hidden-import', 'pyttsx3', '--hidden-import', 'mss', '--hidden-import', 'keyboard', '--hidden-import', 'cv2']
-    cmd = [sys.executable, '-m', 'PyInstaller', '--onefile', '--name', 'CompassLayer', '--clean'] + data_args + hidden_imports + [entry_point]
+    precompute_caches(audio_backend)
+    data_args.extend(['--add-data', f'{CACHE_DIR}{sep}cache'])
+    backend_imports = ['--hidden-import', 'pyo'] if audio_backend == 'pyo' else ['--hidden-import', 'sounddevice', '--exclude-module', 'pyo']
+    hidden_imports = backend_imports + ['--hidden-import', 'win32com', '--hidden-import', 'win32com.client', '--hidden-import', 'pythoncom', '--hidden-import', 'pyttsx3', '--hidden-import', 'mss', '--hidden-import', 'keyboard', '--hidden-import', 'cv2']
+    excludes = [arg for module in EXCLUDED_MODULES for arg in ('--exclude-module', module)]
+    layout = ['--onedir', '--noupx'] if fast_start else ['--onefile']
+    cmd = [sys.executable, '-m', 'PyInstaller'] + layout + ['--name', 'CompassLayer', '--clean'] + data_args + hidden_imports + excludes + [entry_point]
     print('\nStarting PyInstaller...')
     subprocess.check_call(cmd)
     print('\n' + '=' * 40)
     print('BUILD COMPLETE!')
-    print(f"Your EXE is in the 'dist' folder.")
+    if fast_start:
+        print("Your app is in 'dist/CompassLayer'; ship the whole folder.")
+    else:
+        print(f"Your EXE is in the 'dist' folder.")
     print("Remember to place your 'videos' folder next to the finished EXE!")
     print('=' * 40)
 if __name__ == '__main__':
-    build()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Build the CompassLayer executable')
+    parser.add_argument('--audio-backend', choices=('pyo', 'numpy'), default='pyo', help='Audio engine to bundle (default: pyo).')
+    parser.add_argument('--fast-start', action='store_true', help='Build an unpacked folder (onedir, no UPX) instead of a single EXE, so nothing is extracted to a temp dir on each launch.')
+    args = parser.parse_args()
+    build(args.audio_backend, args.fast_start)
\ No newline at end of file
@@ -1,49 +1,85 @@
-import argparse
 import time
+_PROCESS_START = time.perf_counter()
+import argparse
 import sys
+import threading
 import msvcrt
-import cv2
-import psutil
 import os
-import csv
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
-from config import TARGET_ICONS, MATCH_THRESHOLD, NMS_IOU_THRESHOLD, STRAIGHT_AHEAD_THRESHOLD, COMPASS_WIDTH_RATIO, ROI_HEIGHT_RATIO, BLUR_KSIZE
+from config import TARGET_ICONS, MATCH_THRESHOLD, NMS_IOU_THRESHOLD, ROI_HEIGHT_RATIO, DESIGN_WIDTH, AUDIO_BACKEND, AUDIO_OUTPUT, DETECTOR_PROCESSES, OCR_IN_WORKER, PREVIEW_MODE, PREVIEW_FPS, COMPASS_TRACKING, EVENT_BUS_PORT, CPU_BUDGET_PERCENT, CPU_CORES, CV_THREADS, LOW_PRIORITY, DETECTOR_MODE, LABEL_SCHEDULING, DETECT_BUDGET_MS, BLUR_KSIZE, SCALE_FACTORS, PROCESSING_SCALE, AUTOTUNE
 import keyboard
 
-COMPASS_X_START = 0.5 - COMPASS_WIDTH_RATIO / 2
-COMPASS_X_END = 0.5 + COMPASS_WIDTH_RATIO / 2
-
 from core.screen import ScreenCapturer
-from core.detector import IconDetector
-from core.ocr_engine import OCREngine
-from utils.visualizer import Visualizer
-from core.audiofeedback import NavigationController, from_algo_batch
+from core.pipeline import DetectionPipeline, best_per_type
+from core.audiofeedback import NavigationController, TTSEngine, from_algo_batch
 from core.settings import SettingsMenu
 from core import i18n
 
-class PerformanceProfiler:
-    def __init__(self, log_file="performance_log.csv"):
-        self.log_file = log_file
-        self.process = psutil.Process(os.getpid())
-        self.data = []
-        self.start_time = time.perf_counter()
-        self.process.cpu_percent()
-        psutil.cpu_percent()
+class StartupTimer:
+
+    def __init__(self, start: float):
+        self.start = start
+        self.phases: Dict[str, float] = {}
+        self.milestones: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, name: str, since: float=None) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            if since is None:
+                self.milestones[name] = now - self.start
+            else:
+                self.phases[name] = now - since
 
-    def log_cycle(self, latency_seconds):
-        current_time = time.perf_counter() - self.start_time
-        app_cpu = self.process.cpu_percent()
-        sys_cpu = psutil.cpu_percent()
-        memory_mb = self.process.memory_info().rss / (1024 * 1024)
-        latency_ms = latency_seconds * 1000
-        self.data.append([current_time, app_cpu, sys_cpu, memory_mb, latency_ms])
+    def report(self) -> str:
+        phases = '  '.join(f'{name} {seconds * 1000:.0f}' for name, seconds in self.phases.items())
+        milestones = '  '.join(f'{name} @{seconds * 1000:.0f}' for name, seconds in self.milestones.items())
+        return f'Startup (ms): {phases}  |  {milestones}'
 
-    def save(self):
-        with open(self.log_file, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(["Time_s", "App_CPU_Percent", "Sys_CPU_Percent", "Memory_MB", "Latency_ms"])
-            writer.writerows(self.data)
-        print(f"\n[+] Performance data saved to {self.log_file}")
+    def run(self, name: str, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.mark(name, start)
+
+def _init_detection(args: argparse.Namespace, screen_info: Dict[str, int], threshold: float, resources):
+    if args.detector_procs > 0:
+        from core.workers import DetectorOffload
+        print('Starting detector worker processes...')
+        processes = min(args.detector_procs, resources.core_count)
+        return (None, DetectorOffload(TARGET_ICONS, screen_info, scale=screen_info['width'] / DESIGN_WIDTH, processes=processes, with_ocr=args.ocr_in_worker, match_threshold=threshold, nms_iou_threshold=NMS_IOU_THRESHOLD, cv_threads=resources.worker_cv_threads(processes), mode=args.detector, scale_factors=args.scales, processing_scale=args.processing_scale))
+    if args.detector == 'proposal':
+        from core.proposals import ProposalDetector as IconDetector
+    else:
+        from core.detector import IconDetector
+    print('Initialising icon detector...')
+    resources.limit_cv_threads()
+    return (IconDetector(target_icons=TARGET_ICONS, match_threshold=threshold, nms_iou_threshold=NMS_IOU_THRESHOLD, scale_factors=args.scales, processing_scale=args.processing_scale), None)
+
+def _autotune(args: argparse.Namespace, screen_info: Dict[str, int], threshold: float, resources) -> Dict[str, Any]:
+    from core.autotune import DetectorAutotuner
+    tuner = DetectorAutotuner(screen_info, resources.core_count, threshold=threshold)
+    profile = None if args.retune else tuner.load()
+    if profile is None:
+        print('Autotuning the detector for this machine (first launch at this resolution, up to a minute)...')
+        profile = tuner.tune()
+        tuner.save(profile)
+    elif profile['settings']:
+        print(f"  [+] Autotuned detector: {profile['ms_per_frame']:.1f} ms/frame with {profile['settings']} (re-run with --autotune)")
+    return profile
+
+def _init_ocr():
+    from core.ocr_engine import OCREngine
+    print('Initialising OCR engine...')
+    return OCREngine()
+
+def _init_preview(args: argparse.Namespace):
+    from utils.visualizer import Visualizer, Preview
+    print('Initialising visualiser...')
+    return Preview(Visualizer(), max_fps=args.preview_fps, video_path=args.preview_file if args.preview == 'video' else None)
 
 class C:
     RESET = '\x1b[0m'
@@ -59,13 +95,37 @@ def _ansi(text: str, *codes: str) -> str:
 
 BANNER = f'\n{C.CYAN}{C.BOLD}╔══════════════════════════════════════════╗\n║    CompassLayer  •  Live Test Mode     ║\n╚══════════════════════════════════════════╝{C.RESET}\n'
 
-def parse_args() -> argparse.Namespace:
+def parse_args(defaults: Dict[str, Any]=None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description='CompassLayer — real-time screen-capture test runner')
     parser.add_argument('--monitor', type=int, default=1, metavar='N', help='Monitor index to capture (default: 1). Use 0 for primary.')
     parser.add_argument('--threshold', type=float, default=None, metavar='T', help=f'Override icon match threshold (default: {MATCH_THRESHOLD})')
     parser.add_argument('--verbose', '-v', action='store_true', help='Print detections every frame instead of only when icons are found.')
     parser.add_argument('--no-audio', action='store_true', help='Disable audio feedback (visual/console debug only).')
-    parser.add_argument('--profile', action='store_true', help='Enable performance logging to CSV (CPU, Memory, Latency).')
+    parser.add_argument('--profile', action='store_true', help='Enable performance logging: per-stage CSV, latency percentiles and a Chrome trace of the last spans.')
+    parser.add_argument('--detector', choices=('template', 'proposal'), default=DETECTOR_MODE, help='Icon detector: full multi-scale template matching, or cheap edge-contour candidates classified against every template (default: %(default)s).')
+    parser.add_argument('--scales', type=lambda value: tuple((float(scale) for scale in value.split(','))), default=SCALE_FACTORS, metavar='LIST', help='Comma-separated template scale factors to search, e.g. 0.9,1,1.1 (default: SCALE_FACTORS).')
+    parser.add_argument('--blur', type=int, default=BLUR_KSIZE[0], metavar='K', help='Gaussian blur kernel applied before matching unmasked templates; 0 disables (default: %(default)s).')
+    parser.add_argument('--processing-scale', type=float, default=PROCESSING_SCALE, metavar='R', help='Match on frames downscaled by R, e.g. 0.5 on 4K/8K monitors (default: %(default)s).')
+    parser.add_argument('--autotune', dest='retune', action='store_true', help='Re-run the detector autotuner for this machine and monitor, replacing the saved profile.')
+    parser.add_argument('--no-autotune', dest='autotune', action='store_false', default=AUTOTUNE, help='Ignore the saved autotune profile and never tune automatically; use config.py and command-line settings only.')
+    parser.add_argument('--detector-procs', type=int, default=DETECTOR_PROCESSES, metavar='N', help='Run template matching in N worker processes over shared memory, splitting labels between them (default: %(default)s, in-process).')
+    parser.add_argument('--ocr-in-worker', action='store_true', default=OCR_IN_WORKER, help='With --detector-procs, also run OCR in its own worker process.')
+    parser.add_argument('--no-tracking', dest='tracking', action='store_false', default=COMPASS_TRACKING, help='Re-run full template matching on every frame instead of tracking the compass shift between detections.')
+    parser.add_argument('--no-scheduling', dest='scheduling', action='store_false', default=LABEL_SCHEDULING, help='Match every icon type on every frame instead of refreshing secondary icons round-robin by priority (TARGET_ICONS priority/refresh).')
+    parser.add_argument('--detect-budget', type=float, default=DETECT_BUDGET_MS, metavar='MS', help='Per-frame time for secondary icons on top of main_quest; due icons that do not fit are deferred by priority and keep their last result. 0 sizes it to the slowest secondary icon, a negative value disables it (default: %(default)s).')
+    parser.add_argument('--record', metavar='DIR', default=None, help='Append every frame\'s detected icons to a columnar detection log in DIR (replay with utils/replay.py).')
+    parser.add_argument('--publish', type=int, nargs='?', const=EVENT_BUS_PORT, default=None, metavar='PORT', help=f'Publish detected icons and audio events to local subscribers over UDP on 127.0.0.1 (default port: {EVENT_BUS_PORT}; try utils/bus_listen.py).')
+    parser.add_argument('--cpu-budget', type=float, default=CPU_BUDGET_PERCENT, metavar='PCT', help='Throttle capture so CompassLayer (workers included) stays under PCT percent of total CPU; 0 disables (default: %(default)s). Adjustable from the settings menu.')
+    parser.add_argument('--cpu-cores', type=lambda value: tuple((int(core) for core in value.split(','))), default=CPU_CORES, metavar='LIST', help='Comma-separated CPU cores to pin CompassLayer and its workers to, e.g. 6,7 (default: all cores).')
+    parser.add_argument('--cv-threads', type=int, default=CV_THREADS, metavar='N', help='Cap on OpenCV worker threads; 0 keeps the OpenCV default (default: %(default)s).')
+    parser.add_argument('--normal-priority', dest='low_priority', action='store_false', default=LOW_PRIORITY, help='Keep normal process priority instead of running below the game.')
+    parser.add_argument('--audio-backend', choices=('pyo', 'numpy'), default=AUDIO_BACKEND, help=f'Audio engine: pyo HRTF server or the lightweight NumPy mixer (default: {AUDIO_BACKEND}).')
+    parser.add_argument('--audio-output', default=AUDIO_OUTPUT, metavar='DEV', help="NumPy backend output: 'auto', 'sounddevice', 'null' or a .wav path (default: %(default)s).")
+    parser.add_argument('--preview', choices=('window', 'video', 'off'), default='off' if getattr(sys, 'frozen', False) else PREVIEW_MODE, help='Debug preview: OpenCV window, background video file, or off for headless runs (default: %(default)s).')
+    parser.add_argument('--preview-fps', type=float, default=PREVIEW_FPS, metavar='FPS', help='Maximum preview refresh rate (default: %(default)s).')
+    parser.add_argument('--preview-file', default='preview.mp4', metavar='PATH', help='Output path for --preview video (default: %(default)s).')
+    if defaults:
+        parser.set_defaults(**defaults)
     return parser.parse_args()
 
 def format_detection(det: Dict[str, Any]) -> str:
@@ -84,6 +144,8 @@ def format_detection(det: Dict[str, Any]) -> str:
     return f'  {_ansi(label, C.BOLD):<18} {bar_str}  {_ansi(direction, dir_color):<10} offset={offset:+.3f}  dist={dist}'
 
 def main() -> None:
+    startup = StartupTimer(_PROCESS_START)
+    startup.mark('imported')
     args = parse_args()
     try:
         import os
@@ -95,31 +157,46 @@ def main() -> None:
     verbose: bool = args.verbose
     print(_ansi(f'  Monitor index : {args.monitor}', C.DIM))
     print(_ansi(f'  Match threshold : {threshold}', C.DIM))
-    print(_ansi(f'  Audio enabled : {not args.no_audio}', C.DIM))
+    print(_ansi(f'  Audio enabled : {not args.no_audio} ({args.audio_backend})', C.DIM))
     print(_ansi(f'  Verbose mode  : {verbose}', C.DIM))
     print(_ansi(f'  Profiling     : {args.profile}', C.DIM))
+    print(_ansi(f'  Preview       : {args.preview}', C.DIM))
+    print(_ansi(f"  CPU budget    : {f'{args.cpu_budget:g}%' if args.cpu_budget > 0 else 'off'}", C.DIM))
     print()
+    from core.resources import ResourceManager
+    resources = ResourceManager(args.cpu_budget, args.cpu_cores, args.cv_threads, args.low_priority)
+    resources.apply()
     print('Initialising screen capturer...')
-    screen_capturer = ScreenCapturer(roi_height_ratio=ROI_HEIGHT_RATIO, monitor_idx=args.monitor)
+    screen_capturer = startup.run('screen', ScreenCapturer, roi_height_ratio=ROI_HEIGHT_RATIO, monitor_idx=args.monitor)
     screen_info = screen_capturer.get_screen_info()
     print(f"  Capture area : {screen_info['width']}×{screen_info['capture_height']} px  (top {ROI_HEIGHT_RATIO * 100:.0f}% of {screen_info['width']}×{screen_info['height']})")
-    print('Initialising icon detector...')
-    detector = IconDetector(target_icons=TARGET_ICONS, match_threshold=threshold, nms_iou_threshold=NMS_IOU_THRESHOLD)
-    print('Initialising OCR engine...')
-    ocr_engine = OCREngine()
-    print('Initialising visualiser...')
-    visualizer = Visualizer()
-   
+    if args.autotune or args.retune:
+        profile = startup.run('autotune', _autotune, args, screen_info, threshold, resources)
+        if profile['settings']:
+            args = parse_args(profile['settings'])
+            resources.cv_threads = args.cv_threads
+    with ThreadPoolExecutor(max_workers=3, thread_name_prefix='compasslayer-init') as pool:
+        detection_future = pool.submit(startup.run, 'detector', _init_detection, args, screen_info, threshold, resources)
+        ocr_future = pool.submit(startup.run, 'ocr', _init_ocr) if args.detector_procs <= 0 or not args.ocr_in_worker else None
+        preview_future = pool.submit(startup.run, 'preview', _init_preview, args) if args.preview != 'off' else None
+        controller: NavigationController | None = None
+        if not args.no_audio:
+            print('Initialising audio controller...')
+            controller = startup.run('audio', NavigationController, backend=args.audio_backend, output_device=args.audio_output)
+        detector, offload = detection_future.result()
+        ocr_engine = ocr_future.result() if ocr_future is not None else None
+        preview = preview_future.result() if preview_future is not None else None
+    startup.mark('initialised')
+
     profiler = None
     if args.profile:
+        from core.profiler import PerformanceProfiler
         print('Initialising performance profiler...')
-
-    controller: NavigationController | None = None
-    if not args.no_audio:
-        print('Initialising audio controller...')
-        controller = NavigationController()
-        print(_ansi('  [+] TTS engine ready (win32com / SAPI5)', C.DIM))
-        controller.audio.tts.speak(i18n.get_text('startup_msg'))
+        profiler = PerformanceProfiler()
+        if detector is not None:
+            detector.profiler = profiler
+        if preview is not None:
+            preview.profiler = profiler
     print()
     print(_ansi('  All systems ready.  Switch to the game window now.', C.BOLD))
     print(_ansi('  Global Hotkeys:', C.CYAN))
@@ -133,14 +210,15 @@ def main() -> None:
     request_quit = False
     request_help = False
     request_settings = False
-    settings_menu = SettingsMenu()
+    settings_menu = SettingsMenu(cpu_budget=args.cpu_budget)
 
     def _apply_settings():
+        resources.cpu_budget = settings_menu.cpu_budget
         if controller:
             i18n.set_lang(settings_menu.language_code)
             controller.audio.tts.tts_volume = settings_menu.tts_volume
             controller.audio.tts.tts_rate = settings_menu.tts_speed
-            controller.audio.pulse_rate_multiplier = settings_menu.pulse_rate
+            controller.core.pulse_rate_multiplier = settings_menu.pulse_rate
             controller.audio.ping_volume_multiplier = settings_menu.ping_volume
 
     def on_help():
@@ -161,23 +239,23 @@ def main() -> None:
 
     def on_up():
         if settings_menu.active and controller:
-            controller.audio.tts.speak(settings_menu.prev_item().announce())
+            controller.audio.tts.speak(settings_menu.prev_item().announce(), priority=TTSEngine.PRIORITY_MENU, category='menu_item')
             
     def on_down():
         if settings_menu.active and controller:
-            controller.audio.tts.speak(settings_menu.next_item().announce())
+            controller.audio.tts.speak(settings_menu.next_item().announce(), priority=TTSEngine.PRIORITY_MENU, category='menu_item')
             
     def on_left():
         if settings_menu.active and controller:
             settings_menu.current.decrease()
             _apply_settings()
-            controller.audio.tts.speak(str(settings_menu.current.value))
+            controller.audio.tts.speak(str(settings_menu.current.value), priority=TTSEngine.PRIORITY_MENU, category='menu_item')
             
     def on_right():
         if settings_menu.active and controller:
             settings_menu.current.increase()
             _apply_settings()
-            controller.audio.tts.speak(str(settings_menu.current.value))
+            controller.audio.tts.speak(str(settings_menu.current.value), priority=TTSEngine.PRIORITY_MENU, category='menu_item')
        
     keyboard.add_hotkey('f6', on_help)
     keyboard.add_hotkey('f7', on_settings)
@@ -190,69 +268,89 @@ def main() -> None:
     frame_count = 0
     fps_timer = time.perf_counter()
     fps_display = 0.0
+    output_list: List[Dict[str, Any]] = []
+    tracker = None
+    if args.tracking and detector is not None:
+        from core.tracker import CompassTracker
+        tracker = CompassTracker(detector, screen_info, blur_ksize=(args.blur, args.blur) if args.blur else None)
+    scheduler = None
+    if args.scheduling and detector is not None:
+        from core.scheduler import LabelScheduler
+        scheduler = LabelScheduler(detector, TARGET_ICONS, budget_ms=args.detect_budget)
+    pipeline = DetectionPipeline(screen_capturer, detector, ocr_engine, screen_info, offload=offload, profiler=profiler, tracker=tracker, scheduler=scheduler, blur_ksize=(args.blur, args.blur) if args.blur else None)
+    recorder = None
+    if args.record:
+        from core.eventlog import DetectionLogWriter
+        recorder = DetectionLogWriter(args.record, meta={'started': time.time(), 'screen': screen_info, 'threshold': threshold})
+        print(_ansi(f'  Recording detections to {args.record}', C.DIM))
+    bus = None
+    if args.publish is not None:
+        from core.eventbus import EventBus
+        bus = EventBus(args.publish)
+        if controller:
+            controller.core.sink = bus.tap(controller.core.sink)
+        print(_ansi(f'  Publishing events on 127.0.0.1:{args.publish}', C.DIM))
+    pipeline.start()
+    resources.start(pipeline)
+    ready = False
    
     try:
         while True:
-            loop_start = time.perf_counter()
-           
-            frame_count += 1
-            frame_bgr = screen_capturer.get_frame()
-            detections = detector.detect(frame_bgr, screen_width=screen_info['width'], screen_height=screen_info['height'], normalize_fn=screen_capturer.normalize_coord, use_laplacian=True, blur_ksize=BLUR_KSIZE)
-            output_list: List[Dict[str, Any]] = []
-           
-            for det in detections:
-                icon_x_rel = det['x_rel']
-                icon_y_rel = det['y_rel']
-                icon_w_rel = det['w_rel']
-                icon_h_rel = det['h_rel']
-                relative_offset = (icon_x_rel - 0.5) / COMPASS_WIDTH_RATIO
-                det['rel_offset'] = relative_offset
-                if not COMPASS_X_START <= icon_x_rel <= COMPASS_X_END:
-                    if verbose:
-                        print(_ansi(f"  [Ignore] {det['label']} outside compass (x_rel={icon_x_rel:.3f})", C.DIM))
-                    continue
-                if abs(relative_offset) < STRAIGHT_AHEAD_THRESHOLD:
-                    direction = 'Straight'
-                elif relative_offset < 0:
-                    direction = 'Left'
-                else:
-                    direction = 'Right'
-                det['direction'] = direction
-                if abs(relative_offset) < 0.1:
-                    dist_text = ocr_engine.extract_distance(frame_bgr, icon_x_rel, icon_y_rel, icon_w_rel, icon_h_rel, screen_info['width'], screen_info['height'])
-                else:
-                    dist_text = 'N/A'
-                det['distance'] = dist_text
-                output_list.append({'id': det['id'], 'label': det['label'], 'rel_offset': round(relative_offset, 3), 'direction': direction, 'distance': dist_text, 'score': det['score']})
-               
-            if controller and not settings_menu.active:
-                if output_list:
-                    best_per_type = {}
-                    for item in output_list:
-                        lbl = item['label']
-                        if lbl not in best_per_type or item['score'] > best_per_type[lbl]['score']:
-                            best_per_type[lbl] = item
-                    nav_icons = from_algo_batch(list(best_per_type.values()))
-                else:
-                    nav_icons = []
-                controller.update(nav_icons)
-               
-            if verbose:
-                if output_list:
-                    header = _ansi(f'[Frame {frame_count:>6}]  {len(output_list)} icon(s) detected  |  {fps_display:.1f} FPS', C.CYAN)
-                    print(header)
-                    for item in output_list:
-                        print(format_detection(item))
-                else:
-                    print(_ansi(f'[Frame {frame_count:>6}]  — no detections —  {fps_display:.1f} FPS', C.DIM))
+            packet = pipeline.get(timeout=0.05)
+            if packet is not None:
+                frame_count += 1
+                if not ready:
+                    ready = True
+                    startup.mark('first_frame')
+                    if controller:
+                        controller.audio.play_ready_cue()
+                        controller.audio.tts.speak(i18n.get_text('startup_msg'), category='help')
+                    if args.profile:
+                        print(_ansi(f'  {startup.report()}', C.DIM))
+                output_list = packet.output_list
+                if verbose:
+                    for label, x_rel in packet.ignored:
+                        print(_ansi(f'  [Ignore] {label} outside compass (x_rel={x_rel:.3f})', C.DIM))
                    
-            if frame_count % 30 == 0:
-                elapsed = time.perf_counter() - fps_timer
-                fps_display = 30 / elapsed if elapsed > 0 else 0.0
-                fps_timer = time.perf_counter()
-               
-            frame_vis = visualizer.draw_detections(frame_bgr, detections, screen_width=screen_info['width'], screen_height=screen_info['height'])
-            visualizer.show(frame_vis)
+                best = best_per_type(output_list) if output_list else []
+                nav_icons = from_algo_batch(best) if best else []
+                if controller and not settings_menu.active:
+                    span_start = time.perf_counter()
+                    controller.update(nav_icons)
+                    span_end = time.perf_counter()
+                    packet.spans['controller'] = span_end - span_start
+                    if profiler:
+                        profiler.record('controller', span_start, span_end, packet.seq)
+                if recorder is not None:
+                    recorder.append(packet.t_capture, nav_icons, [item['score'] for item in best])
+                if bus is not None:
+                    bus.publish_icons(packet.t_capture, nav_icons)
+                   
+                if verbose:
+                    if output_list:
+                        header = _ansi(f'[Frame {frame_count:>6}]  {len(output_list)} icon(s) detected  |  {fps_display:.1f} FPS  |  {packet.latency * 1000:.0f} ms', C.CYAN)
+                        print(header)
+                        for item in output_list:
+                            print(format_detection(item))
+                    else:
+                        print(_ansi(f'[Frame {frame_count:>6}]  — no detections —  {fps_display:.1f} FPS', C.DIM))
+                       
+                if frame_count % 30 == 0:
+                    elapsed = time.perf_counter() - fps_timer
+                    fps_display = 30 / elapsed if elapsed > 0 else 0.0
+                    fps_timer = time.perf_counter()
+                   
+                if preview is not None:
+                    span_start = time.perf_counter()
+                    preview.submit(packet.frame, packet.detections, screen_info['width'], screen_info['height'])
+                    span_end = time.perf_counter()
+                    packet.spans['preview'] = span_end - span_start
+                    if profiler:
+                        profiler.record('preview', span_start, span_end, packet.seq)
+                pipeline.release(packet)
+
+                if profiler:
+                    profiler.log_cycle(time.perf_counter() - packet.t_capture, packet.spans, packet.allocations)
            
             if request_quit:
                 break
@@ -268,17 +366,18 @@ def main() -> None:
                     print(_ansi('\n  [SETTINGS] Menu opened', C.CYAN))
                     if controller:
                         controller.stop()
-                        controller.audio.tts.speak(i18n.get_text('menu_opened'))
-                        controller.audio.tts.speak(settings_menu.current.announce())
+                        controller.audio.tts.discard(TTSEngine.PRIORITY_INFO)
+                        controller.audio.tts.speak(i18n.get_text('menu_opened'), priority=TTSEngine.PRIORITY_MENU, category='menu_state')
+                        controller.audio.tts.speak(settings_menu.current.announce(), priority=TTSEngine.PRIORITY_MENU, category='menu_item')
                 else:
                     print(_ansi('\n  [SETTINGS] Menu closed', C.CYAN))
                     if controller:
-                        controller.audio.tts.speak(i18n.get_text('menu_closed'))
+                        controller.audio.tts.speak(i18n.get_text('menu_closed'), priority=TTSEngine.PRIORITY_MENU, category='menu_state')
                 request_settings = False
             if request_help:
                 print(_ansi('\n  [HELP] Global hotkey triggered...', C.CYAN))
                 if controller:
-                    controller.audio.tts.speak(i18n.get_text('help_controls'))
+                    controller.audio.tts.speak(i18n.get_text('help_controls'), category='help')
                 request_help = False
                
             if msvcrt.kbhit():
@@ -295,27 +394,63 @@ def main() -> None:
                     state = 'ON' if verbose else 'OFF'
                     print(_ansi(f'  [V] Verbose mode {state}', C.DIM))
 
-            if profiler:
-                profiler.log_cycle(time.perf_counter() - loop_start)
-
     except KeyboardInterrupt:
         pass
     except Exception as exc:
         print(_ansi(f'\nERROR: {exc}', C.RED), file=sys.stderr)
         raise
     finally:
-        cv2.destroyAllWindows()
+        resources.stop()
+        pipeline.stop()
+        if offload is not None:
+            offload.close()
+        if preview is not None:
+            preview.close()
+        if bus is not None:
+            bus.close()
+            print(_ansi(f'  Event bus: {bus.sent} datagrams sent, {bus.dropped} dropped ({bus.overflowed} queue overflows, {bus.encode_errors} unencodable)', C.DIM))
+        if recorder is not None:
+            recorder.close()
+            print(_ansi(f'  Detection log: {recorder.frames} frames, {recorder.rows} icons saved to {args.record}', C.DIM))
         if controller:
-            controller.audio.tts.speak('Arret du programme.')
+            controller.audio.tts.stop()
+            controller.audio.tts.speak('Arret du programme.', priority=TTSEngine.PRIORITY_ALERT)
             time.sleep(1.5)
             controller.stop()
 
         if profiler:
             profiler.save()
+            print(_ansi(f"  {'span':<28}{'count':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)", C.DIM))
+            for name, span in sorted(profiler.summary().items()):
+                print(_ansi(f"  {name:<28}{span['count']:>8}{span['p50_ms']:>9.2f}{span['p95_ms']:>9.2f}{span['p99_ms']:>9.2f}{span['max_ms']:>9.2f}", C.DIM))
+            steady = profiler.frames - profiler.last_allocating_frame
+            print(_ansi(f'  Buffer pool: {profiler.allocations} allocations in {profiler.frames} frames, none in the last {steady} frames ({profiler.allocations / max(1, profiler.frames):.3f} per frame)', C.DIM))
+        if args.profile:
+            pipe_stats = pipeline.stats()
+            print(_ansi(f"  Pipeline: {pipe_stats['delivered']} frames, glass latency mean {pipe_stats['latency_ms_mean']:.1f} ms / max {pipe_stats['latency_ms_max']:.1f} ms, {pipe_stats['dropped']} stale frames dropped", C.DIM))
+            for stage in ('capture', 'detect', 'ocr'):
+                print(_ansi(f"    {stage:<8} {pipe_stats[stage]['busy_ms_mean']:6.1f} ms/frame  ({pipe_stats[stage]['superseded']} superseded before use)", C.DIM))
+            res_stats = resources.stats()
+            budget = f"{res_stats['budget']:g}% budget" if res_stats['budget'] > 0 else 'no budget'
+            capture = f"{res_stats['capture_fps']:.1f} FPS" if res_stats['capture_fps'] else 'an uncapped rate'
+            print(_ansi(f"  CPU: {res_stats['overhead_mean']:.1f}% mean / {res_stats['overhead_max']:.1f}% max of the machine ({budget}), capture ended at {capture}", C.DIM))
+            if tracker is not None:
+                track_stats = tracker.stats()
+                print(_ansi(f"  Compass tracking: {track_stats['tracked']} frames tracked, {track_stats['full_detects']} full detections ({track_stats['tracked_ratio'] * 100:.0f}% tracked), {track_stats['lost']} lost confirmations, {track_stats['appeared']} new icons", C.DIM))
+            if scheduler is not None:
+                sched_stats = scheduler.stats()
+                budget = f"the {sched_stats['budget_ms']:.1f} ms budget" if sched_stats['budget_ms'] is not None else 'no budget'
+                print(_ansi(f"  Label scheduling: {sched_stats['frames']} detections, {sched_stats['over_budget']} over {budget}", C.DIM))
+                for label, label_stats in sched_stats['labels'].items():
+                    print(_ansi(f"    {label:<12} {label_stats['runs']:>6} runs  {label_stats['deferred']:>6} deferred  {label_stats['cost_ms']:6.2f} ms", C.DIM))
+        if args.profile and controller:
+            tts_stats = controller.audio.tts.metrics()
+            print(_ansi(f"  TTS queue: max depth {tts_stats['max_depth']}, mean wait {tts_stats['wait_ms_mean']:.0f} ms, max wait {tts_stats['wait_ms_max']:.0f} ms, coalesced {tts_stats['coalesced']}, preempted {tts_stats['preempted']}", C.DIM))
        
         print('\n  Shutdown complete.')
         print(_ansi(f'\nSession ended. Total frames processed: {frame_count}', C.DIM))
         print(_ansi('All resources released.', C.GREEN))
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import EVENT_BUS_PORT
+from core.eventbus import BusSubscriber
+
+def _describe(message) -> str:
+    if message.kind == 'frame':
+        icons = '  '.join(f"{icon.icon_type}:{icon.direction}:{'?' if icon.distance_m is None else f'{icon.distance_m:.0f}m'}" for icon in message.icons)
+        return f'frame  {icons or "—"}'
+    event = message.event
+    detail = event.text or event.sound
+    return f'{event.kind:<6} {detail}' + (f' ({event.pitch})' if event.kind == 'pulse' else '')
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='CompassLayer — stand-in event bus subscriber (prints what run_live --publish sends)')
+    parser.add_argument('--port', type=int, default=EVENT_BUS_PORT, help='Publisher port (default: %(default)s).')
+    parser.add_argument('--duration', type=float, default=0.0, help='Stop after this many seconds (default: run until Ctrl+C).')
+    parser.add_argument('--slow', type=float, default=0.0, metavar='MS', help='Sleep MS after every message to act as a slow consumer.')
+    parser.add_argument('--quiet', action='store_true', help='Only print the totals on exit.')
+    return parser.parse_args()
+if __name__ == '__main__':
+    args = parse_args()
+    subscriber = BusSubscriber(args.port)
+    counts = Counter()
+    latency_total = 0.0
+    start = time.perf_counter()
+    print(f'  [+] Subscribed to 127.0.0.1:{args.port}')
+    try:
+        while not args.duration or time.perf_counter() - start < args.duration:
+            message = subscriber.receive(timeout=0.5)
+            if message is None:
+                continue
+            counts[message.kind] += 1
+            latency_total += time.time() - message.time
+            if not args.quiet:
+                print(f'  {message.seq:>8}  {time.strftime("%H:%M:%S", time.localtime(message.time))}  {_describe(message)}')
+            if args.slow:
+                time.sleep(args.slow / 1000.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        subscriber.close()
+    mean_age = latency_total / subscriber.received * 1000.0 if subscriber.received else 0.0
+    print(f"  [+] Received {counts['frame']} frames and {counts['event']} events, missed {subscriber.missed}, mean age on receipt {mean_age:.1f} ms")
@@ -1,7 +1,10 @@
 import cv2
 import numpy as np
 import os
+import sys
 import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.proposals import edge_contours
 
 def process_icon(input_path: str, output_path: str=None) -> None:
     if not os.path.exists(input_path):
@@ -13,10 +16,7 @@ def process_icon(input_path: str, output_path: str=None) -> None:
         return
     gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
     _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    edges = cv2.Canny(gray, 50, 150)
-    kernel = np.ones((3, 3), np.uint8)
-    closed = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel)
-    contours, _ = cv2.findContours(closed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    contours = edge_contours(gray)
     if not contours:
         print('未检测到任何有效的图标轮廓。')
         return
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import AUDIO_BACKEND, AUDIO_OUTPUT
+from core.eventlog import DetectionLog
+from core.audiofeedback import NavigationCore, RecordingSink
+
+def replay_summary(log: DetectionLog, pulse_rate: float=1.0) -> None:
+    sink = RecordingSink()
+    core = NavigationCore(sink)
+    core.pulse_rate_multiplier = pulse_rate
+    start = time.perf_counter()
+    t = 0.0
+    for t, icons in log:
+        core.update(icons, t)
+    core.advance(t)
+    elapsed = time.perf_counter() - start
+    counts = Counter((event.kind, event.sound or event.category or '') for event in sink.events)
+    print(f'  [+] Replayed {len(log)} frames ({log.duration:.1f} s of session) in {elapsed * 1000:.0f} ms')
+    for (kind, name), count in sorted(counts.items()):
+        print(f'    {kind:<8} {name:<14} {count:>6}')
+
+def replay_offline(log: DetectionLog, output_path: str, pulse_rate: float=1.0) -> None:
+    from core.offline_audio import OfflineNavigationController
+    t0 = float(log.frames['time'][0]) if len(log) else 0.0
+    controller = OfflineNavigationController(log.duration + 1.0, output_path=output_path)
+    controller.core.pulse_rate_multiplier = pulse_rate
+    start = time.perf_counter()
+    try:
+        for t, icons in log:
+            controller.update(icons, t - t0)
+        controller.advance(log.duration)
+        controller.export(output_path)
+    finally:
+        controller.close()
+    print(f'  [+] Rendered {log.duration:.1f} s of session to {output_path} in {time.perf_counter() - start:.1f} s')
+
+def replay_live(log: DetectionLog, speed: float, backend: str, output_device: str, pulse_rate: float=1.0) -> None:
+    from core.audiofeedback import NavigationController
+    controller = NavigationController(backend=backend, output_device=output_device)
+    controller.core.pulse_rate_multiplier = pulse_rate
+    t0 = float(log.frames['time'][0]) if len(log) else 0.0
+    start = time.perf_counter()
+    try:
+        for t, icons in log:
+            delay = (t - t0) / speed - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            controller.update(icons)
+        time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        controller.stop()
+        controller.audio.tts.stop()
+        controller.audio.shutdown()
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='CompassLayer — re-drive the audio controllers from a run_live --record log')
+    parser.add_argument('log', help='Detection log directory written by run_live --record.')
+    parser.add_argument('--mode', choices=('summary', 'offline', 'live'), default='summary', help='summary: count emitted events instantly; offline: render a WAV; live: play through the audio backend (default: %(default)s).')
+    parser.add_argument('--output', default='replay.wav', help='WAV path for --mode offline (default: %(default)s).')
+    parser.add_argument('--speed', type=float, default=1.0, help='Playback speed for --mode live (default: %(default)s).')
+    parser.add_argument('--pulse-rate', type=float, default=1.0, help='Pulse rate multiplier to audition (default: %(default)s).')
+    parser.add_argument('--audio-backend', choices=('pyo', 'numpy'), default=AUDIO_BACKEND)
+    parser.add_argument('--audio-output', default=AUDIO_OUTPUT)
+    return parser.parse_args()
+if __name__ == '__main__':
+    args = parse_args()
+    log = DetectionLog(args.log)
+    if args.mode == 'offline':
+        replay_offline(log, args.output, args.pulse_rate)
+    elif args.mode == 'live':
+        replay_live(log, args.speed, args.audio_backend, args.audio_output, args.pulse_rate)
+    else:
+        replay_summary(log, args.pulse_rate)
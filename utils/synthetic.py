@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import time
+import threading
+import cv2
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import TARGET_ICONS, DESIGN_WIDTH, ROI_HEIGHT_RATIO
+
+@dataclass
+class IconTrack:
+    label: str
+    keyframes: List[Tuple[float, float, float]]
+    appear: float = 0.0
+    disappear: float = float('inf')
+
+    def state(self, t: float) -> Optional[Tuple[float, float]]:
+        if not self.appear <= t < self.disappear:
+            return None
+        times = [k[0] for k in self.keyframes]
+        x_rel = float(np.interp(t, times, [k[1] for k in self.keyframes]))
+        distance = float(np.interp(t, times, [k[2] for k in self.keyframes]))
+        return (x_rel, distance)
+
+@dataclass
+class Scenario:
+    duration: float
+    tracks: List[IconTrack] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: str) -> 'Scenario':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['duration'], [IconTrack(t['label'], [tuple(k) for k in t['keyframes']], t.get('appear', 0.0), t.get('disappear', float('inf'))) for t in data['tracks']])
+
+    def shifted(self, offset: float) -> 'Scenario':
+        return Scenario(self.duration + offset, [IconTrack(t.label, [(k[0] + offset, k[1], k[2]) for k in t.keyframes], t.appear + offset, t.disappear + offset) for t in self.tracks])
+
+    def icons_at(self, t: float) -> List[Tuple[str, float, float]]:
+        icons = []
+        for track in self.tracks:
+            state = track.state(t)
+            if state is not None:
+                icons.append((track.label,) + state)
+        return icons
+
+SCENARIOS: Dict[str, Scenario] = {'approach': Scenario(8.0, [IconTrack('main_quest', [(0.5, 0.62, 40.0), (3.0, 0.5, 22.0), (7.0, 0.5, 3.0)], appear=0.5), IconTrack('treasure', [(1.0, 0.475, 35.0), (7.0, 0.468, 3.0)], appear=1.0)]), 'turning': Scenario(6.0, [IconTrack('main_quest', [(0.3, 0.36, 60.0), (1.5, 0.64, 60.0), (2.7, 0.36, 58.0), (3.9, 0.64, 56.0), (5.1, 0.5, 55.0)], appear=0.3), IconTrack('treasure', [(0.3, 0.45, 25.0), (1.5, 0.68, 24.0), (2.7, 0.4, 18.0), (6.0, 0.5, 8.0)], appear=0.3)])}
+
+class SyntheticCompass:
+    ICON_Y_RATIO = 0.08
+    TICK_SPACING = 0.01
+    BACKGROUND = 40
+
+    def __init__(self, scenario: Scenario, screen_width: int=1512, screen_height: int=982, roi_height_ratio: float=ROI_HEIGHT_RATIO, clock=time.perf_counter, icon_scale: float=1.0):
+        self.scenario = scenario
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.capture_height = int(screen_height * roi_height_ratio)
+        self.clock = clock
+        self.start_time: Optional[float] = None
+        self.scale = screen_width / DESIGN_WIDTH * icon_scale
+        self.icons = {}
+        for label, cfg in TARGET_ICONS.items():
+            image = cv2.imread(cfg['path'], cv2.IMREAD_UNCHANGED)
+            if image is not None and image.shape[2] == 4:
+                self.icons[label] = cv2.resize(image, (max(1, int(image.shape[1] * self.scale)), max(1, int(image.shape[0] * self.scale))), interpolation=cv2.INTER_AREA)
+        self.background = np.full((self.capture_height, screen_width, 3), self.BACKGROUND, dtype=np.uint8)
+        tick_top = int(self.capture_height * 0.75)
+        for x in np.arange(0.0, 1.0, self.TICK_SPACING):
+            px = int(x * screen_width)
+            self.background[tick_top:tick_top + max(2, self.capture_height // 20), px:px + 2] = 160
+        self._states: Dict[int, List[Tuple[str, float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        self.start_time = self.clock()
+
+    def elapsed(self) -> float:
+        return self.clock() - self.start_time
+
+    def get_screen_info(self) -> Dict[str, int]:
+        return {'width': self.screen_width, 'height': self.screen_height, 'capture_height': self.capture_height}
+
+    def normalize_coord(self, px_x: float, px_y: float) -> Tuple[float, float]:
+        return (px_x / self.screen_width, px_y / self.screen_height)
+
+    def get_frame(self, out: Optional[np.ndarray]=None) -> np.ndarray:
+        if self.start_time is None:
+            self.start()
+        return self.render(self.elapsed(), out)
+
+    def render(self, t: float, out: Optional[np.ndarray]=None) -> np.ndarray:
+        if out is None:
+            out = np.empty_like(self.background)
+        icons = self.scenario.icons_at(t)
+        np.copyto(out, self.background)
+        cy = int(self.ICON_Y_RATIO * self.screen_height)
+        for label, x_rel, distance in icons:
+            self._draw_icon(out, label, x_rel * self.screen_width, cy, distance)
+        with self._lock:
+            self._states[id(out)] = icons
+        return out
+
+    def _draw_icon(self, frame: np.ndarray, label: str, cx: float, cy: int, distance: float) -> None:
+        icon = self.icons.get(label)
+        if icon is None:
+            return
+        h, w = icon.shape[:2]
+        x = int(round(cx - w / 2.0))
+        y = cy - h // 2
+        if x < 0 or y < 0 or x + w > frame.shape[1] or y + h > frame.shape[0]:
+            return
+        alpha = icon[:, :, 3:4].astype(np.float32) / 255.0
+        region = frame[y:y + h, x:x + w]
+        region[:] = (region * (1.0 - alpha) + icon[:, :, :3] * alpha).astype(np.uint8)
+        font_scale = max(0.4, self.screen_width / 3000.0)
+        text = f'{distance:.0f}m'
+        (tw, th), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, 1)
+        cv2.putText(frame, text, (int(cx - tw / 2), max(th, y - 4)), cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), 1, cv2.LINE_AA)
+
+    def truth_for(self, frame: np.ndarray) -> List[Tuple[str, float, float]]:
+        with self._lock:
+            return self._states.get(id(frame), [])
+
+class TruthOCR:
+
+    def __init__(self, source: SyntheticCompass):
+        self.source = source
+
+    def extract_distance(self, frame_bgr: np.ndarray, x_rel: float, y_rel: float, w_rel: float, h_rel: float, screen_width: int, screen_height: int) -> str:
+        icons = self.source.truth_for(frame_bgr)
+        if not icons:
+            return 'N/A'
+        _, _, distance = min(icons, key=lambda icon: abs(icon[1] - x_rel))
+        return f'{distance:.0f}m'
@@ -1,8 +1,10 @@
 import cv2
 import sys
 import os
+import time
+import threading
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import COLORS
 
@@ -38,4 +40,86 @@ class Visualizer:
 
     def show(self, frame_bgr: np.ndarray) -> int:
         cv2.imshow(self.window_name, frame_bgr)
-        return cv2.waitKey(1) & 255
\ No newline at end of file
+        return cv2.waitKey(1) & 255
+
+class Preview:
+
+    def __init__(self, visualizer: Visualizer, max_fps: float=10.0, video_path: Optional[str]=None, profiler=None):
+        self.visualizer = visualizer
+        self.profiler = profiler
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.max_fps = max_fps
+        self.video_path = video_path
+        self._front: Optional[np.ndarray] = None
+        self._back: Optional[np.ndarray] = None
+        self._detections: List[Dict[str, Any]] = []
+        self._screen = (0, 0)
+        self._pending = False
+        self._last_submit = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = True
+        self._writer = None
+        self.frames_shown = 0
+        self.frames_skipped = 0
+        self._thread = threading.Thread(target=self._run, daemon=True, name='compasslayer-preview')
+        self._thread.start()
+
+    def submit(self, frame_bgr: np.ndarray, detections: List[Dict[str, Any]], screen_width: int, screen_height: int) -> None:
+        now = time.perf_counter()
+        if now - self._last_submit < self.min_interval:
+            self.frames_skipped += 1
+            return
+        if not self._lock.acquire(blocking=False):
+            self.frames_skipped += 1
+            return
+        try:
+            if self._back is None or self._back.shape != frame_bgr.shape:
+                self._back = np.empty_like(frame_bgr)
+            np.copyto(self._back, frame_bgr)
+            self._detections = [dict(det) for det in detections]
+            self._screen = (screen_width, screen_height)
+            self._pending = True
+        finally:
+            self._lock.release()
+        self._last_submit = now
+        self._wake.set()
+
+    def _run(self) -> None:
+        while self._running:
+            self._wake.wait(0.1)
+            self._wake.clear()
+            with self._lock:
+                if not self._pending:
+                    continue
+                self._front, self._back = (self._back, self._front)
+                detections = self._detections
+                screen_width, screen_height = self._screen
+                self._pending = False
+            start = time.perf_counter()
+            frame_vis = self.visualizer.draw_detections(self._front, detections, screen_width=screen_width, screen_height=screen_height)
+            if self.video_path:
+                self._write_video(frame_vis)
+            else:
+                self.visualizer.show(frame_vis)
+            self.frames_shown += 1
+            if self.profiler is not None:
+                self.profiler.record('preview/render', start, time.perf_counter(), self.frames_shown)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if not self.video_path and self.frames_shown:
+            cv2.destroyWindow(self.visualizer.window_name)
+
+    def _write_video(self, frame_bgr: np.ndarray) -> None:
+        if self._writer is None:
+            import imageio_ffmpeg
+            height, width = frame_bgr.shape[:2]
+            self._writer = imageio_ffmpeg.write_frames(self.video_path, (width, height), fps=self.max_fps, pix_fmt_in='bgr24', macro_block_size=1)
+            self._writer.send(None)
+        self._writer.send(frame_bgr)
+
+    def close(self) -> None:
+        self._running = False
+        self._wake.set()
+        self._thread.join(timeout=2.0)